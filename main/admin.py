@@ -1,36 +1,186 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Category, Task, Event, Habit, HabitCheckin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .models import Category, CategoryJob, Counter, Task, Event, Habit, HabitCheckin, PurgeJob, UserShard
+
+DEFAULT_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimated_count(model, using="default"):
+    """Približan broj redova tablice iz statistike baze (bez COUNT(*)); None ako je nema."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # -1 dok tablica nije analizirana
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # sqlite_stat1 postoji tek nakon ANALYZE; prvi broj u `stat` je broj redova
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Nefiltrirani changelist velike tablice broji se iz statistike baze
+    umjesto COUNT(*) nad milijunima redova. Uz filter/pretragu, ili ispod
+    ADMIN_ESTIMATED_COUNT_THRESHOLD redova, broj je točan.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where:
+            estimate = estimated_count(qs.model, qs.db)
+            threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", DEFAULT_ESTIMATED_COUNT_THRESHOLD)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filter po stranom ključu kao autocomplete polje (admin autocomplete
+    view) umjesto popisa svih korisnika/kategorija. Admin povezanog
+    modela mora imati search_fields.
+    """
+
+    template = "admin/main/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # formfield postavlja choices widgeta (za labelu odabrane vrijednosti)
+        self.widget = field.formfield(widget=AutocompleteSelect(field, model_admin.admin_site), required=False).widget
+        value = self.used_parameters.get(self.lookup_kwarg)
+        self.value = value[-1] if isinstance(value, list) else value
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": _("All"),
+        }
+
+    def rendered_widget(self):
+        return self.widget.render(
+            self.lookup_kwarg, self.value, attrs={"id": f"filter_{self.lookup_kwarg}", "style": "width: 100%"}
+        )
+
+
+class PlannerAdmin(admin.ModelAdmin):
+    """Zajedničke postavke za tablice s milijunima redova."""
+
+    paginator = EstimatedCountPaginator
+    # bez drugog COUNT(*) cijele tablice uz filtrirani rezultat
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(f, tuple) and f[1] is AutocompleteFilter for f in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+        return media
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(PlannerAdmin):
     list_display = ("name", "owner")
     search_fields = ("name",)
-    list_filter = ("owner",)
+    list_filter = (("owner", AutocompleteFilter),)
+    list_select_related = ("owner",)
+    autocomplete_fields = ("owner",)
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(PlannerAdmin):
     list_display = ("title", "owner", "status", "priority", "due_date", "estimated_time", "category")
     search_fields = ("title", "description")
-    list_filter = ("status", "priority", "category", "owner")
+    list_filter = ("status", "priority", ("category", AutocompleteFilter), ("owner", AutocompleteFilter))
+    list_select_related = ("owner", "category")
+    autocomplete_fields = ("owner", "category", "parent")
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(PlannerAdmin):
     list_display = ("title", "owner", "start_datetime", "end_datetime", "location", "category")
     search_fields = ("title", "description", "location")
-    list_filter = ("category", "owner")
+    list_filter = (("category", AutocompleteFilter), ("owner", AutocompleteFilter))
+    list_select_related = ("owner", "category")
+    autocomplete_fields = ("owner", "category")
+    date_hierarchy = "start_datetime"
 
 
 @admin.register(Habit)
-class HabitAdmin(admin.ModelAdmin):
+class HabitAdmin(PlannerAdmin):
     list_display = ("name", "owner", "frequency", "target_count", "active")
     search_fields = ("name",)
-    list_filter = ("active", "owner")
+    list_filter = ("active", ("owner", AutocompleteFilter))
+    list_select_related = ("owner",)
+    autocomplete_fields = ("owner",)
 
 
 @admin.register(HabitCheckin)
-class HabitCheckinAdmin(admin.ModelAdmin):
+class HabitCheckinAdmin(PlannerAdmin):
     list_display = ("habit", "performed_at", "done")
-    list_filter = ("done", "performed_at")
+    list_filter = ("done", ("habit", AutocompleteFilter))
+    # HabitCheckin.__str__ i stupac habit čitaju habit
+    list_select_related = ("habit",)
+    autocomplete_fields = ("habit",)
+    date_hierarchy = "performed_at"
+
+
+@admin.register(CategoryJob)
+class CategoryJobAdmin(PlannerAdmin):
+    list_display = ("category_name", "owner", "action", "state", "processed", "total", "created_at")
+    list_filter = ("state", "action")
+    list_select_related = ("owner",)
+    autocomplete_fields = ("owner", "category", "target")
+
+
+@admin.register(PurgeJob)
+class PurgeJobAdmin(PlannerAdmin):
+    list_display = ("label", "kind", "owner", "state", "deleted", "total", "rows_per_second", "created_at")
+    list_filter = ("state", "kind")
+    list_select_related = ("owner",)
+    # posao vodi `process_purge_jobs`
+    readonly_fields = ("owner", "habit", "kind", "total", "deleted", "seconds", "finished_at")
+
+
+@admin.register(Counter)
+class CounterAdmin(PlannerAdmin):
+    list_display = ("owner", "category", "tasks_open", "tasks_done", "events", "habits", "checkins")
+    list_select_related = ("owner", "category")
+    autocomplete_fields = ("owner", "category")
+
+
+@admin.register(UserShard)
+class UserShardAdmin(PlannerAdmin):
+    list_display = ("user", "alias", "locked", "moved_at")
+    list_filter = ("alias", "locked")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    # premještanje ide preko `rebalance_shards`, ne ručnom izmjenom
+    readonly_fields = ("alias", "locked", "moved_at")
@@ -0,0 +1,220 @@
+import math
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+
+from .checkin_archive import archived_checkins
+from .models import HabitCheckin
+
+# NumPy je opcionalan i skup za import (~100 ms), pa se učitava tek
+# kod prvog binanja - workeri i većina requesta ga nikad ne trebaju
+_numpy = None
+
+
+def numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy as np
+        except ImportError:
+            np = False
+        _numpy = np
+    return _numpy or None
+
+BUCKETS = {
+    "hour": (TruncHour, timedelta(hours=1)),
+    "day": (TruncDay, timedelta(days=1)),
+    "week": (TruncWeek, timedelta(weeks=1)),
+}
+
+# zaštita od prevelikih odgovora (godina po satima je ~8 760)
+MAX_BUCKETS = 50_000
+
+
+def bucket_start(dt, bucket):
+    """Početak bucketa (u lokalnoj zoni) kojem pripada `dt` - isto kao Trunc* u SQL-u."""
+    local = timezone.localtime(dt)
+    if bucket == "hour":
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        day = day - timedelta(days=day.weekday())
+    # ponovno lokaliziramo jer se offset mogao promijeniti (DST)
+    return timezone.make_aware(day.replace(tzinfo=None))
+
+
+def date_range(start_date, end_date):
+    """[start_date, end_date] kao aware datetimeovi u lokalnoj zoni."""
+    tz = timezone.get_current_timezone()
+    return (
+        datetime.combine(start_date, time(), tzinfo=tz),
+        datetime.combine(end_date + timedelta(days=1), time(), tzinfo=tz),
+    )
+
+
+def checkins_in_range(start, end):
+    return HabitCheckin.objects.filter(done=True, performed_at__gte=start, performed_at__lt=end)
+
+
+def grouped_counts(qs, bucket, by_habit=False):
+    """
+    GROUP BY Trunc*(performed_at) u bazi. Vraća {bucket_dt: n} ili
+    {(habit_id, bucket_dt): n} ako je by_habit.
+    """
+    trunc, _ = BUCKETS[bucket]
+    fields = ["habit_id", "b"] if by_habit else ["b"]
+    rows = (
+        qs.order_by()
+        .annotate(b=trunc("performed_at"))
+        .values(*fields)
+        .annotate(n=Count("pk"))
+    )
+    if by_habit:
+        return {(r["habit_id"], r["b"]): r["n"] for r in rows}
+    return {r["b"]: r["n"] for r in rows}
+
+
+def densify(counts, bucket, start, end):
+    """
+    Pretvara {bucket_dt: n} u gusti niz brojeva od `start` do `end`;
+    payload je tada samo lista intova umjesto liste objekata.
+    """
+    _, step = BUCKETS[bucket]
+    first = bucket_start(start, bucket)
+    # `end` je isključiv
+    size = min(math.ceil((end - first) / step), MAX_BUCKETS)
+
+    series = [0] * size
+    for dt, n in counts.items():
+        # round() zbog dana od 23/25 sati kod promjene ljetnog vremena
+        i = round((dt - first) / step)
+        if 0 <= i < size:
+            series[i] += n
+    return first, series
+
+
+def bucket_edges(bucket, start, end):
+    """
+    Granice bucketova kao epoch sekunde. Dani i tjedni se računaju po
+    lokalnom kalendaru (pa DST ne pomiče granice), sati apsolutno.
+    """
+    _, step = BUCKETS[bucket]
+    first = bucket_start(start, bucket)
+    naive_first = timezone.localtime(first).replace(tzinfo=None)
+
+    edges = []
+    i = 0
+    while len(edges) <= MAX_BUCKETS:
+        if bucket == "hour":
+            edge = first + i * step
+        else:
+            edge = timezone.make_aware(naive_first + i * step)
+        edges.append(edge.timestamp())
+        if edge >= end:
+            break
+        i += 1
+    return first, edges
+
+
+def bin_epochs(epochs, edges):
+    """
+    Broj timestampova po bucketu. S NumPyjem je to jedan searchsorted +
+    bincount nad cijelim nizom; bez njega bisect po timestampu.
+    """
+    size = len(edges) - 1
+    np = numpy()
+    if np is not None:
+        arr = np.asarray(epochs, dtype=np.float64)
+        idx = np.searchsorted(np.asarray(edges), arr, side="right") - 1
+        idx = idx[(idx >= 0) & (idx < size)]
+        return np.bincount(idx, minlength=size).tolist()
+
+    series = [0] * size
+    for ts in epochs:
+        i = bisect_right(edges, ts) - 1
+        if 0 <= i < size:
+            series[i] += 1
+    return series
+
+
+def payload(bucket, first, series):
+    _, step = BUCKETS[bucket]
+    return {
+        "bucket": bucket,
+        "start": first.isoformat(),
+        "step_seconds": int(step.total_seconds()),
+        "counts": series,
+    }
+
+
+def sql_trunc_is_native():
+    # SQLite nema date_trunc; Django ga radi Python funkcijom po redu,
+    # pa je tamo brže dohvatiti timestampove i binati ih ovdje
+    return connection.vendor != "sqlite"
+
+
+def habit_series(habit, bucket, start, end):
+    qs = checkins_in_range(start, end).filter(habit=habit)
+    archived = archived_checkins({"habit": habit}, start, end, done_only=True)
+
+    if sql_trunc_is_native():
+        counts = grouped_counts(qs, bucket)
+        for c in archived:
+            b = bucket_start(c.performed_at, bucket)
+            counts[b] = counts.get(b, 0) + 1
+        first, series = densify(counts, bucket, start, end)
+    else:
+        first, edges = bucket_edges(bucket, start, end)
+        epochs = [dt.timestamp() for dt in qs.order_by().values_list("performed_at", flat=True)]
+        epochs.extend(c.performed_at.timestamp() for c in archived)
+        series = bin_epochs(epochs, edges)
+
+    return payload(bucket, first, series)
+
+
+def user_series(user, bucket, start, end):
+    """
+    Zbroj svih habita korisnika + niz po habitu. Čita se samo kompaktan
+    niz (habit_id, timestamp) i bina u memoriji (NumPy ako je instaliran).
+    """
+    rows = (
+        checkins_in_range(start, end)
+        .filter(habit__owner=user)
+        .order_by()
+        .values_list("habit_id", "performed_at")
+    )
+
+    per_habit = {}
+    for habit_id, dt in rows:
+        per_habit.setdefault(habit_id, []).append(dt.timestamp())
+    for c in archived_checkins({"habit__owner": user}, start, end, done_only=True):
+        per_habit.setdefault(c.habit_id, []).append(c.performed_at.timestamp())
+
+    first, edges = bucket_edges(bucket, start, end)
+    result = payload(bucket, first, bin_epochs([ts for v in per_habit.values() for ts in v], edges))
+    result["habits"] = {habit_id: bin_epochs(epochs, edges) for habit_id, epochs in per_habit.items()}
+    return result
+
+
+def heatmap(qs, habit_filter, start, end):
+    """
+    Matrica 7 x 24 (dan u tjednu x sat) za klasični heatmap prikaz;
+    `habit_filter` bira odgovarajuće arhive (npr. {"habit": habit}).
+    """
+    matrix = [[0] * 24 for _ in range(7)]
+    rows = (
+        qs.order_by()
+        .annotate(wd=ExtractIsoWeekDay("performed_at"), h=ExtractHour("performed_at"))
+        .values("wd", "h")
+        .annotate(n=Count("pk"))
+    )
+    for r in rows:
+        matrix[r["wd"] - 1][r["h"]] += r["n"]
+    for c in archived_checkins(habit_filter, start, end, done_only=True):
+        local = timezone.localtime(c.performed_at)
+        matrix[local.weekday()][local.hour] += 1
+    return {"bucket": "heatmap", "rows": "mon..sun", "columns": "0..23", "counts": matrix}
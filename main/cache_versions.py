@@ -0,0 +1,33 @@
+"""
+Verzije cachea po korisniku (main/smartlists.py, main/tags.py).
+
+Izvedeni podaci spremaju se pod ključem koji sadrži verziju korisnika.
+Promjena podataka samo podigne verziju: stari unosi se više ne čitaju
+i sami isteknu, bez traženja i brisanja pojedinih ključeva.
+"""
+
+import time
+
+
+def version_key(prefix, user_id):
+    return f"{prefix}:version:{user_id}"
+
+
+def current_version(cache, prefix, user_id):
+    key = version_key(prefix, user_id)
+    version = cache.get(key)
+    if version is None:
+        # početna verzija iz sata, ne 0: ako cache izbaci ključ verzije,
+        # stari unosi pod istom verzijom ne smiju ponovno postati važeći
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(cache, prefix, user_id):
+    """Nova verzija - stari unosi u cacheu više se ne čitaju."""
+    key = version_key(prefix, user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.utils import timezone
+
+from . import smartlists
+from .counters import moved_counts, record_move
+from .models import Category, CategoryJob, Event, Task
+from .shards import atomic_for
+
+# Kategorije s više stavki od ovoga obrađuju se u pozadini
+DEFAULT_SYNC_LIMIT = 500
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def sync_limit():
+    return getattr(settings, "CATEGORY_JOB_SYNC_LIMIT", DEFAULT_SYNC_LIMIT)
+
+
+def chunk_size():
+    return getattr(settings, "CATEGORY_JOB_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def item_querysets(category):
+    return [
+        Task.objects.filter(owner=category.owner_id, category=category),
+        Event.objects.filter(owner=category.owner_id, category=category),
+    ]
+
+
+def count_items(category):
+    return sum(qs.count() for qs in item_querysets(category))
+
+
+def _apply(category, qs, action, target):
+    if action == CategoryJob.Action.DELETE_ALL:
+        # delete() šalje post_delete signale pa se brojači ažuriraju sami
+        qs.delete()
+    else:
+        # update() ne okida signale -> brojače prebacujemo ručno
+        deltas = moved_counts(qs)
+        qs.update(category=target)
+        record_move(category.owner_id, category.pk, target.pk, deltas)
+        if qs.model is Task:
+            smartlists.invalidate(category.owner_id)
+
+
+def apply_action(category, action, target):
+    """
+    Cijela operacija u jednoj transakciji - za male kategorije
+    (i kao zadnji korak posla, za stavke dodane u međuvremenu).
+    """
+    with atomic_for(Category, instance=category):
+        for qs in item_querysets(category):
+            _apply(category, qs, action, target)
+        category.delete()
+
+
+def apply_action_chunked(category, action, target, size=None, progress=None):
+    """
+    Obrađuje stavke kategorije u dijelovima od `size` redova, svaki dio u
+    svojoj transakciji, pa tek na kraju briše kategoriju. Ako se posao
+    prekine, kategorija i preostale stavke ostaju netaknute pa se posao
+    može ponoviti - nema "siročadi".
+    """
+    size = size or chunk_size()
+
+    for qs in item_querysets(category):
+        while True:
+            with atomic_for(Category, instance=category):
+                pks = list(qs.order_by("pk").values_list("pk", flat=True)[:size])
+                if not pks:
+                    break
+                _apply(category, qs.model.objects.filter(pk__in=pks), action, target)
+            if progress is not None:
+                progress(len(pks))
+
+    apply_action(category, action, target)
+
+
+def start_category_action(category, action, target):
+    """
+    Male kategorije se obrade odmah (kao i prije), za velike se kreira
+    CategoryJob koji obrađuje `process_category_jobs`.
+    Vraća job ili None ako je sve već gotovo.
+    """
+    total = count_items(category)
+    if total <= sync_limit():
+        apply_action(category, action, target)
+        return None
+
+    return CategoryJob.objects.create(
+        owner_id=category.owner_id,
+        category=category,
+        category_name=category.name,
+        target=target,
+        action=action,
+        total=total,
+    )
+
+
+def run_job(job):
+    # "zaključamo" posao da ga dva workera ne uzmu istovremeno
+    claimed = CategoryJob.objects.filter(
+        pk=job.pk, state=CategoryJob.State.PENDING
+    ).update(state=CategoryJob.State.RUNNING)
+    if not claimed:
+        return False
+
+    job.refresh_from_db()
+
+    def progress(n):
+        job.processed += n
+        CategoryJob.objects.filter(pk=job.pk).update(processed=job.processed)
+
+    try:
+        if job.category is not None:
+            target = job.target
+            if job.action != CategoryJob.Action.DELETE_ALL and target is None:
+                # ciljna kategorija je u međuvremenu obrisana -> Inbox
+                target, _ = Category.objects.get_or_create(
+                    owner_id=job.owner_id,
+                    is_inbox=True,
+                    defaults={"name": "Inbox"},
+                )
+            apply_action_chunked(job.category, job.action, target, progress=progress)
+    except Exception as exc:
+        job.state = CategoryJob.State.FAILED
+        job.error = str(exc)
+        CategoryJob.objects.filter(pk=job.pk).update(state=job.state, error=job.error)
+        raise
+
+    # kategorija je obrisana, pa update() umjesto save()
+    job.state = CategoryJob.State.DONE
+    job.finished_at = timezone.now()
+    CategoryJob.objects.filter(pk=job.pk).update(state=job.state, finished_at=job.finished_at)
+    return True
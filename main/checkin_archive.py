@@ -0,0 +1,198 @@
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models.functions import TruncMonth
+
+from .counters import suspend_counters
+from .models import HabitCheckin, HabitCheckinArchive
+from .shards import atomic_for
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+
+def archive_after_days():
+    return getattr(settings, "CHECKIN_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+# --- kodiranje ---
+
+def month_start(dt):
+    """Početak (UTC) mjeseca kojem pripada `dt`."""
+    dt = dt.astimezone(dt_timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def encode(entries):
+    """
+    entries: sortirani [(minute_od_pocetka_mjeseca, done)] bez duplikata.
+    Minute se spremaju kao razlike (varint, 7 bita po bajtu) - za hourly
+    habit je to 1 bajt po check-inu.
+    """
+    offsets = bytearray()
+    bits = bytearray((len(entries) + 7) // 8)
+    previous = 0
+    for i, (minute, done) in enumerate(entries):
+        delta = minute - previous
+        previous = minute
+        while True:
+            byte = delta & 0x7F
+            delta >>= 7
+            if delta:
+                offsets.append(byte | 0x80)
+            else:
+                offsets.append(byte)
+                break
+        if done:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(offsets), bytes(bits)
+
+
+def decode(archive):
+    """Vraća [(performed_at, done)] uzlazno po vremenu."""
+    start = datetime(archive.month.year, archive.month.month, 1, tzinfo=dt_timezone.utc)
+    data = bytes(archive.offsets)
+    bits = bytes(archive.done_bits)
+
+    result = []
+    minute = 0
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        minute += value
+        i = len(result)
+        result.append((start + timedelta(minutes=minute), bool(bits[i >> 3] & (1 << (i & 7)))))
+        value = shift = 0
+    return result
+
+
+# --- čitanje ---
+
+class ArchivedCheckin:
+    """Check-in iz arhive; ponaša se kao HabitCheckin za prikaz (bez pk)."""
+
+    pk = None
+    archived = True
+
+    def __init__(self, habit_id, performed_at, done):
+        self.habit_id = habit_id
+        self.performed_at = performed_at
+        self.done = done
+
+
+def archives_for(habit_filter, start=None, end=None):
+    qs = HabitCheckinArchive.objects.filter(**habit_filter)
+    if start is not None:
+        qs = qs.filter(month__gte=month_start(start).date())
+    if end is not None:
+        qs = qs.filter(month__lt=end.astimezone(dt_timezone.utc).date() + timedelta(days=1))
+    return qs
+
+
+def archived_checkins(habit_filter, start=None, end=None, done_only=False):
+    """
+    Check-inovi iz arhive u rasponu [start, end), npr.
+    archived_checkins({"habit": habit}) ili ({"habit__owner": user}).
+    """
+    result = []
+    for archive in archives_for(habit_filter, start, end):
+        for performed_at, done in decode(archive):
+            if start is not None and performed_at < start:
+                continue
+            if end is not None and performed_at >= end:
+                continue
+            if done_only and not done:
+                continue
+            result.append(ArchivedCheckin(archive.habit_id, performed_at, done))
+    return result
+
+
+def is_archived(habit, performed_at):
+    archive = HabitCheckinArchive.objects.filter(
+        habit=habit, month=month_start(performed_at).date()
+    ).first()
+    if archive is None:
+        return False
+    return any(dt == performed_at for dt, _ in decode(archive))
+
+
+# --- sažimanje / vraćanje ---
+
+def _month_entries(archive):
+    start = datetime(archive.month.year, archive.month.month, 1, tzinfo=dt_timezone.utc)
+    return {int((dt - start).total_seconds() // 60): done for dt, done in decode(archive)}
+
+
+def compact_month(habit_id, start):
+    """
+    Sažima sve check-inove habita u mjesecu koji počinje u `start` (UTC)
+    u jedan HabitCheckinArchive red i briše izvorne redove. Vraća broj
+    arhiviranih redova.
+    """
+    end = next_month(start)
+    with atomic_for(HabitCheckin):
+        rows = HabitCheckin.objects.filter(habit_id=habit_id, performed_at__gte=start, performed_at__lt=end)
+        live = list(rows.values_list("pk", "performed_at", "done"))
+        if not live:
+            return 0
+
+        archive = (
+            HabitCheckinArchive.objects.select_for_update()
+            .filter(habit_id=habit_id, month=start.date())
+            .first()
+        )
+        entries = _month_entries(archive) if archive else {}
+        for _, performed_at, done in live:
+            entries[int((performed_at - start).total_seconds() // 60)] = done
+
+        offsets, bits = encode(sorted(entries.items()))
+        HabitCheckinArchive.objects.update_or_create(
+            habit_id=habit_id,
+            month=start.date(),
+            defaults={"count": len(entries), "offsets": offsets, "done_bits": bits},
+        )
+
+        # check-inovi i dalje postoje (u arhivi), pa se brojači ne mijenjaju
+        with suspend_counters():
+            HabitCheckin.objects.filter(pk__in=[pk for pk, _, _ in live]).delete()
+
+    return len(live)
+
+
+def months_to_compact(cutoff, habit_ids=None):
+    qs = HabitCheckin.objects.filter(performed_at__lt=month_start(cutoff))
+    if habit_ids:
+        qs = qs.filter(habit_id__in=habit_ids)
+    rows = (
+        qs.order_by()
+        .annotate(m=TruncMonth("performed_at", tzinfo=dt_timezone.utc))
+        .values_list("habit_id", "m")
+        .distinct()
+    )
+    return sorted((habit_id, month_start(m)) for habit_id, m in rows)
+
+
+def rehydrate(archive):
+    """Vraća arhivirane check-inove u HabitCheckin tablicu i briše arhivu."""
+    with atomic_for(HabitCheckin):
+        rows = [
+            HabitCheckin(habit_id=archive.habit_id, performed_at=performed_at, done=done)
+            for performed_at, done in decode(archive)
+        ]
+        with suspend_counters():
+            HabitCheckin.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            archive.delete()
+    return len(rows)
+
+
+def month_key(value):
+    """'2026-01' -> date(2026, 1, 1)"""
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
@@ -0,0 +1,161 @@
+"""
+Opcionalni međuspremnik za check-inove (CHECKIN_BUFFER_SECONDS > 0).
+
+Klijent koji ponavlja isti check-in ne radi upit po zahtjevu: check-inovi
+se skupljaju u memoriji procesa po ključu (habit, minuta), duplikati se
+spajaju odmah, a u bazu se upisuju zajedno (jedan upit za postojeće +
+jedan bulk insert) kad se skupi CHECKIN_BUFFER_SIZE stavki, kad prođe
+CHECKIN_BUFFER_SECONDS ili prije čitanja check-inova.
+
+Cijena: ako proces padne, gube se check-inovi iz zadnjih nekoliko sekundi.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+
+from . import pubsub
+from .checkin_archive import archived_checkins
+from .counters import bump
+from .models import Habit, HabitCheckin
+from .purge import purging_habits
+from .shards import atomic_for, enabled as shards_enabled, shard_for_user, using_shard
+
+DEFAULT_BUFFER_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = {}  # (habit_id, performed_at) -> (owner_id, done)
+_timer = None
+
+
+def buffer_seconds():
+    return getattr(settings, "CHECKIN_BUFFER_SECONDS", 0)
+
+
+def enabled():
+    return buffer_seconds() > 0
+
+
+def add(habit, performed_at, done=True):
+    """
+    Dodaje check-in u međuspremnik. Vraća False ako je isti (habit, minuta)
+    već na čekanju - takav se zahtjev spaja s prethodnim.
+    """
+    key = (habit.pk, performed_at.replace(second=0, microsecond=0))
+    with _lock:
+        if key in _pending:
+            return False
+        _pending[key] = (habit.owner_id, done)
+        _schedule()
+        full = len(_pending) >= getattr(settings, "CHECKIN_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)
+
+    if full:
+        flush()
+    return True
+
+
+def _schedule():
+    """Pozadinski flush ako nitko drugi ne potakne upis (poziva se pod _lock)."""
+    global _timer
+    if _timer is None and _pending:
+        _timer = threading.Timer(buffer_seconds(), _flush_in_thread)
+        _timer.daemon = True
+        _timer.start()
+
+
+def pending_count():
+    return len(_pending)
+
+
+def _flush_in_thread():
+    try:
+        flush()
+    finally:
+        # timer nit ima svoje konekcije
+        connections.close_all()
+
+
+def flush(owner_id=None):
+    """
+    Upisuje check-inove na čekanju (svih korisnika ili samo `owner_id`);
+    vraća broj novih redova. Ako upis za nekog korisnika ne uspije, njegovi
+    check-inovi se vraćaju u međuspremnik za sljedeći pokušaj.
+    """
+    global _pending, _timer
+    with _lock:
+        if owner_id is None:
+            batch, _pending = _pending, {}
+        else:
+            batch = {key: value for key, value in _pending.items() if value[0] == owner_id}
+            for key in batch:
+                del _pending[key]
+        if _timer is not None and not _pending:
+            _timer.cancel()
+            _timer = None
+    if not batch:
+        return 0
+
+    by_owner = {}
+    for (habit_id, performed_at), (owner, done) in batch.items():
+        by_owner.setdefault(owner, []).append((habit_id, performed_at, done))
+
+    written = 0
+    for owner, rows in by_owner.items():
+        try:
+            # flush može obrađivati check-inove drugih korisnika nego request
+            with using_shard(shard_for_user(owner) if shards_enabled() else None):
+                written += _write(owner, rows)
+        except Exception:
+            logger.exception("Buffered check-ins of user %s not written, will retry", owner)
+            with _lock:
+                for habit_id, performed_at, done in rows:
+                    # noviji check-in za istu minutu ima prednost
+                    _pending.setdefault((habit_id, performed_at), (owner, done))
+                _schedule()
+    return written
+
+
+def _write(owner_id, rows):
+    # habit se u međuvremenu mogao obrisati ili predati PurgeJobu
+    habit_ids = set(
+        Habit.objects.filter(pk__in={habit_id for habit_id, _, _ in rows})
+        .exclude(pk__in=purging_habits())
+        .values_list("pk", flat=True)
+    )
+    rows = [row for row in rows if row[0] in habit_ids]
+    if not rows:
+        return 0
+    times = [performed_at for _, performed_at, _ in rows]
+
+    existing = set(
+        HabitCheckin.objects.filter(habit_id__in=habit_ids, performed_at__in=times)
+        .values_list("habit_id", "performed_at")
+    )
+    existing.update(
+        (c.habit_id, c.performed_at)
+        for c in archived_checkins({"habit_id__in": habit_ids}, min(times), max(times) + timedelta(minutes=1))
+    )
+
+    new = [
+        HabitCheckin(habit_id=habit_id, performed_at=performed_at, done=done)
+        for habit_id, performed_at, done in rows
+        if (habit_id, performed_at) not in existing
+    ]
+    if not new:
+        return 0
+
+    with atomic_for(HabitCheckin):
+        # ignore_conflicts za utrku s drugim procesom; bulk_create ne okida
+        # signale, pa se brojač mijenja ručno (reconcile_counters ispravlja
+        # rijetko odstupanje nakon takve utrke)
+        HabitCheckin.objects.bulk_create(new, ignore_conflicts=True)
+        bump(owner_id, checkins=len(new))
+        # ni obavijesti za SSE ne idu preko signala
+        for habit_id in habit_ids:
+            pubsub.notify(owner_id, HabitCheckin, {"type": "checkin", "id": None, "action": "saved", "habit": habit_id})
+    return len(new)
@@ -0,0 +1,309 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import smartlists, tags
+from .counters import bump_scoped, suspend_counters, task_field
+from .models import ArchivedEvent, ArchivedTask, Event, Tag, Task, TaskDependency
+from .shards import atomic_for
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+DEFAULT_CHUNK_SIZE = 500
+
+TASK_FIELDS = [
+    "owner_id", "category_id", "title", "description", "priority",
+    "status", "due_date", "estimated_time", "created_at",
+]
+EVENT_FIELDS = [
+    "owner_id", "category_id", "title", "description", "location",
+    "start_datetime", "end_datetime",
+]
+
+# live model -> (arhivski model, polja koja se kopiraju)
+ARCHIVES = {
+    Task: (ArchivedTask, TASK_FIELDS),
+    Event: (ArchivedEvent, EVENT_FIELDS),
+}
+
+
+def archive_after_days():
+    return getattr(settings, "COLD_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+def cold_tasks(cutoff):
+    # Task nema datum završetka, pa se gleda created_at. Task s podtaskovima
+    # čeka da se prvo arhiviraju podtaskovi - brisanje bi ih inače povuklo
+    # (CASCADE) bez arhive i bez ispravka brojača.
+    has_children = Task.objects.filter(parent=OuterRef("pk"))
+    return Task.objects.filter(status=Task.Status.DONE, created_at__lt=cutoff).exclude(Exists(has_children))
+
+
+def cold_events(cutoff):
+    # serije (ponavljajući eventi) se ne arhiviraju
+    return Event.objects.filter(recurrence__isnull=True).filter(
+        Q(end_datetime__lt=cutoff) | Q(end_datetime__isnull=True, start_datetime__lt=cutoff)
+    )
+
+
+def _counter_deltas(rows, sign):
+    """Brojači se mijenjaju jednom po (owner, category), ne po redu."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        field = task_field(row.status) if hasattr(row, "status") else "events"
+        deltas[(row.owner_id, row.category_id)][field] += sign
+    for (owner_id, category_id), fields in deltas.items():
+        bump_scoped(owner_id, category_id, **fields)
+
+
+def _task_links(rows):
+    """Nadređeni i ovisnosti taskova (brisanje ih briše kaskadom), za arhivski red."""
+    pks = [row.pk for row in rows]
+    depends_on, dependents = defaultdict(list), defaultdict(list)
+    edges = TaskDependency.objects.filter(Q(task_id__in=pks) | Q(depends_on_id__in=pks))
+    for task_id, depends_on_id in edges.values_list("task_id", "depends_on_id"):
+        depends_on[task_id].append(depends_on_id)
+        dependents[depends_on_id].append(task_id)
+    return {
+        row.pk: {
+            "original_parent_id": row.parent_id,
+            "depends_on_ids": depends_on[row.pk],
+            "dependent_ids": dependents[row.pk],
+        }
+        for row in rows
+    }
+
+
+def _tag_ids(model, rows):
+    link, field = tags.LINKS[model]
+    tag_ids = defaultdict(list)
+    for pk, tag_id in link.objects.filter(**{f"{field}_id__in": [row.pk for row in rows]}).values_list(
+        f"{field}_id", "tag_id"
+    ):
+        tag_ids[pk].append(tag_id)
+    return tag_ids
+
+
+def _restore_tags(model, rows, restored):
+    """Veze prema oznakama koje još postoje (oznaka je možda obrisana dok je red bio u arhivi)."""
+    link, field = tags.LINKS[model]
+    wanted = {tag_id for row in rows for tag_id in row.tag_ids}
+    owners = dict(Tag.objects.filter(pk__in=wanted).values_list("pk", "owner_id"))
+    link.objects.bulk_create(
+        [
+            link(tag_id=tag_id, **{f"{field}_id": obj.pk})
+            for row, obj in zip(rows, restored)
+            for tag_id in row.tag_ids
+            if owners.get(tag_id) == row.owner_id
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def archive_chunk(qs, size=DEFAULT_CHUNK_SIZE):
+    """
+    Premješta do `size` redova iz `qs` u arhivsku tablicu u jednoj
+    transakciji. Vraća broj premještenih redova (0 = gotovo).
+    """
+    archive_model, fields = ARCHIVES[qs.model]
+    with atomic_for(qs.model):
+        rows = list(qs.order_by("pk")[:size])
+        if not rows:
+            return 0
+
+        links = _task_links(rows) if qs.model is Task else {}
+        tag_ids = _tag_ids(qs.model, rows)
+        archive_model.objects.bulk_create([
+            archive_model(
+                original_id=row.pk,
+                tag_ids=tag_ids[row.pk],
+                **{f: getattr(row, f) for f in fields},
+                **links.get(row.pk, {}),
+            )
+            for row in rows
+        ])
+        _counter_deltas(rows, -1)
+        with suspend_counters():
+            qs.model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def _with_archived_ancestors(rows):
+    """
+    Dodaje arhivirane nadređene (task se arhivira tek nakon svojih
+    podtaskova) i slaže redove tako da nadređeni idu prije podtaskova.
+    """
+    by_original = {row.original_id: row for row in rows}
+    missing = {row.original_parent_id for row in rows} - set(by_original) - {None}
+    while missing:
+        found = list(ArchivedTask.objects.filter(
+            owner_id__in={row.owner_id for row in rows}, original_id__in=missing
+        ))
+        by_original.update((row.original_id, row) for row in found)
+        missing = {row.original_parent_id for row in found} - set(by_original) - {None}
+
+    def depth(row):
+        parent = by_original.get(row.original_parent_id)
+        return 0 if parent is None else depth(parent) + 1
+
+    return sorted(by_original.values(), key=depth)
+
+
+def _attach_parents(rows, restored, pk_map):
+    """parent i path vraćenih taskova; nadređeni koji više ne postoji -> korijen."""
+    parents = {
+        pk: (owner_id, path)
+        for pk, owner_id, path in Task.objects.filter(
+            pk__in={row.original_parent_id for row in rows} - set(pk_map) - {None}
+        ).values_list("pk", "owner_id", "path")
+    }
+    for row, task in zip(rows, restored):
+        if row.original_parent_id in pk_map:
+            parent = pk_map[row.original_parent_id]
+            task.parent_id, task.path = parent.pk, f"{parent.path}{parent.pk}/"
+        elif parents.get(row.original_parent_id, (None,))[0] == row.owner_id:
+            task.parent_id = row.original_parent_id
+            task.path = f"{parents[task.parent_id][1]}{task.parent_id}/"
+
+
+def _bulk_create_tasks(rows, restored):
+    """
+    Sprema taskove po razinama (redovi su složeni od korijena): podtasku
+    treba id nadređenog, a on je nov ako je izvorni bio zauzet.
+    Vraća {izvorni id: vraćeni task}.
+    """
+    pk_map = {}
+
+    def flush(level):
+        _attach_parents([row for row, _ in level], [task for _, task in level], pk_map)
+        Task.objects.bulk_create([task for _, task in level])
+        pk_map.update((row.original_id, task) for row, task in level)
+
+    level, level_ids = [], set()
+    for row, task in zip(rows, restored):
+        if row.original_parent_id in level_ids:
+            flush(level)
+            level, level_ids = [], set()
+        level.append((row, task))
+        level_ids.add(row.original_id)
+    flush(level)
+    return pk_map
+
+
+def _restore_dependencies(rows, pk_map):
+    """Ovisnosti prema taskovima istog vlasnika koji su (opet) u live tablici."""
+    edges = set()
+    for row in rows:
+        pk = pk_map[row.original_id].pk
+        for other in row.depends_on_ids:
+            edges.add((row.owner_id, pk, pk_map[other].pk if other in pk_map else other))
+        for other in row.dependent_ids:
+            edges.add((row.owner_id, pk_map[other].pk if other in pk_map else other, pk))
+    ids = {pk for _, task, depends_on in edges for pk in (task, depends_on)}
+    owners = dict(Task.objects.filter(pk__in=ids).values_list("pk", "owner_id"))
+    TaskDependency.objects.bulk_create(
+        [
+            TaskDependency(task_id=task, depends_on_id=depends_on)
+            for owner_id, task, depends_on in edges
+            if owners.get(task) == owner_id and owners.get(depends_on) == owner_id
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _remap_archived_links(rows, pk_map):
+    """Task vraćen s novim id-em: arhivirani taskovi koji ga spominju prelaze na novi id."""
+    moved = {old: task.pk for old, task in pk_map.items() if old != task.pk}
+    if not moved:
+        return
+    archived = ArchivedTask.objects.filter(owner_id__in={row.owner_id for row in rows}).exclude(
+        pk__in=[row.pk for row in rows]
+    )
+    changed = []
+    for row in archived.only("original_parent_id", "depends_on_ids", "dependent_ids"):
+        before = (row.original_parent_id, row.depends_on_ids, row.dependent_ids)
+        row.original_parent_id = moved.get(row.original_parent_id, row.original_parent_id)
+        row.depends_on_ids = [moved.get(pk, pk) for pk in row.depends_on_ids]
+        row.dependent_ids = [moved.get(pk, pk) for pk in row.dependent_ids]
+        if (row.original_parent_id, row.depends_on_ids, row.dependent_ids) != before:
+            changed.append(row)
+    ArchivedTask.objects.bulk_update(changed, ["original_parent_id", "depends_on_ids", "dependent_ids"])
+
+
+def restore_chunk(archived_qs, size=DEFAULT_CHUNK_SIZE):
+    """
+    Vraća do `size` arhiviranih redova u live tablicu (s izvornim id-em ako
+    je slobodan), s oznakama. Taskovi se vraćaju zajedno s arhiviranim
+    nadređenima, s nadređenim i ovisnostima.
+    """
+    archive_model = archived_qs.model
+    model, fields = next((m, f) for m, (a, f) in ARCHIVES.items() if a is archive_model)
+
+    with atomic_for(model):
+        rows = list(archived_qs.order_by("pk")[:size])
+        if not rows:
+            return 0
+        if model is Task:
+            rows = _with_archived_ancestors(rows)
+
+        taken = set(
+            model.objects.filter(pk__in=[row.original_id for row in rows]).values_list("pk", flat=True)
+        )
+        restored = [
+            model(
+                pk=None if row.original_id in taken else row.original_id,
+                **{f: getattr(row, f) for f in fields},
+            )
+            for row in rows
+        ]
+        # bulk_create ne šalje signale - brojači se ažuriraju ručno
+        if model is Task:
+            pk_map = _bulk_create_tasks(rows, restored)
+            _restore_dependencies(rows, pk_map)
+            _remap_archived_links(rows, pk_map)
+            for owner_id in {row.owner_id for row in restored}:
+                smartlists.invalidate(owner_id)
+        else:
+            model.objects.bulk_create(restored)
+        _restore_tags(model, rows, restored)
+        _counter_deltas(restored, 1)
+        for owner_id in {row.owner_id for row in restored}:
+            tags.invalidate(owner_id)
+        archive_model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def run_chunked(step, qs, size=DEFAULT_CHUNK_SIZE, progress=None):
+    total = 0
+    while True:
+        n = step(qs, size)
+        if not n:
+            return total
+        total += n
+        if progress is not None:
+            progress(total)
+
+
+def archive_cold_data(days=None, size=DEFAULT_CHUNK_SIZE, owner_ids=None, progress=None):
+    days = archive_after_days() if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+
+    result = {}
+    for name, qs in (("tasks", cold_tasks(cutoff)), ("events", cold_events(cutoff))):
+        if owner_ids:
+            qs = qs.filter(owner_id__in=owner_ids)
+        result[name] = run_chunked(archive_chunk, qs, size, progress)
+    return result
+
+
+def search_archive(user, q=""):
+    tasks = ArchivedTask.objects.filter(owner=user).select_related("category")
+    events = ArchivedEvent.objects.filter(owner=user).select_related("category")
+    if q:
+        tasks = tasks.filter(Q(title__icontains=q) | Q(description__icontains=q))
+        events = events.filter(
+            Q(title__icontains=q) | Q(description__icontains=q) | Q(location__icontains=q)
+        )
+    return tasks, events
@@ -0,0 +1,50 @@
+import heapq
+from datetime import timedelta
+
+from .recurrence import events_in_window
+
+
+def overlapping_events(user, start, end=None, exclude_pk=None):
+    """
+    Pojavljivanja (i obični eventi i serije) koja se preklapaju s [start, end).
+    Novi event bez kraja je trenutak - traže se eventi koji ga sadrže.
+    """
+    window_end = end if end is not None else start + timedelta(microseconds=1)
+    return [
+        occ for occ in events_in_window(user, start, window_end)
+        if exclude_pk is None or occ.event.pk != exclude_pk
+    ]
+
+
+def _bounds(item):
+    start, end = item["start"], item["end"]
+    return start, end if end is not None else start
+
+
+def find_conflicts(items):
+    """
+    Sweep po vremenu početka s min-heapom aktivnih intervala (po kraju):
+    O(n log n + k) za k preklapanja, bez usporedbe svakog sa svakim.
+    `items` su dictovi s ključevima start, end (end može biti None).
+    Vraća listu parova (a, b).
+    """
+    # za isti početak dulji intervali idu prvi, da trenuci unutar njih budu uhvaćeni
+    ordered = sorted(items, key=lambda it: (_bounds(it)[0], -(_bounds(it)[1] - _bounds(it)[0]).total_seconds()))
+
+    active = []  # (end, seq, item)
+    pairs = []
+    for seq, item in enumerate(ordered):
+        start, end = _bounds(item)
+
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+
+        pairs.extend((other, item) for _, _, other in active)
+        heapq.heappush(active, (end, seq, item))
+
+    return pairs
+
+
+def conflicts_in_range(user, start, end):
+    items = [occ.as_dict() for occ in events_in_window(user, start, end)]
+    return find_conflicts(items)
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, F, Sum
+
+from .models import Counter, Event, Habit, HabitCheckin, HabitCheckinArchive, Task
+from .shards import atomic_for, owner_context
+
+COUNTER_FIELDS = ["tasks_open", "tasks_done", "events", "habits", "checkins"]
+
+_suspended = ContextVar("counters_suspended", default=False)
+
+
+@contextmanager
+def suspend_counters():
+    """
+    Isključuje signal handlere za brojače - za bulk operacije koje
+    same računaju promjene (ili ih prepuštaju `reconcile_counters`).
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def counters_suspended():
+    return _suspended.get()
+
+
+def bump(owner_id, category_id=None, **deltas):
+    """
+    Atomarno mijenja brojače s F() izrazima, npr. bump(1, tasks_open=1).
+    Red se kreira samo za pozitivne promjene - negativna promjena na
+    nepostojećem redu znači da se brišu i korisnik/kategorija (cascade).
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+
+    updates = {k: F(k) + v for k, v in deltas.items()}
+    with owner_context(owner_id), atomic_for(Counter):
+        if Counter.objects.filter(owner_id=owner_id, category_id=category_id).update(**updates):
+            return
+        if any(v < 0 for v in deltas.values()):
+            return
+        counter, created = Counter.objects.get_or_create(
+            owner_id=owner_id, category_id=category_id, defaults=deltas
+        )
+        if not created:
+            Counter.objects.filter(pk=counter.pk).update(**updates)
+
+
+def bump_scoped(owner_id, category_id, **deltas):
+    """Isto kao bump(), ali i za korisnika i za kategoriju (ako postoji)."""
+    bump(owner_id, None, **deltas)
+    if category_id is not None:
+        bump(owner_id, category_id, **deltas)
+
+
+def task_field(status):
+    return "tasks_done" if status == Task.Status.DONE else "tasks_open"
+
+
+def get_counters(user, category=None):
+    """O(1) čitanje brojača; vraća nespremljen prazan Counter ako red ne postoji."""
+    counter = Counter.objects.filter(owner=user, category=category).first()
+    return counter or Counter(owner=user, category=category)
+
+
+def moved_counts(qs):
+    """
+    Prebrojava taskove (po statusu) ili evente u querysetu prije bulk
+    update()-a, koji ne okida signale.
+    """
+    if qs.model is Task:
+        deltas = defaultdict(int)
+        for row in qs.order_by().values("status").annotate(n=Count("pk")):
+            deltas[task_field(row["status"])] += row["n"]
+        return dict(deltas)
+    return {"events": qs.count()}
+
+
+def record_move(owner_id, source_id, target_id, deltas):
+    if source_id is not None:
+        bump(owner_id, source_id, **{k: -v for k, v in deltas.items()})
+    if target_id is not None:
+        bump(owner_id, target_id, **deltas)
+
+
+def compute_actual(owner_ids=None):
+    """
+    Stvarno stanje iz tablica (COUNT/GROUP BY) - koristi ga reconcile_counters.
+    Vraća {(owner_id, category_id): {field: n}}.
+    """
+    actual = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    def scoped(qs):
+        if owner_ids is not None:
+            qs = qs.filter(owner_id__in=owner_ids)
+        return qs.order_by()
+
+    for row in scoped(Task.objects.all()).values("owner_id", "category_id", "status").annotate(n=Count("pk")):
+        field = task_field(row["status"])
+        actual[(row["owner_id"], None)][field] += row["n"]
+        if row["category_id"] is not None:
+            actual[(row["owner_id"], row["category_id"])][field] += row["n"]
+
+    for row in scoped(Event.objects.all()).values("owner_id", "category_id").annotate(n=Count("pk")):
+        actual[(row["owner_id"], None)]["events"] += row["n"]
+        if row["category_id"] is not None:
+            actual[(row["owner_id"], row["category_id"])]["events"] += row["n"]
+
+    for row in scoped(Habit.objects.all()).values("owner_id").annotate(n=Count("pk")):
+        actual[(row["owner_id"], None)]["habits"] += row["n"]
+
+    checkins = HabitCheckin.objects.all()
+    if owner_ids is not None:
+        checkins = checkins.filter(habit__owner_id__in=owner_ids)
+    for row in checkins.order_by().values("habit__owner_id").annotate(n=Count("pk")):
+        actual[(row["habit__owner_id"], None)]["checkins"] += row["n"]
+
+    # sažeti check-inovi (main/checkin_archive.py) se i dalje broje
+    archives = HabitCheckinArchive.objects.all()
+    if owner_ids is not None:
+        archives = archives.filter(habit__owner_id__in=owner_ids)
+    for row in archives.order_by().values("habit__owner_id").annotate(n=Sum("count")):
+        actual[(row["habit__owner_id"], None)]["checkins"] += row["n"]
+
+    return actual
@@ -1,15 +1,71 @@
 from django import forms
-from .models import Task, Category, Event, Habit, HabitCheckin
+from django.utils import timezone
+from .checkin_archive import is_archived
+from .conflicts import overlapping_events
+from .models import (
+    Task, Category, Event, EventOccurrenceOverride, EventRecurrence, Habit, HabitCheckin, SmartList, Tag,
+    TaskDependency,
+)
+from .smartlists import DUE_CHOICES
+from .tags import parse_names, set_tags
+from .recurrence import parse_exdates
+from .taskgraph import load_graph
+from .tasktree import descendants_prefix, move_subtree, prefix_range
+
+WEEKDAY_CHOICES = [
+    ("mon", "Mon"),
+    ("tue", "Tue"),
+    ("wed", "Wed"),
+    ("thu", "Thu"),
+    ("fri", "Fri"),
+    ("sat", "Sat"),
+    ("sun", "Sun"),
+]
+
+
+class TagsField(forms.CharField):
+    """Oznake upisane kao "posao, hitno"; u cleaned_data je lista imena."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("widget", forms.TextInput(attrs={"placeholder": "e.g. work, urgent"}))
+        kwargs.setdefault("help_text", "Comma separated; new tags are created automatically.")
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        return parse_names(super().to_python(value))
+
+    def validate(self, value):
+        super().validate(value)
+        max_length = Tag._meta.get_field("name").max_length
+        if too_long := [name for name in value if len(name) > max_length]:
+            raise forms.ValidationError(f"Tag names can have at most {max_length} characters: {', '.join(too_long)}")
+
+
+class TaggedFormMixin:
+    """Polje `tags` za ModelForm taska/eventa; veze se spremaju uz ostale m2m podatke."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial.setdefault("tags", ", ".join(self.instance.tags.values_list("name", flat=True)))
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        set_tags(self.instance, self.cleaned_data["tags"])
+
 
+class TaskForm(TaggedFormMixin, forms.ModelForm):
+    tags = TagsField()
 
-class TaskForm(forms.ModelForm):
     class Meta:
         model = Task
-        fields = ["category", "title", "description", "priority", "status", "due_date", "estimated_time"]
+        fields = ["category", "parent", "title", "description", "priority", "status", "due_date", "estimated_time"]
         widgets = {
             "due_date": forms.DateInput(attrs={"type": "date"}),
             "estimated_time": forms.NumberInput(attrs={"placeholder": "e.g. 30 (min)"}),
         }
+        labels = {"parent": "Subtask of"}
 
     def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
@@ -17,6 +73,14 @@ class TaskForm(forms.ModelForm):
         if user is not None:
             self.fields["category"].queryset = Category.objects.filter(owner=user).order_by("name")
 
+            # task ne može biti podtask samog sebe ni svojih podtaskova
+            parents = Task.objects.filter(owner=user).order_by("title")
+            if self.instance.pk is not None:
+                parents = parents.exclude(pk=self.instance.pk).exclude(
+                    prefix_range(descendants_prefix(self.instance))
+                )
+            self.fields["parent"].queryset = parents
+
             # default Inbox on create
             if self.instance.pk is None:
                 inbox, _ = Category.objects.get_or_create(
@@ -26,8 +90,116 @@ class TaskForm(forms.ModelForm):
                 )
                 self.fields["category"].initial = inbox.pk
 
+    def save(self, commit=True):
+        # premještanje mijenja putanju cijelog podstabla, ne samo parent_id
+        if commit and self.instance.pk is not None and "parent" in self.changed_data:
+            move_subtree(self.instance, self.cleaned_data["parent"])
+        return super().save(commit=commit)
+
+
+class SmartListForm(forms.ModelForm):
+    """Polja filtera spremaju se u SmartList.definition (main/smartlists.py)."""
+
+    priority = forms.TypedMultipleChoiceField(
+        choices=Task.Priority.choices, coerce=int, required=False, widget=forms.CheckboxSelectMultiple
+    )
+    status = forms.MultipleChoiceField(
+        choices=Task.Status.choices, required=False, widget=forms.CheckboxSelectMultiple
+    )
+    category = forms.ModelMultipleChoiceField(
+        queryset=Category.objects.none(), required=False, widget=forms.CheckboxSelectMultiple
+    )
+    due = forms.ChoiceField(choices=DUE_CHOICES, required=False, label="Due date")
+    estimate_min = forms.IntegerField(min_value=0, required=False, label="Estimate at least (min)")
+    estimate_max = forms.IntegerField(min_value=0, required=False, label="Estimate at most (min)")
+
+    FILTER_FIELDS = ["priority", "status", "category", "due", "estimate_min", "estimate_max"]
+
+    class Meta:
+        model = SmartList
+        fields = ["name"]
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields["category"].queryset = Category.objects.filter(owner=user).order_by("name")
+        for name in self.FILTER_FIELDS:
+            self.fields[name].initial = self.instance.definition.get(name)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        minimum, maximum = cleaned_data.get("estimate_min"), cleaned_data.get("estimate_max")
+        if minimum is not None and maximum is not None and minimum > maximum:
+            self.add_error("estimate_max", "Must not be lower than the minimum.")
+        return cleaned_data
+
+    def save(self, commit=True):
+        definition = {}
+        for name in self.FILTER_FIELDS:
+            value = self.cleaned_data.get(name)
+            if name == "category":
+                value = [category.pk for category in value]
+            # prazne vrijednosti se ne spremaju - ne filtriraju
+            if value not in (None, "", []):
+                definition[name] = value
+        self.instance.definition = definition
+        return super().save(commit=commit)
+
+
+class TaskDependencyForm(forms.ModelForm):
+    class Meta:
+        model = TaskDependency
+        fields = ["depends_on"]
+        labels = {"depends_on": "Blocked by"}
+
+    def __init__(self, *args, task=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task = self.instance.task = task
+        # samo otvoreni taskovi istog korisnika
+        self.fields["depends_on"].queryset = (
+            Task.objects.filter(owner_id=task.owner_id).exclude(pk=task.pk).exclude(status=Task.Status.DONE)
+        )
+
+    def clean_depends_on(self):
+        depends_on = self.cleaned_data["depends_on"]
+        if TaskDependency.objects.filter(task=self.task, depends_on=depends_on).exists():
+            raise forms.ValidationError("This task is already blocked by that task.")
+        if load_graph(self.task.owner_id).would_create_cycle(self.task.pk, depends_on.pk):
+            raise forms.ValidationError(f"\"{depends_on.title}\" already depends on this task.")
+        return depends_on
+
+
+class EventForm(TaggedFormMixin, forms.ModelForm):
+    tags = TagsField()
+    allow_overlap = forms.BooleanField(
+        required=False,
+        label="Save even if it overlaps other events",
+    )
+
+    # UI fields (not model fields): recurrence rule, stored in EventRecurrence
+    repeat = forms.ChoiceField(
+        choices=[("", "Does not repeat")] + EventRecurrence.Frequency.choices,
+        required=False,
+    )
+    repeat_interval = forms.IntegerField(min_value=1, initial=1, required=False, label="Repeat every")
+    repeat_weekdays = forms.MultipleChoiceField(
+        choices=WEEKDAY_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        label="On weekdays (weekly)",
+    )
+    repeat_until = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}),
+        label="Repeat until",
+    )
+    repeat_count = forms.IntegerField(min_value=1, required=False, label="Number of occurrences")
+    repeat_exdates = forms.CharField(
+        required=False,
+        label="Skip dates",
+        widget=forms.TextInput(attrs={"placeholder": "e.g. 2026-01-05,2026-01-12"}),
+    )
 
-class EventForm(forms.ModelForm):
     class Meta:
         model = Event
         fields = ["category", "title", "description", "location", "start_datetime", "end_datetime"]
@@ -38,6 +210,19 @@ class EventForm(forms.ModelForm):
 
     def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.user = user
+
+        # Populate recurrence fields from the existing rule
+        rule = getattr(self.instance, "recurrence", None) if self.instance.pk else None
+        if rule is not None:
+            self.initial.update({
+                "repeat": rule.frequency,
+                "repeat_interval": rule.interval,
+                "repeat_weekdays": rule.weekdays.split(",") if rule.weekdays else [],
+                "repeat_until": rule.until,
+                "repeat_count": rule.count,
+                "repeat_exdates": rule.exdates,
+            })
 
         if user is not None:
             self.fields["category"].queryset = Category.objects.filter(owner=user).order_by("name")
@@ -57,6 +242,68 @@ class EventForm(forms.ModelForm):
         end = cleaned_data.get("end_datetime")
 
         # end is optional, but if provided it must be after start
+        if start and end and end <= start:
+            self.add_error("end_datetime", "End time must be after start time.")
+
+        elif start and self.user is not None and not cleaned_data.get("allow_overlap"):
+            overlapping = overlapping_events(self.user, start, end, exclude_pk=self.instance.pk)[:5]
+            if overlapping:
+                titles = ", ".join(f"{o.title} ({timezone.localtime(o.start):%d.%m. %H:%M})" for o in overlapping)
+                self.add_error(
+                    None,
+                    f"This event overlaps with: {titles}. Tick the checkbox below to save anyway.",
+                )
+
+        return cleaned_data
+
+    def clean_repeat_exdates(self):
+        value = (self.cleaned_data.get("repeat_exdates") or "").strip()
+        parts = [p.strip() for p in value.split(",") if p.strip()]
+        dates = parse_exdates(value)
+        if len(dates) != len(set(parts)):
+            raise forms.ValidationError("Skip dates must be comma-separated in YYYY-MM-DD format.")
+        return ",".join(sorted(d.isoformat() for d in dates))
+
+    def save(self, commit=True):
+        instance = super().save(commit=commit)
+        if commit:
+            self.save_recurrence(instance)
+        return instance
+
+    def save_recurrence(self, instance):
+        frequency = self.cleaned_data.get("repeat")
+        if not frequency:
+            EventRecurrence.objects.filter(event=instance).delete()
+            return
+
+        EventRecurrence.objects.update_or_create(
+            event=instance,
+            defaults={
+                "frequency": frequency,
+                "interval": self.cleaned_data.get("repeat_interval") or 1,
+                "weekdays": ",".join(self.cleaned_data.get("repeat_weekdays") or []),
+                "until": self.cleaned_data.get("repeat_until"),
+                "count": self.cleaned_data.get("repeat_count"),
+                "exdates": self.cleaned_data.get("repeat_exdates") or "",
+            },
+        )
+
+
+class EventOccurrenceForm(forms.ModelForm):
+    class Meta:
+        model = EventOccurrenceOverride
+        fields = ["title", "start_datetime", "end_datetime", "cancelled"]
+        widgets = {
+            "start_datetime": forms.DateTimeInput(attrs={"type": "datetime-local", "step": "60"}),
+            "end_datetime": forms.DateTimeInput(attrs={"type": "datetime-local", "step": "60"}),
+        }
+        labels = {"cancelled": "Cancel this occurrence"}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start_datetime")
+        end = cleaned_data.get("end_datetime")
+
         if start and end and end <= start:
             self.add_error("end_datetime", "End time must be after start time.")
 
@@ -64,15 +311,7 @@ class EventForm(forms.ModelForm):
 
 
 class HabitForm(forms.ModelForm):
-    WEEKDAYS = [
-        ("mon", "Mon"),
-        ("tue", "Tue"),
-        ("wed", "Wed"),
-        ("thu", "Thu"),
-        ("fri", "Fri"),
-        ("sat", "Sat"),
-        ("sun", "Sun"),
-    ]
+    WEEKDAYS = WEEKDAY_CHOICES
 
     MONTHS = [
         ("1", "Jan"),
@@ -224,9 +463,10 @@ class HabitCheckinForm(forms.ModelForm):
             "performed_at": forms.DateTimeInput(attrs={"type": "datetime-local", "step": "60"}),
         }
 
-    def __init__(self, *args, habit=None, **kwargs):
+    def __init__(self, *args, habit=None, check_duplicates=True, **kwargs):
         super().__init__(*args, **kwargs)
         self.habit = habit
+        self.check_duplicates = check_duplicates
 
     def clean_performed_at(self):
         performed_at = self.cleaned_data.get("performed_at")
@@ -234,12 +474,12 @@ class HabitCheckinForm(forms.ModelForm):
         if performed_at is not None:
             performed_at = performed_at.replace(second=0, microsecond=0)
 
-        if self.habit is not None and performed_at is not None:
+        if self.check_duplicates and self.habit is not None and performed_at is not None:
             qs = HabitCheckin.objects.filter(habit=self.habit, performed_at=performed_at)
             if self.instance.pk:
                 qs = qs.exclude(pk=self.instance.pk)
 
-            if qs.exists():
+            if qs.exists() or is_archived(self.habit, performed_at):
                 raise forms.ValidationError(
                     "A check-in for this habit at the same minute already exists. Choose a different time."
                 )
@@ -0,0 +1,91 @@
+from functools import lru_cache
+
+# Formatiranje CSV polja habita ("mon,wed", "8:00,20:00", "1,6") u labele.
+# Rezultat ovisi samo o ulaznom stringu, pa se memoizira po vrijednosti;
+# izmjena habita daje novi string i novi ključ, stari unos s vremenom ispada
+# iz LRU cachea - nema potrebe za ručnom invalidacijom.
+
+LABEL_CACHE_SIZE = 1024
+
+WEEKDAY_MAP = {
+    "mon": "Mon",
+    "tue": "Tue",
+    "wed": "Wed",
+    "thu": "Thu",
+    "fri": "Fri",
+    "sat": "Sat",
+    "sun": "Sun",
+}
+
+MONTH_MAP = {
+    "1": "Jan", "2": "Feb", "3": "Mar", "4": "Apr",
+    "5": "May", "6": "Jun", "7": "Jul", "8": "Aug",
+    "9": "Sep", "10": "Oct", "11": "Nov", "12": "Dec",
+}
+
+def split_csv(csv_value):
+    return [x.strip() for x in csv_value.split(",") if x.strip()]
+
+
+def _time_label(value):
+    # "08:00" -> "8:00 AM"; sve ostalo se ispisuje kako je upisano
+    # (provjera umjesto try/except oko split + int)
+    hh, sep, mm = value.partition(":")
+    if not sep or not hh.isdecimal() or ":" in mm:
+        return value
+    h = int(hh)
+    ampm = "PM" if h >= 12 else "AM"
+    h = h % 12 or 12
+    return f"{h}:{mm} {ampm}"
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def weekday_labels(csv_value):
+    if not csv_value:
+        return ""
+    return ", ".join(WEEKDAY_MAP.get(x, x) for x in split_csv(csv_value))
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def month_labels(csv_value):
+    if not csv_value:
+        return ""
+    return ", ".join(MONTH_MAP.get(x, x) for x in split_csv(csv_value))
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def time_labels(csv_value):
+    """
+    "08:00,20:00" -> "8:00 AM, 8:00 PM"
+    """
+    if not csv_value:
+        return ""
+    return ", ".join(_time_label(x) for x in split_csv(csv_value))
+
+
+def clear_caches():
+    for fn in (weekday_labels, month_labels, time_labels):
+        fn.cache_clear()
+
+
+def habit_labels(habit):
+    """Labele za prikaz / JSON (isti format kao u templateima)."""
+    return {
+        "preferred_times": time_labels(habit.preferred_times),
+        "preferred_weekdays": weekday_labels(habit.preferred_weekdays),
+        "preferred_months": month_labels(habit.preferred_months),
+    }
+
+
+def habit_to_dict(habit):
+    return {
+        "id": habit.pk,
+        "name": habit.name,
+        "active": habit.active,
+        "frequency": habit.frequency,
+        "target_count": habit.target_count,
+        "preferred_times": habit.preferred_times,
+        "preferred_weekdays": habit.preferred_weekdays,
+        "preferred_months": habit.preferred_months,
+        "labels": habit_labels(habit),
+    }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from main.cold_archive import DEFAULT_CHUNK_SIZE, archive_cold_data
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Move old done tasks and past events into archive tables in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Archive rows older than this many days (default: COLD_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        totals = {"tasks": 0, "events": 0}
+        for _ in each_shard():
+            result = archive_cold_data(
+                days=options["days"],
+                size=options["chunk_size"],
+                owner_ids=options["users"],
+                progress=lambda total: self.stdout.write(f"  {total} rows moved..."),
+            )
+            for key, n in result.items():
+                totals[key] += n
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {totals['tasks']} task(s) and {totals['events']} event(s)."
+        ))
@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main import user_cache
+
+User = get_user_model()
+
+PASSWORD = "bench-Pa55word!"
+HASHERS = ["pbkdf2_sha256", "argon2", "scrypt", "bcrypt_sha256"]
+
+
+class Command(BaseCommand):
+    help = "Measure registration, login and authenticated request throughput with the current settings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Registrations and logins to time")
+        parser.add_argument("--requests", type=int, default=50, help="Authenticated page loads to time")
+
+    def compare_hashers(self):
+        self.stdout.write("Hashing one password:")
+        for algorithm in HASHERS:
+            start = time.perf_counter()
+            try:
+                make_password(PASSWORD, hasher=algorithm)
+            except ValueError:
+                # nije u PASSWORD_HASHERS ili nedostaje biblioteka
+                self.stdout.write(f"  {algorithm:<14} not available")
+                continue
+            self.stdout.write(f"  {algorithm:<14} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    def rate(self, label, n, seconds):
+        self.stdout.write(f"  {label:<24} {seconds / n * 1000:8.1f} ms each, {n / seconds:7.1f}/s")
+
+    def handle(self, *args, **options):
+        n = options["users"]
+        self.stdout.write(
+            f"Hasher: {get_hasher().algorithm}, sessions: {settings.SESSION_ENGINE.rsplit('.', 1)[-1]}, "
+            f"user cache: {'on' if user_cache.enabled() else 'off'}"
+        )
+        self.compare_hashers()
+
+        # sve se vraća na kraju (rollback), baza ostaje kakva je bila
+        with transaction.atomic():
+            names = [f"bench-auth-{time.time_ns()}-{i}" for i in range(n)]
+
+            start = time.perf_counter()
+            for name in names:
+                Client(HTTP_HOST="localhost").post(
+                    reverse("main:register"),
+                    {"username": name, "password1": PASSWORD, "password2": PASSWORD},
+                )
+            register_seconds = time.perf_counter() - start
+
+            clients = [Client(HTTP_HOST="localhost") for _ in names]
+            start = time.perf_counter()
+            for client, name in zip(clients, names):
+                client.post(reverse("login"), {"username": name, "password": PASSWORD})
+            login_seconds = time.perf_counter() - start
+
+            client = clients[0]
+            url = reverse("main:task_list")
+            client.get(url)  # zagrijavanje (i punjenje cachea korisnika)
+            with CaptureQueriesContext(connections["default"]) as queries:
+                start = time.perf_counter()
+                for _ in range(options["requests"]):
+                    client.get(url)
+                page_seconds = time.perf_counter() - start
+
+            user_ids = list(User.objects.filter(username__in=names).values_list("pk", flat=True))
+            transaction.set_rollback(True)
+
+        # rollback briše korisnike, ali ne i cache - pk se može ponovno dodijeliti
+        if user_cache.enabled():
+            for user_id in user_ids:
+                user_cache.invalidate(user_id)
+
+        self.stdout.write(f"{n} users:")
+        self.rate("registration", n, register_seconds)
+        self.rate("login", n, login_seconds)
+        self.rate("authenticated GET", options["requests"], page_seconds)
+        auth_queries = sum(
+            1 for q in queries.captured_queries if "django_session" in q["sql"] or '"auth_user"' in q["sql"]
+        )
+        self.stdout.write(
+            f"  {len(queries) / options['requests']:.1f} queries per GET, "
+            f"{auth_queries / options['requests']:.1f} of them for session/user"
+        )
@@ -0,0 +1,84 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import labels
+
+WEEKDAYS = list(labels.WEEKDAY_MAP)
+
+
+def uncached(fn):
+    # izvorna funkcija bez lru_cache omotača
+    return fn.__wrapped__
+
+
+def legacy_time_labels(csv_value):
+    """Stara verzija (split + try/except po stavci), za usporedbu."""
+    if not csv_value:
+        return ""
+    items = [x.strip() for x in csv_value.split(",") if x.strip()]
+    out = []
+    for t in items:
+        try:
+            hh, mm = t.split(":")
+            h = int(hh)
+            ampm = "PM" if h >= 12 else "AM"
+            h = h % 12
+            if h == 0:
+                h = 12
+            out.append(f"{h}:{mm} {ampm}")
+        except Exception:
+            out.append(t)
+    return ", ".join(out)
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark for habit label formatting (legacy vs checked parse vs memoized)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=500)
+        parser.add_argument("--renders", type=int, default=100)
+
+    def sample(self, n):
+        rng = random.Random(0)
+        rows = []
+        for _ in range(n):
+            # tipični habiti dijele iste vrijednosti ("mon,wed,fri", "8:00,20:00")
+            times = ",".join(f"{h}:00" for h in sorted(rng.sample(range(6, 23), rng.randint(1, 3))))
+            if rng.random() < 0.1:
+                times += ",evening"
+            days = ",".join(sorted(rng.sample(WEEKDAYS, rng.randint(1, 3)), key=WEEKDAYS.index))
+            months = ",".join(str(m) for m in sorted(rng.sample(range(1, 13), rng.randint(0, 2))))
+            rows.append((times, days, months))
+        return rows
+
+    def timeit(self, fns, rows, renders):
+        start = time.perf_counter()
+        for _ in range(renders):
+            for times, days, months in rows:
+                fns[0](times)
+                fns[1](days)
+                fns[2](months)
+        return (time.perf_counter() - start) * 1000 / renders
+
+    def handle(self, *args, **options):
+        rows = self.sample(options["habits"])
+        renders = options["renders"]
+
+        variants = [
+            ("legacy", (legacy_time_labels, uncached(labels.weekday_labels), uncached(labels.month_labels))),
+            ("checked", (uncached(labels.time_labels), uncached(labels.weekday_labels), uncached(labels.month_labels))),
+            ("memoized", (labels.time_labels, labels.weekday_labels, labels.month_labels)),
+        ]
+
+        labels.clear_caches()
+        self.stdout.write(f"{len(rows)} habits x 3 labels, mean per page render over {renders} renders:")
+        baseline = None
+        for name, fns in variants:
+            ms = self.timeit(fns, rows, renders)
+            baseline = baseline or ms
+            self.stdout.write(f"  {name:<10} {ms:8.3f} ms  ({baseline / ms:.1f}x)")
+
+        info = labels.time_labels.cache_info()
+        self.stdout.write(f"time_labels cache: {info.hits} hits, {info.misses} misses, size {info.currsize}")
@@ -0,0 +1,79 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, depth, module)] iz izlaza `python -X importtime`."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((int(own), int(cumulative), len(indent) // 2, module))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Measure cold start (wall time and -X importtime) of manage.py commands and the WSGI/ASGI entry points"
+    # mjerimo nove procese, ovaj ne treba provjere
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--command", default="process_category_jobs", help="manage.py command to start")
+        parser.add_argument(
+            "--settings-module",
+            action="append",
+            dest="settings_modules",
+            help="Settings to compare (default: planner.settings and planner.settings_worker)",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+
+    def run_target(self, argv, settings_module, repeat):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+        # bez .pyc datoteka mjerili bismo kompajliranje, ne pokretanje;
+        # prvo (zagrijavanje) pokretanje ih zapiše i ne broji se
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        walls, imports = [], []
+        for i in range(repeat + 1):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", *argv],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if result.returncode:
+                self.stderr.write(result.stderr.splitlines()[-1] if result.stderr else "failed")
+            if i:
+                walls.append(time.perf_counter() - start)
+                imports.append(parse_importtime(result.stderr))
+        return walls, imports[-1]
+
+    def handle(self, *args, **options):
+        settings_modules = options["settings_modules"] or ["planner.settings", "planner.settings_worker"]
+        targets = [
+            (f"manage.py {options['command']}", ["manage.py", *options["command"].split()], settings_modules),
+            ("planner.wsgi", ["-c", "import planner.wsgi"], ["planner.settings"]),
+            ("planner.asgi", ["-c", "import planner.asgi"], ["planner.settings"]),
+        ]
+
+        for label, argv, modules in targets:
+            for settings_module in modules:
+                walls, rows = self.run_target(argv, settings_module, options["repeat"])
+                total_ms = sum(own for own, _, _, _ in rows) / 1000
+                self.stdout.write(
+                    f"{label} [{settings_module}]: median {statistics.median(walls) * 1000:.0f} ms wall, "
+                    f"{total_ms:.0f} ms in {len(rows)} imports"
+                )
+                # najskuplji importi na prve dvije razine (bez samog ulaznog modula)
+                top_level = sorted((r for r in rows if r[2] <= 1 and r[3] != label), key=lambda r: -r[1])
+                for own, cumulative, _, module in top_level[: options["top"]]:
+                    self.stdout.write(f"    {cumulative / 1000:7.1f} ms  {module}")
@@ -0,0 +1,88 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template
+from django.utils import timezone
+
+from main.models import Category, Event, Habit, HabitCheckin, Task
+
+User = get_user_model()
+
+# stara varijanta petlje (s {% url %} po stavci), za usporedbu
+URL_TAG_LOOP = """
+{% for task in tasks %}<a href="{% url 'main:task_detail' task.pk %}">{{ task.title }}</a>{% endfor %}
+"""
+FILTER_LOOP = """{% load planner_extras %}
+{% for task in tasks %}<a href="{{ task.pk|pk_url:"main:task_detail" }}">{{ task.title }}</a>{% endfor %}
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure render time of list templates with N in-memory items (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def fake_context(self, n):
+        # nespremljeni objekti s postavljenim pk, dovoljno za render
+        user = User(pk=1, username="bench")
+        now = timezone.now()
+        category = Category(pk=1, name="Work", owner=user)
+        habit = Habit(pk=1, name="Water", owner=user)
+        tasks = [
+            Task(pk=i, owner=user, title=f"Task {i}", due_date=now.date(), category=category)
+            for i in range(1, n + 1)
+        ]
+        events = [Event(pk=i, owner=user, title=f"Event {i}", start_datetime=now) for i in range(1, n + 1)]
+        for event in events:
+            # "nema serije" bez upita na EventRecurrence
+            Event.recurrence.related.set_cached_value(event, None)
+        return {
+            "user": user,
+            "tasks": tasks,
+            "events": events,
+            "habits": [Habit(pk=i, owner=user, name=f"Habit {i}") for i in range(1, n + 1)],
+            "categories": [Category(pk=i, owner=user, name=f"Category {i}") for i in range(1, n + 1)],
+            "checkins": [
+                HabitCheckin(pk=i, habit=habit, performed_at=now - timedelta(hours=i)) for i in range(1, n + 1)
+            ],
+            "habit": habit,
+            "status_choices": Task.Status.choices,
+            "partitions": [("Today", tasks)],
+            "has_tasks": True,
+        }
+
+    def timeit(self, template, context, repeat):
+        template.render(context)  # zagrijavanje (i punjenje cached loadera)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            template.render(context)
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        n, repeat = options["items"], options["repeat"]
+        context = self.fake_context(n)
+
+        self.stdout.write(f"Rendering with {n} items, mean of {repeat} runs:")
+        for name in [
+            "main/task_list.html",
+            "main/task_next_up.html",
+            "main/event_list.html",
+            "main/habit_list.html",
+            "main/category_list.html",
+            "main/habit_checkin_list.html",
+        ]:
+            ms = self.timeit(get_template(name), context, repeat)
+            self.stdout.write(f"  {name:<32} {ms:8.1f} ms")
+
+        engine = engines["django"]
+        url_ms = self.timeit(engine.from_string(URL_TAG_LOOP), context, repeat)
+        filter_ms = self.timeit(engine.from_string(FILTER_LOOP), context, repeat)
+        self.stdout.write(
+            f"Link loop: {{% url %}} {url_ms:.1f} ms vs precomputed {filter_ms:.1f} ms "
+            f"({url_ms / filter_ms:.1f}x)"
+        )
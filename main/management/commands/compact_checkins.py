@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.checkin_archive import archive_after_days, compact_month, months_to_compact
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Pack old habit check-ins into compact per-month archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive whole months older than this (default: CHECKIN_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument("--habit", type=int, action="append", dest="habits", help="Only this habit id (repeatable)")
+
+    def handle(self, *args, **options):
+        days = options["older_than_days"]
+        if days is None:
+            days = archive_after_days()
+        cutoff = timezone.now() - timedelta(days=days)
+
+        months = rows = 0
+        for _ in each_shard():
+            for habit_id, start in months_to_compact(cutoff, options["habits"]):
+                n = compact_month(habit_id, start)
+                months += 1
+                rows += n
+                self.stdout.write(f"habit={habit_id} {start:%Y-%m}: {n} check-ins archived")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {rows} check-ins into {months} month(s)."))
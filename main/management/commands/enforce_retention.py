@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.purge import RETENTION_RULES, enforce_retention, retention_days
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Delete data older than the configured retention (RETENTION_DAYS) in throttled batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rule",
+            action="append",
+            dest="rules",
+            choices=sorted(RETENTION_RULES),
+            help="Only this rule (repeatable, default: all rules in RETENTION_DAYS)",
+        )
+        parser.add_argument("--days", type=int, default=None, help="Override the retention in days for the selected rules")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction (default: PURGE_BATCH_SIZE)")
+        parser.add_argument(
+            "--throttle", type=float, default=None, help="Seconds to sleep between batches (default: PURGE_THROTTLE_SECONDS)"
+        )
+
+    def handle(self, *args, **options):
+        days = dict(retention_days())
+        if options["rules"]:
+            days = {rule: days.get(rule) for rule in options["rules"]}
+        if options["days"] is not None:
+            if not options["rules"]:
+                raise CommandError("--days needs at least one --rule")
+            days = dict.fromkeys(days, options["days"])
+        if not any(n is not None for n in days.values()):
+            self.stdout.write("No retention configured (RETENTION_DAYS), nothing to delete.")
+            return
+
+        totals = dict.fromkeys(days, 0)
+        start = time.perf_counter()
+        for _ in each_shard():
+            result = enforce_retention(
+                days,
+                size=options["batch_size"],
+                throttle=options["throttle"],
+                progress=lambda n: self.stdout.write(f"  {n} rows deleted..."),
+            )
+            for rule, n in result.items():
+                totals[rule] += n
+        seconds = time.perf_counter() - start
+
+        for rule, n in totals.items():
+            if days[rule] is not None:
+                self.stdout.write(f"{rule}: {n} row(s) older than {days[rule]} days")
+        deleted = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} row(s) in {seconds:.1f}s ({deleted / seconds if seconds else 0:.0f} rows/s)."
+        ))
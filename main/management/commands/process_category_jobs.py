@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.category_jobs import run_job
+from main.models import CategoryJob
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Process pending category delete/move jobs in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs")
+        parser.add_argument("--interval", type=float, default=5.0, help="Polling interval in seconds")
+        parser.add_argument("--retry-failed", action="store_true", help="Re-queue failed jobs first")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            for _ in each_shard():
+                CategoryJob.objects.filter(state=CategoryJob.State.FAILED).update(
+                    state=CategoryJob.State.PENDING, error=""
+                )
+
+        while True:
+            for _ in each_shard():
+                jobs = list(CategoryJob.objects.filter(state=CategoryJob.State.PENDING).order_by("created_at"))
+                for job in jobs:
+                    self.stdout.write(f"Processing {job} ...")
+                    try:
+                        run_job(job)
+                    except Exception as exc:
+                        self.stderr.write(self.style.ERROR(f"Job {job.pk} failed: {exc}"))
+                        continue
+                    self.stdout.write(self.style.SUCCESS(f"Job {job.pk} done ({job.processed}/{job.total})"))
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
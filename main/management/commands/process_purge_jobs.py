@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import PurgeJob
+from main.purge import run_purge_job, start_user_purge
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Delete users and large habits queued for purging, in throttled batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="users", help="Queue this user id for deletion first (repeatable)"
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction (default: PURGE_BATCH_SIZE)")
+        parser.add_argument(
+            "--throttle", type=float, default=None, help="Seconds to sleep between batches (default: PURGE_THROTTLE_SECONDS)"
+        )
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs")
+        parser.add_argument("--interval", type=float, default=5.0, help="Polling interval in seconds")
+        parser.add_argument("--retry-failed", action="store_true", help="Re-queue failed jobs first")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        for user_id in options["users"] or []:
+            user = User.objects.filter(pk=user_id).first()
+            if user is None:
+                raise CommandError(f"User {user_id} does not exist")
+            start_user_purge(user)
+
+        if options["retry_failed"]:
+            for _ in each_shard():
+                PurgeJob.objects.filter(state=PurgeJob.State.FAILED).update(state=PurgeJob.State.PENDING, error="")
+
+        while True:
+            for _ in each_shard():
+                jobs = list(PurgeJob.objects.filter(state=PurgeJob.State.PENDING).order_by("created_at"))
+                for job in jobs:
+                    self.stdout.write(f"Processing {job} ...")
+                    try:
+                        run_purge_job(job, size=options["batch_size"], throttle=options["throttle"])
+                    except Exception as exc:
+                        self.stderr.write(self.style.ERROR(f"Job {job.pk} failed: {exc}"))
+                        continue
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Job {job.pk} done: {job.deleted} rows in {job.seconds:.1f}s ({job.rows_per_second:.0f} rows/s)"
+                    ))
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import pstats
+import re
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.profiling import profiling_dir
+
+# brojevi i stringovi u SQL-u -> ?, da se isti upit s drugim parametrima zbroji
+_SQL_LITERALS = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def normalize_sql(sql):
+    return _SQL_LITERALS.sub("?", " ".join(sql.split()))
+
+
+class Command(BaseCommand):
+    help = "Summarize hotspots across captured request profiles (see planner/profiling.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Profile directory (default: PROFILING_DIR)")
+        parser.add_argument("--view", help="Only profiles of this URL name, e.g. main:task_list")
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or profiling_dir()
+        if not os.path.isdir(directory):
+            raise CommandError(f"No profiles in {directory}.")
+
+        metas = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(directory, filename)) as f:
+                meta = json.load(f)
+            if options["view"] and meta["view"] != options["view"]:
+                continue
+            meta["file"] = os.path.join(directory, filename[:-5] + ".prof")
+            metas.append(meta)
+
+        if not metas:
+            raise CommandError("No matching profiles.")
+
+        top = options["top"]
+        durations = sorted(m["duration_ms"] for m in metas)
+        self.stdout.write(
+            f"{len(metas)} profile(s), median {durations[len(durations) // 2]:.0f} ms, "
+            f"max {durations[-1]:.0f} ms"
+        )
+
+        views = Counter(m["view"] for m in metas)
+        self.stdout.write("\nSlow views:")
+        for view, n in views.most_common(top):
+            self.stdout.write(f"  {n:5}  {view}")
+
+        self.summarize_samples(metas, top)
+        self.summarize_cprofile(metas, top)
+        self.summarize_sql(metas, top)
+
+    def summarize_samples(self, metas, top):
+        # "self" = funkcija na vrhu stoga, "total" = funkcija bilo gdje na stogu
+        own, total = Counter(), Counter()
+        for meta in metas:
+            for stack, n in meta["samples"].items():
+                frames = stack.split(";")
+                own[frames[-1]] += n
+                for frame in set(frames):
+                    total[frame] += n
+        if not own:
+            return
+        count = sum(own.values())
+        self.stdout.write(f"\nSampled hotspots ({count} samples), self / total:")
+        for frame, n in own.most_common(top):
+            self.stdout.write(f"  {n * 100 / count:5.1f}% {total[frame] * 100 / count:5.1f}%  {frame}")
+
+    def summarize_cprofile(self, metas, top):
+        files = [m["file"] for m in metas if m["kind"] == "cprofile" and os.path.exists(m["file"])]
+        if not files:
+            return
+        self.stdout.write(f"\ncProfile hotspots ({len(files)} profile(s)), by internal time:")
+        buffer = io.StringIO()
+        pstats.Stats(*files, stream=buffer).sort_stats("tottime").print_stats(top)
+        self.stdout.write(buffer.getvalue().rstrip())
+
+    def summarize_sql(self, metas, top):
+        time_by_sql, calls = Counter(), Counter()
+        for meta in metas:
+            for query in meta["sql"]:
+                key = normalize_sql(query["sql"])
+                time_by_sql[key] += query["ms"]
+                calls[key] += 1
+        if not calls:
+            return
+        self.stdout.write("\nSQL by total time (ms / calls):")
+        for sql, ms in time_by_sql.most_common(top):
+            self.stdout.write(f"  {ms:9.1f} {calls[sql]:6}  {sql[:160]}")
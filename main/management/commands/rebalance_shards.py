@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from main.rebalance import DEFAULT_CHUNK_SIZE, move_user, plan_rebalance, shard_sizes
+from main.shards import shards
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Show shard sizes, move users between shards or even out the user count per shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="users", help="User id or username to move (repeatable)")
+        parser.add_argument("--to", dest="target", help="Target shard alias for --user")
+        parser.add_argument("--even", action="store_true", help="Move users until shards hold the same number of users")
+        parser.add_argument("--dry-run", action="store_true", help="Only print the planned moves")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def resolve_user(self, value):
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        try:
+            return User.objects.get(**lookup).pk
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {value}")
+
+    def handle(self, *args, **options):
+        if not shards():
+            raise CommandError("DATABASE_SHARDS is empty.")
+
+        if options["users"]:
+            if options["target"] not in shards():
+                raise CommandError(f"--to must be one of: {', '.join(shards())}")
+            moves = [(self.resolve_user(u), None, options["target"]) for u in options["users"]]
+        elif options["even"]:
+            moves = plan_rebalance()
+        else:
+            moves = []
+
+        for user_id, source, target in moves:
+            if options["dry_run"]:
+                self.stdout.write(f"user={user_id}: {source} -> {target}")
+                continue
+            moved = move_user(user_id, target, size=options["chunk_size"])
+            summary = ", ".join(f"{name}={n}" for name, n in moved.items()) or "nothing to move"
+            self.stdout.write(self.style.SUCCESS(f"user={user_id} -> {target}: {summary}"))
+
+        for alias, n in shard_sizes().items():
+            self.stdout.write(f"{alias}: {n} user(s)")
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from main.counters import COUNTER_FIELDS, compute_actual
+from main.models import Counter
+from main.shards import atomic_for, each_shard
+
+
+class Command(BaseCommand):
+    help = "Compare denormalized counters with real row counts and optionally repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Write the correct values")
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for _ in each_shard():
+            drifted += self.reconcile(options["users"], options["fix"])
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Counters are in sync."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {drifted} counter row(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{drifted} counter row(s) drifted; run with --fix to repair."))
+
+    def reconcile(self, owner_ids, fix):
+        actual = compute_actual(owner_ids)
+
+        rows = Counter.objects.all()
+        if owner_ids:
+            rows = rows.filter(owner_id__in=owner_ids)
+        existing = {(c.owner_id, c.category_id): c for c in rows}
+
+        zeros = dict.fromkeys(COUNTER_FIELDS, 0)
+        drifted = 0
+
+        with atomic_for(Counter):
+            for key in set(actual) | set(existing):
+                expected = actual.get(key, zeros)
+                counter = existing.get(key)
+                current = {f: getattr(counter, f) for f in COUNTER_FIELDS} if counter else zeros
+
+                if current == expected:
+                    continue
+
+                drifted += 1
+                diff = ", ".join(
+                    f"{f}: {current[f]} -> {expected[f]}" for f in COUNTER_FIELDS if current[f] != expected[f]
+                )
+                owner_id, category_id = key
+                self.stdout.write(f"user={owner_id} category={category_id or '-'}: {diff}")
+
+                if fix:
+                    if counter is None:
+                        Counter.objects.create(owner_id=owner_id, category_id=category_id, **expected)
+                    else:
+                        Counter.objects.filter(pk=counter.pk).update(**expected)
+        return drifted
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from main.checkin_archive import month_key, rehydrate
+from main.models import HabitCheckinArchive
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Restore archived habit check-ins back into regular rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habit", type=int, action="append", dest="habits", help="Only this habit id (repeatable)")
+        parser.add_argument("--month", help="Only this month (YYYY-MM)")
+
+    def handle(self, *args, **options):
+        rows = 0
+        for _ in each_shard():
+            archives = HabitCheckinArchive.objects.order_by("habit_id", "month")
+            if options["habits"]:
+                archives = archives.filter(habit_id__in=options["habits"])
+            if options["month"]:
+                archives = archives.filter(month=month_key(options["month"]))
+
+            for archive in archives.iterator():
+                n = rehydrate(archive)
+                rows += n
+                self.stdout.write(f"habit={archive.habit_id} {archive.month:%Y-%m}: {n} check-ins restored")
+
+        self.stdout.write(self.style.SUCCESS(f"Restored {rows} check-ins."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.cold_archive import DEFAULT_CHUNK_SIZE, restore_chunk, run_chunked
+from main.models import ArchivedEvent, ArchivedTask
+from main.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Move archived tasks/events back into the live tables in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only this user id (repeatable)")
+        parser.add_argument("--task", type=int, action="append", dest="tasks", help="Archived task id (repeatable)")
+        parser.add_argument("--event", type=int, action="append", dest="events", help="Archived event id (repeatable)")
+        parser.add_argument("--all", action="store_true", help="Restore everything matching --user")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not (options["users"] or options["tasks"] or options["events"] or options["all"]):
+            raise CommandError("Pass --user, --task, --event or --all.")
+
+        size = options["chunk_size"]
+        n_tasks = n_events = 0
+        for _ in each_shard():
+            tasks = ArchivedTask.objects.all()
+            events = ArchivedEvent.objects.all()
+            if options["users"]:
+                tasks = tasks.filter(owner_id__in=options["users"])
+                events = events.filter(owner_id__in=options["users"])
+            if options["tasks"] or options["events"]:
+                tasks = tasks.filter(pk__in=options["tasks"] or [])
+                events = events.filter(pk__in=options["events"] or [])
+
+            n_tasks += run_chunked(restore_chunk, tasks, size)
+            n_events += run_chunked(restore_chunk, events, size)
+        self.stdout.write(self.style.SUCCESS(f"Restored {n_tasks} task(s) and {n_events} event(s)."))
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.routers import PRIMARY, replicas
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into each configured replica (local replica testing only)"
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError("DATABASE_REPLICAS is empty.")
+
+        primary = settings.DATABASES[PRIMARY]
+        for alias in [PRIMARY, *aliases]:
+            if settings.DATABASES[alias]["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError(f"{alias} is not SQLite; use real replication instead.")
+
+        source = sqlite3.connect(primary["NAME"])
+        try:
+            for alias in aliases:
+                target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f"Copied {PRIMARY} -> {alias}."))
+        finally:
+            source.close()
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_name', models.CharField(max_length=100)),
+                ('action', models.CharField(choices=[('inbox', 'Move to Inbox'), ('move', 'Move to category'), ('delete_all', 'Delete all')], default='inbox', max_length=20)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='main.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_jobs', to=settings.AUTH_USER_MODEL)),
+                ('target', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incoming_jobs', to='main.category')),
+            ],
+            options={
+                'verbose_name': 'Category job',
+                'verbose_name_plural': 'Category jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
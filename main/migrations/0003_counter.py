@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    Counter = apps.get_model("main", "Counter")
+    Task = apps.get_model("main", "Task")
+    Event = apps.get_model("main", "Event")
+    Habit = apps.get_model("main", "Habit")
+    HabitCheckin = apps.get_model("main", "HabitCheckin")
+
+    counters = {}
+
+    def row(owner_id, category_id=None):
+        key = (owner_id, category_id)
+        if key not in counters:
+            counters[key] = Counter(owner_id=owner_id, category_id=category_id)
+        return counters[key]
+
+    for owner_id, category_id, status in Task.objects.values_list("owner_id", "category_id", "status"):
+        field = "tasks_done" if status == "done" else "tasks_open"
+        scopes = [row(owner_id)]
+        if category_id is not None:
+            scopes.append(row(owner_id, category_id))
+        for c in scopes:
+            setattr(c, field, getattr(c, field) + 1)
+
+    for owner_id, category_id in Event.objects.values_list("owner_id", "category_id"):
+        row(owner_id).events += 1
+        if category_id is not None:
+            row(owner_id, category_id).events += 1
+
+    for owner_id in Habit.objects.values_list("owner_id", flat=True):
+        row(owner_id).habits += 1
+
+    for owner_id in HabitCheckin.objects.values_list("habit__owner_id", flat=True):
+        row(owner_id).checkins += 1
+
+    Counter.objects.bulk_create(counters.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_category_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tasks_open', models.IntegerField(default=0)),
+                ('tasks_done', models.IntegerField(default=0)),
+                ('events', models.IntegerField(default=0)),
+                ('habits', models.IntegerField(default=0)),
+                ('checkins', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='main.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('owner',), name='uniq_counter_owner'), models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('owner', 'category'), name='uniq_counter_owner_category')],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'done'), _negated=True), fields=['owner', 'due_date', '-priority', 'estimated_time'], name='task_open_next_up_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_task_open_next_up_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['owner', 'start_datetime'], name='event_owner_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['owner', 'end_datetime'], name='event_owner_end_idx'),
+        ),
+    ]
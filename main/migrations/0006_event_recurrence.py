@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_event_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], default='weekly', max_length=10)),
+                ('interval', models.PositiveIntegerField(default=1)),
+                ('weekdays', models.CharField(blank=True, max_length=50)),
+                ('until', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('exdates', models.TextField(blank=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='main.event')),
+            ],
+            options={
+                'verbose_name': 'Event recurrence',
+                'verbose_name_plural': 'Event recurrences',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventOccurrenceOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField()),
+                ('cancelled', models.BooleanField(default=False)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('start_datetime', models.DateTimeField(blank=True, null=True)),
+                ('end_datetime', models.DateTimeField(blank=True, null=True)),
+                ('recurrence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overrides', to='main.eventrecurrence')),
+            ],
+            options={
+                'ordering': ['original_start'],
+                'constraints': [models.UniqueConstraint(fields=('recurrence', 'original_start'), name='uniq_occurrence_override')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitCheckinArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('offsets', models.BinaryField()),
+                ('done_bits', models.BinaryField()),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archives', to='main.habit')),
+            ],
+            options={
+                'verbose_name': 'Check-in archive',
+                'verbose_name_plural': 'Check-in archives',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('habit', 'month'), name='uniq_checkin_archive_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_checkin_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_events', to='main.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived event',
+                'verbose_name_plural': 'Archived events',
+                'ordering': ['-start_datetime'],
+                'indexes': [models.Index(fields=['owner', '-start_datetime'], name='archived_event_owner_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('priority', models.IntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High')], default=2)),
+                ('status', models.CharField(choices=[('todo', 'To do'), ('in_progress', 'In progress'), ('done', 'Done')], default='done', max_length=20)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('estimated_time', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='main.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived task',
+                'verbose_name_plural': 'Archived tasks',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['owner', '-created_at'], name='archived_task_owner_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_cold_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100)),
+                ('locked', models.BooleanField(default=False)),
+                ('moved_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='shard', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User shard',
+                'verbose_name_plural': 'User shards',
+                'indexes': [models.Index(fields=['alias'], name='user_shard_alias_idx')],
+            },
+        ),
+    ]
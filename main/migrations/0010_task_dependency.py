@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_user_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depends_on', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='main.task')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='main.task')),
+            ],
+            options={
+                'verbose_name': 'Task dependency',
+                'verbose_name_plural': 'Task dependencies',
+                'constraints': [models.UniqueConstraint(fields=('task', 'depends_on'), name='uniq_task_dependency'), models.CheckConstraint(condition=models.Q(('task', models.F('depends_on')), _negated=True), name='task_dependency_not_self')],
+            },
+        ),
+    ]
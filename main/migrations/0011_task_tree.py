@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_task_dependency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='main.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=2000),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'path'], name='task_tree_path_idx'),
+        ),
+    ]
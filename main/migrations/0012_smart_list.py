@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_task_tree'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmartList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('definition', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='smart_lists', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Smart list',
+                'verbose_name_plural': 'Smart lists',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_smart_list'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='main.event')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='event_links', to='main.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='events', through='main.EventTag', to='main.tag'),
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='main.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='main.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='tasks', through='main.TaskTag', to='main.tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('owner', 'name'), name='uniq_tag_owner_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventtag',
+            constraint=models.UniqueConstraint(fields=('tag', 'event'), name='uniq_event_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasktag',
+            constraint=models.UniqueConstraint(fields=('tag', 'task'), name='uniq_task_tag'),
+        ),
+    ]
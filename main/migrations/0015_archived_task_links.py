@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_purge_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='dependent_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='depends_on_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='original_parent_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
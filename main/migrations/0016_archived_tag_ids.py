@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_archived_task_links'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedevent',
+            name='tag_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tag_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -22,6 +22,26 @@ class Category(models.Model):
         return self.name
 
 
+class Tag(models.Model):
+    """Oznaka korisnika za taskove i evente (više po objektu, za razliku od kategorije)."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tags",
+    )
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [models.UniqueConstraint(fields=["owner", "name"], name="uniq_tag_owner_name")]
+        verbose_name = "Tag"
+        verbose_name_plural = "Tags"
+
+    def __str__(self) -> str:
+        return self.name
+
+
 
 class Task(models.Model):
     class Priority(models.IntegerChoices):
@@ -46,6 +66,17 @@ class Task(models.Model):
         blank=True,
         related_name="tasks",
     )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="children",
+    )
+    tags = models.ManyToManyField(Tag, through="TaskTag", blank=True, related_name="tasks")
+    # materijalizirana putanja: id-evi nadređenih od korijena, npr. "12/34/"
+    # (korijen ima ""); vidi main/tasktree.py
+    path = models.CharField(max_length=2000, blank=True, default="", editable=False)
 
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -65,10 +96,84 @@ class Task(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        indexes = [
+            # parcijalni indeks samo za otvorene taskove ("next up" red)
+            models.Index(
+                fields=["owner", "due_date", "-priority", "estimated_time"],
+                condition=~models.Q(status="done"),
+                name="task_open_next_up_idx",
+            ),
+            # podstablo = raspon po putanji (main/tasktree.py)
+            models.Index(fields=["owner", "path"], name="task_tree_path_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        # putanja novog taska; premještanje postojećeg radi tasktree.move_subtree
+        if self._state.adding:
+            self.path = f"{self.parent.path}{self.parent_id}/" if self.parent_id else ""
+        super().save(*args, **kwargs)
+
+    @property
+    def depth(self):
+        return self.path.count("/")
+
+
+class SmartList(models.Model):
+    """Spremljeni filter taskova; `definition` se prevodi u upit u main/smartlists.py."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="smart_lists",
+    )
+    name = models.CharField(max_length=100)
+    # npr. {"priority": [3], "category": [5], "due": "this_week"}
+    definition = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "Smart list"
+        verbose_name_plural = "Smart lists"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TaskDependency(models.Model):
+    """`task` ne može početi dok `depends_on` nije gotov (main/taskgraph.py)."""
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="dependencies")
+    depends_on = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="dependents")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task", "depends_on"], name="uniq_task_dependency"),
+            models.CheckConstraint(condition=~models.Q(task=models.F("depends_on")), name="task_dependency_not_self"),
+        ]
+        verbose_name = "Task dependency"
+        verbose_name_plural = "Task dependencies"
+
+    def __str__(self) -> str:
+        return f"{self.task_id} -> {self.depends_on_id}"
+
+
+class TaskTag(models.Model):
+    """Veza tag-task; jedinstveni indeks (tag, task) služi upitima po oznakama (main/tags.py)."""
+
+    # tag prvi: vlasnik se traži preko tag__owner (main/shards.py)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="task_links", db_index=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="tag_links")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tag", "task"], name="uniq_task_tag")]
+
+    def __str__(self) -> str:
+        return f"{self.tag_id} -> {self.task_id}"
+
 
 
 class Event(models.Model):
@@ -88,6 +193,7 @@ class Event(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     location = models.CharField(max_length=200, blank=True)
+    tags = models.ManyToManyField(Tag, through="EventTag", blank=True, related_name="events")
 
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField(null=True, blank=True)
@@ -96,12 +202,95 @@ class Event(models.Model):
         ordering = ["start_datetime"]
         verbose_name = "Event"
         verbose_name_plural = "Events"
+        indexes = [
+            # range upiti za preklapanja (main/conflicts.py)
+            models.Index(fields=["owner", "start_datetime"], name="event_owner_start_idx"),
+            models.Index(fields=["owner", "end_datetime"], name="event_owner_end_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
 
 
+class EventTag(models.Model):
+    """Veza tag-event, kao TaskTag."""
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="event_links", db_index=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="tag_links")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tag", "event"], name="uniq_event_tag")]
+
+    def __str__(self) -> str:
+        return f"{self.tag_id} -> {self.event_id}"
+
+
+
+class EventRecurrence(models.Model):
+    """
+    Pravilo ponavljanja (RRULE-like) za seriju evenata. Event na koji je
+    vezano je prvo pojavljivanje; ostala se generiraju u main/recurrence.py
+    samo za traženi raspon.
+    """
+
+    class Frequency(models.TextChoices):
+        DAILY = "daily", "Daily"
+        WEEKLY = "weekly", "Weekly"
+        MONTHLY = "monthly", "Monthly"
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="recurrence",
+    )
+    frequency = models.CharField(max_length=10, choices=Frequency.choices, default=Frequency.WEEKLY)
+    interval = models.PositiveIntegerField(default=1)
+
+    # isti format kao Habit.preferred_weekdays: "mon,wed,fri"
+    weekdays = models.CharField(max_length=50, blank=True)
+
+    # kraj serije: until (uključivo) i/ili broj ponavljanja, prazno = beskonačno
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    # preskočeni datumi, "2026-01-05,2026-01-12"
+    exdates = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Event recurrence"
+        verbose_name_plural = "Event recurrences"
+
+    def __str__(self) -> str:
+        return f"{self.event} ({self.get_frequency_display()})"
+
+
+
+class EventOccurrenceOverride(models.Model):
+    """Izmjena (ili otkazivanje) jednog pojavljivanja serije."""
+
+    recurrence = models.ForeignKey(
+        EventRecurrence,
+        on_delete=models.CASCADE,
+        related_name="overrides",
+    )
+    original_start = models.DateTimeField()
+
+    cancelled = models.BooleanField(default=False)
+    title = models.CharField(max_length=200, blank=True)
+    start_datetime = models.DateTimeField(null=True, blank=True)
+    end_datetime = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["original_start"]
+        constraints = [
+            models.UniqueConstraint(fields=["recurrence", "original_start"], name="uniq_occurrence_override")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.recurrence.event} @ {self.original_start}"
+
+
 class Habit(models.Model):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -187,3 +376,319 @@ class HabitCheckin(models.Model):
         if self.performed_at is not None:
             self.performed_at = self.performed_at.replace(second=0, microsecond=0)
         super().save(*args, **kwargs)
+
+
+
+class CategoryJob(models.Model):
+    """
+    Brisanje/premještanje velike kategorije koje se izvršava u pozadini
+    (management command `process_category_jobs`) u manjim dijelovima.
+    """
+
+    class Action(models.TextChoices):
+        INBOX = "inbox", "Move to Inbox"
+        MOVE = "move", "Move to category"
+        DELETE_ALL = "delete_all", "Delete all"
+
+    class State(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="category_jobs",
+    )
+    # category se briše na kraju posla, zato SET_NULL
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    category_name = models.CharField(max_length=100)
+    target = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="incoming_jobs",
+    )
+
+    action = models.CharField(max_length=20, choices=Action.choices, default=Action.INBOX)
+    state = models.CharField(max_length=10, choices=State.choices, default=State.PENDING)
+
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Category job"
+        verbose_name_plural = "Category jobs"
+
+    def __str__(self) -> str:
+        return f"{self.get_action_display()} - {self.category_name} ({self.state})"
+
+    @property
+    def percent(self) -> int:
+        if not self.total:
+            return 100 if self.state == self.State.DONE else 0
+        return min(100, int(self.processed * 100 / self.total))
+
+
+
+class PurgeJob(models.Model):
+    """
+    Brisanje korisnika ili habita s puno check-inova u pozadini
+    (management command `process_purge_jobs`) u ograničenim dijelovima.
+    """
+
+    class Kind(models.TextChoices):
+        USER = "user", "User account"
+        HABIT = "habit", "Habit"
+
+    class State(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    # owner i habit se brišu na kraju posla, zato SET_NULL
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="purge_jobs",
+    )
+    habit = models.ForeignKey(
+        "Habit",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="purge_jobs",
+    )
+    label = models.CharField(max_length=150)
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    state = models.CharField(max_length=10, choices=State.choices, default=State.PENDING)
+
+    total = models.PositiveBigIntegerField(default=0)
+    deleted = models.PositiveBigIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Purge job"
+        verbose_name_plural = "Purge jobs"
+
+    def __str__(self) -> str:
+        return f"Delete {self.get_kind_display().lower()} {self.label} ({self.state})"
+
+    @property
+    def percent(self) -> int:
+        if not self.total:
+            return 100 if self.state == self.State.DONE else 0
+        return min(100, int(self.deleted * 100 / self.total))
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.seconds if self.seconds else 0.0
+
+
+
+class Counter(models.Model):
+    """
+    Denormalizirani brojači po korisniku (category = NULL) i po kategoriji.
+    Održavaju se u main/counters.py, a `reconcile_counters` ispravlja odstupanja.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="counters",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="counters",
+    )
+
+    tasks_open = models.IntegerField(default=0)
+    tasks_done = models.IntegerField(default=0)
+    events = models.IntegerField(default=0)
+    # habits i checkins se vode samo na razini korisnika
+    habits = models.IntegerField(default=0)
+    checkins = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner"],
+                condition=models.Q(category__isnull=True),
+                name="uniq_counter_owner",
+            ),
+            models.UniqueConstraint(
+                fields=["owner", "category"],
+                condition=models.Q(category__isnull=False),
+                name="uniq_counter_owner_category",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        scope = self.category.name if self.category_id else "all"
+        return f"Counters for {self.owner} ({scope})"
+
+
+
+class HabitCheckinArchive(models.Model):
+    """
+    Sažeti check-inovi jednog habita za jedan mjesec (UTC): minute od
+    početka mjeseca kao delta-varint niz + bitmapa `done` zastavica.
+    Kodiranje je u main/checkin_archive.py.
+    """
+
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="archives",
+    )
+    month = models.DateField()  # prvi dan mjeseca
+    count = models.PositiveIntegerField(default=0)
+    offsets = models.BinaryField()
+    done_bits = models.BinaryField()
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(fields=["habit", "month"], name="uniq_checkin_archive_month")
+        ]
+        verbose_name = "Check-in archive"
+        verbose_name_plural = "Check-in archives"
+
+    def __str__(self) -> str:
+        return f"{self.habit.name} - {self.month:%Y-%m} ({self.count})"
+
+
+
+class ArchivedTask(models.Model):
+    """
+    Dovršeni stari task premješten iz main_task (main/cold_archive.py),
+    da "vruća" tablica ostane mala. Može se vratiti natrag.
+    """
+
+    original_id = models.BigIntegerField()
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tasks",
+    )
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    priority = models.IntegerField(choices=Task.Priority.choices, default=Task.Priority.MEDIUM)
+    status = models.CharField(choices=Task.Status.choices, default=Task.Status.DONE, max_length=20)
+    due_date = models.DateField(null=True, blank=True)
+    estimated_time = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+
+    # veze koje brisanje iz main_task briše, kao izvorni id-evi taskova
+    original_parent_id = models.BigIntegerField(null=True, blank=True)
+    depends_on_ids = models.JSONField(default=list, blank=True)
+    dependent_ids = models.JSONField(default=list, blank=True)
+    # oznake (veze TaskTag brisanje briše)
+    tag_ids = models.JSONField(default=list, blank=True)
+
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["owner", "-created_at"], name="archived_task_owner_idx")]
+        verbose_name = "Archived task"
+        verbose_name_plural = "Archived tasks"
+
+    def __str__(self) -> str:
+        return self.title
+
+
+
+class ArchivedEvent(models.Model):
+    """Prošli event premješten iz main_event (main/cold_archive.py)."""
+
+    original_id = models.BigIntegerField()
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_events",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_events",
+    )
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    location = models.CharField(max_length=200, blank=True)
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField(null=True, blank=True)
+    # oznake (veze EventTag brisanje briše)
+    tag_ids = models.JSONField(default=list, blank=True)
+
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-start_datetime"]
+        indexes = [models.Index(fields=["owner", "-start_datetime"], name="archived_event_owner_idx")]
+        verbose_name = "Archived event"
+        verbose_name_plural = "Archived events"
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class UserShard(models.Model):
+    """
+    Direktorij korisnik -> baza (alias iz DATABASE_SHARDS). Uvijek se
+    čita i piše na 'default'; vidi main/shards.py.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="shard",
+    )
+    alias = models.CharField(max_length=100)
+    # dok se podaci premještaju, pisanja korisnika se odbijaju
+    locked = models.BooleanField(default=False)
+    moved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["alias"], name="user_shard_alias_idx")]
+        verbose_name = "User shard"
+        verbose_name_plural = "User shards"
+
+    def __str__(self) -> str:
+        return f"{self.user} -> {self.alias}"
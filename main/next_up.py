@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+PARTITIONS = [
+    ("overdue", "Overdue"),
+    ("today", "Today"),
+    ("this_week", "This week"),
+    ("later", "Later"),
+    ("no_due_date", "No due date"),
+]
+
+
+def open_tasks(user):
+    """
+    Nedovršeni taskovi poredani po roku, prioritetu i procjeni trajanja.
+    exclude(status="done") odgovara uvjetu indeksa task_open_next_up_idx,
+    pa upit čita samo otvorene taskove.
+    """
+    return (
+        Task.objects.filter(owner=user)
+        .exclude(status=Task.Status.DONE)
+        .select_related("category")
+        .order_by(
+            F("due_date").asc(nulls_last=True),
+            "-priority",
+            F("estimated_time").asc(nulls_last=True),
+            "pk",
+        )
+    )
+
+
+def partition_for(due_date, today):
+    if due_date is None:
+        return "no_due_date"
+    if due_date < today:
+        return "overdue"
+    if due_date == today:
+        return "today"
+    # tjedan završava u nedjelju
+    if due_date <= today + timedelta(days=6 - today.weekday()):
+        return "this_week"
+    return "later"
+
+
+def next_up(user, today=None, limit=None):
+    """Vraća {partition: [task, ...]} u redoslijedu PARTITIONS."""
+    today = today or timezone.localdate()
+    result = {key: [] for key, _ in PARTITIONS}
+
+    qs = open_tasks(user)
+    if limit:
+        qs = qs[:limit]
+
+    for task in qs:
+        result[partition_for(task.due_date, today)].append(task)
+    return result
+
+
+def task_to_dict(task):
+    return {
+        "id": task.pk,
+        "title": task.title,
+        "status": task.status,
+        "priority": task.priority,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "estimated_time": task.estimated_time,
+        "category": task.category.name if task.category_id else None,
+    }
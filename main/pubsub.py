@@ -0,0 +1,158 @@
+"""
+Obavijesti o promjenama po korisniku za SSE (views.updates_stream).
+
+Signali (main/signals.py) nakon commita objavljuju poruku korisniku
+vlasniku; backend je dostavlja svim otvorenim vezama tog korisnika.
+Svaka veza je asyncio.Queue na event loopu ASGI servera - bez niti po
+vezi, pa proces drži tisuće neaktivnih veza.
+
+PUBSUB_BACKEND bira backend:
+- "main.pubsub.LocalBackend" (zadano): samo unutar procesa;
+- "main.pubsub.RedisBackend": Redis pub/sub (PUBSUB_REDIS_URL) između
+  procesa; po procesu jedna Redis veza, dalje kao LocalBackend.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 100
+CHANNEL_PREFIX = "planner:updates:"
+DEFAULT_HEARTBEAT_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat_seconds():
+    return getattr(settings, "LIVE_UPDATES_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS)
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, message):
+        # spori klijent: umjesto gomilanja poruka - "učitaj sve ponovno"
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = {"type": "resync"}
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalBackend:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # user_id -> {Subscription, ...}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscribers.pop(subscription.user_id, None)
+
+    def active(self):
+        """Ima li slušatelja - bez njih signali ne rade ništa."""
+        return bool(self.subscribers)
+
+    def wants(self, user_id):
+        return user_id in self.subscribers
+
+    def publish(self, user_id, message):
+        self.deliver(user_id, message)
+
+    def deliver(self, user_id, message):
+        # publish dolazi iz niti sync viewa - queue se puni na njegovom loopu
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # loop je zatvoren, veza se upravo gasi
+                pass
+
+
+class RedisBackend(LocalBackend):
+    def __init__(self):
+        super().__init__()
+        self.url = getattr(settings, "PUBSUB_REDIS_URL", "redis://localhost:6379/0")
+        self.client = None
+        self.listeners = {}  # loop -> asyncio.Task
+
+    # slušatelji mogu biti u drugim procesima
+    def active(self):
+        return True
+
+    def wants(self, user_id):
+        return True
+
+    def publish(self, user_id, message):
+        import redis
+
+        if self.client is None:
+            self.client = redis.Redis.from_url(self.url)
+        try:
+            self.client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(message))
+        except redis.RedisError:
+            # Redis nedostupan: klijenti propuštaju obavijest, upis ostaje uspješan
+            logger.warning("Live update for user %s not published", user_id, exc_info=True)
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        listener = self.listeners.get(subscription.loop)
+        if listener is None or listener.done():
+            self.listeners[subscription.loop] = subscription.loop.create_task(self.listen())
+        return subscription
+
+    async def listen(self):
+        import redis.asyncio
+
+        pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+        await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        async for item in pubsub.listen():
+            if item["type"] != "pmessage":
+                continue
+            user_id = int(item["channel"].rsplit(b":", 1)[1])
+            self.deliver(user_id, json.loads(item["data"]))
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, "PUBSUB_BACKEND", "main.pubsub.LocalBackend"))()
+    return _backend
+
+
+def notify(user_id, model, message):
+    """
+    Objavljuje `message` korisniku nakon commita (klijent odmah čita nove
+    podatke). Greška pri objavi se samo zapisuje u log - upis je već
+    commitan i zahtjev ne smije završiti s 500.
+    """
+    backend = get_backend()
+    if user_id is None or not backend.wants(user_id):
+        return
+    transaction.on_commit(
+        lambda: backend.publish(user_id, message), using=router.db_for_write(model), robust=True
+    )
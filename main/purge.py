@@ -0,0 +1,273 @@
+"""
+Brisanje velikih količina podataka u ograničenim dijelovima.
+
+Brisanje korisnika (ili habita s puno check-inova) kaskadom briše sve
+povezane redove u jednoj transakciji i dugo drži zaključavanja. Ovdje se
+isti redovi brišu od listova prema korijenu (djeca prije roditelja, pa
+kaskada nema posla) po PURGE_BATCH_SIZE redova, svaki dio u svojoj
+transakciji, s pauzom PURGE_THROTTLE_SECONDS između dijelova da ostali
+upiti (i replike) stignu na red.
+
+Poslove (PurgeJob) obrađuje `process_purge_jobs`, a `enforce_retention`
+briše podatke starije od RETENTION_DAYS, npr. {"checkins": 3 * 365}.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .checkin_archive import month_start
+from .counters import bump, suspend_counters
+from .models import ArchivedEvent, ArchivedTask, Habit, HabitCheckin, HabitCheckinArchive, PurgeJob
+from .shards import PRIMARY, atomic_for, current_shard, owned_models, owner_context, owner_path
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_THROTTLE_SECONDS = 0.05
+# habit s više check-inova od ovoga briše se u pozadini
+DEFAULT_SYNC_LIMIT = 5000
+
+
+def batch_size():
+    return getattr(settings, "PURGE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def throttle_seconds():
+    return getattr(settings, "PURGE_THROTTLE_SECONDS", DEFAULT_THROTTLE_SECONDS)
+
+
+def sync_limit():
+    return getattr(settings, "PURGE_SYNC_LIMIT", DEFAULT_SYNC_LIMIT)
+
+
+def self_references(model):
+    return [f for f in model._meta.concrete_fields if f.is_relation and f.related_model is model]
+
+
+def leaves(qs):
+    """Redovi na koje ne pokazuje nijedan drugi (npr. task bez podtaskova)."""
+    model = qs.model
+    for field in self_references(model):
+        qs = qs.exclude(Exists(model.objects.filter(**{field.name: OuterRef("pk")})))
+    return qs
+
+
+def delete_in_batches(qs, size=None, throttle=None, progress=None, on_batch=None):
+    """
+    Briše redove iz `qs` po `size` (keyset po pk), svaki dio u svojoj
+    transakciji. `on_batch(batch)` se poziva u istoj transakciji prije
+    brisanja (npr. za brojače). Vraća broj obrisanih redova.
+
+    Model sa samoreferencom (Task.parent, CASCADE) briše se od listova:
+    brisanje roditelja bi kaskadom povuklo cijelo podstablo u isti dio.
+    """
+    size = size or batch_size()
+    throttle = throttle_seconds() if throttle is None else throttle
+    model = qs.model
+    tree = bool(self_references(model))
+    deleted = 0
+    last = None
+    while True:
+        with atomic_for(model):
+            if tree:
+                # bez keyseta: brisanjem listova nastaju novi listovi s manjim pk
+                chunk = leaves(qs)
+            else:
+                chunk = qs if last is None else qs.filter(pk__gt=last)
+            pks = list(chunk.order_by("pk").values_list("pk", flat=True)[:size])
+            if not pks:
+                return deleted
+            batch = model.objects.filter(pk__in=pks)
+            if on_batch is not None:
+                on_batch(batch)
+            n, _ = batch.delete()
+        last = pks[-1]
+        deleted += n
+        if progress is not None:
+            progress(n)
+        if throttle:
+            time.sleep(throttle)
+
+
+# --- brojači (brisanje ide uz suspend_counters, promjena se bilježi po dijelu) ---
+
+def uncount_checkins(batch):
+    for row in batch.order_by().values("habit__owner_id").annotate(n=Count("pk")):
+        bump(row["habit__owner_id"], checkins=-row["n"])
+
+
+def uncount_checkin_archives(batch):
+    for row in batch.order_by().values("habit__owner_id").annotate(n=Sum("count")):
+        bump(row["habit__owner_id"], checkins=-row["n"])
+
+
+# --- korisnik ---
+
+def user_querysets(user_id):
+    """Svi main redovi korisnika, od listova prema korijenu (PurgeJob ostaje kao zapis posla)."""
+    return [
+        model.objects.filter(**{owner_path(model): user_id})
+        for model in reversed(owned_models())
+        if model is not PurgeJob
+    ]
+
+
+def purge_user_data(user_id, **kwargs):
+    # brojači korisnika (Counter) se brišu zajedno s ostalim
+    with suspend_counters():
+        return sum(delete_in_batches(qs, **kwargs) for qs in user_querysets(user_id))
+
+
+def delete_user(user_id):
+    """Zadnji korak: red korisnika (sada bez podataka) na shardu i na 'default'."""
+    User = get_user_model()
+    alias = current_shard()
+    if alias is not None and alias != PRIMARY:
+        User.objects.using(alias).filter(pk=user_id).delete()
+    User.objects.using(PRIMARY).filter(pk=user_id).delete()
+
+
+def start_user_purge(user):
+    """Korisnik se odmah deaktivira (ne može se prijaviti), podaci se brišu u pozadini."""
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    with owner_context(user.pk):
+        return PurgeJob.objects.create(owner=user, kind=PurgeJob.Kind.USER, label=user.get_username())
+
+
+# --- habit ---
+
+def habit_querysets(habit_id):
+    return [
+        (HabitCheckin.objects.filter(habit_id=habit_id), uncount_checkins),
+        (HabitCheckinArchive.objects.filter(habit_id=habit_id), uncount_checkin_archives),
+    ]
+
+
+def purge_habit_data(habit_id, **kwargs):
+    with suspend_counters():
+        return sum(
+            delete_in_batches(qs, on_batch=on_batch, **kwargs) for qs, on_batch in habit_querysets(habit_id)
+        )
+
+
+def needs_background_purge(habit):
+    limit = sync_limit()
+    live = len(habit.checkins.order_by().values_list("pk", flat=True)[:limit + 1])
+    if live > limit:
+        return True
+    # sažeti mjeseci (HabitCheckinArchive) broje se po check-inovima
+    return live + (habit.archives.aggregate(n=Sum("count"))["n"] or 0) > limit
+
+
+def purging_habits():
+    """Habiti predani PurgeJobu: skriveni i bez novih check-inova dok ih posao ne obriše."""
+    return PurgeJob.objects.filter(kind=PurgeJob.Kind.HABIT, habit__isnull=False).values("habit_id")
+
+
+def start_habit_purge(habit):
+    """Habit se odmah deaktivira i skriva; ponovljeni zahtjev dobiva isti posao."""
+    with atomic_for(Habit):
+        # zaključan red habita: dva istovremena zahtjeva ne stvaraju dva posla
+        list(Habit.objects.select_for_update().filter(pk=habit.pk).values_list("pk", flat=True))
+        job = PurgeJob.objects.filter(habit=habit, kind=PurgeJob.Kind.HABIT).exclude(state=PurgeJob.State.DONE).first()
+        if job is not None:
+            return job
+        habit.active = False
+        habit.save(update_fields=["active"])
+        return PurgeJob.objects.create(owner_id=habit.owner_id, habit=habit, kind=PurgeJob.Kind.HABIT, label=habit.name)
+
+
+# --- poslovi ---
+
+def count_rows(job):
+    if job.kind == PurgeJob.Kind.USER:
+        return sum(qs.count() for qs in user_querysets(job.owner_id))
+    return sum(qs.count() for qs, _ in habit_querysets(job.habit_id))
+
+
+def run_purge_job(job, **kwargs):
+    # "zaključamo" posao da ga dva workera ne uzmu istovremeno
+    claimed = PurgeJob.objects.filter(pk=job.pk, state=PurgeJob.State.PENDING).update(state=PurgeJob.State.RUNNING)
+    if not claimed:
+        return False
+
+    job.refresh_from_db()
+    start = time.perf_counter()
+
+    def progress(n):
+        job.deleted += n
+        job.seconds = time.perf_counter() - start
+        PurgeJob.objects.filter(pk=job.pk).update(deleted=job.deleted, seconds=job.seconds)
+
+    try:
+        with owner_context(job.owner_id):
+            # None: korisnik/habit je već obrisan (npr. ponovljen posao)
+            if job.kind == PurgeJob.Kind.USER and job.owner_id is not None:
+                job.total = count_rows(job)
+                PurgeJob.objects.filter(pk=job.pk).update(total=job.total)
+                purge_user_data(job.owner_id, progress=progress, **kwargs)
+                delete_user(job.owner_id)
+            elif job.kind == PurgeJob.Kind.HABIT and job.habit_id is not None:
+                job.total = count_rows(job)
+                PurgeJob.objects.filter(pk=job.pk).update(total=job.total)
+                purge_habit_data(job.habit_id, progress=progress, **kwargs)
+                # preostalo je malo redova - obično brisanje, signali ažuriraju brojače
+                Habit.objects.filter(pk=job.habit_id).delete()
+    except Exception as exc:
+        job.state = PurgeJob.State.FAILED
+        job.error = str(exc)
+        PurgeJob.objects.filter(pk=job.pk).update(state=job.state, error=job.error)
+        raise
+
+    job.state = PurgeJob.State.DONE
+    job.seconds = time.perf_counter() - start
+    job.finished_at = timezone.now()
+    PurgeJob.objects.filter(pk=job.pk).update(state=job.state, seconds=job.seconds, finished_at=job.finished_at)
+    return True
+
+
+# --- zadržavanje podataka ---
+
+# pravilo -> [(model, uvjet za granicu, ispravak brojača), ...]
+RETENTION_RULES = {
+    # sažeti mjeseci samo kad je cijeli mjesec stariji od granice
+    "checkins": [
+        (HabitCheckin, lambda cutoff: Q(performed_at__lt=cutoff), uncount_checkins),
+        (HabitCheckinArchive, lambda cutoff: Q(month__lt=month_start(cutoff).date()), uncount_checkin_archives),
+    ],
+    "archived_tasks": [(ArchivedTask, lambda cutoff: Q(created_at__lt=cutoff), None)],
+    "archived_events": [(ArchivedEvent, lambda cutoff: Q(start_datetime__lt=cutoff), None)],
+}
+
+
+def retention_days():
+    return getattr(settings, "RETENTION_DAYS", {})
+
+
+def enforce_retention(days=None, progress=None, **kwargs):
+    """
+    Briše podatke starije od `days` ({pravilo: dani}, zadano RETENTION_DAYS;
+    None = čuva se zauvijek). Vraća {pravilo: broj obrisanih redova}.
+    """
+    days = retention_days() if days is None else days
+    unknown = set(days) - set(RETENTION_RULES)
+    if unknown:
+        raise ValueError(f"Unknown retention rule(s): {', '.join(sorted(unknown))}")
+
+    result = {}
+    now = timezone.now()
+    for name, n in days.items():
+        if n is None:
+            continue
+        cutoff = now - timedelta(days=n)
+        result[name] = 0
+        with suspend_counters():
+            for model, condition, on_batch in RETENTION_RULES[name]:
+                result[name] += delete_in_batches(
+                    model.objects.filter(condition(cutoff)), on_batch=on_batch, progress=progress, **kwargs
+                )
+    return result
@@ -0,0 +1,104 @@
+"""
+Token bucket po korisniku i endpointu, spremljen u Django cache.
+
+Svaki bucket ima `capacity` tokena (dopušteni nalet) i puni se brzinom
+`rate` tokena u sekundi; svaki POST troši jedan token. Ako zadani cache
+nije dostupan (npr. Redis je pao), koristi se lokalni in-memory cache -
+limit tada vrijedi po procesu, ali aplikacija radi dalje.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+# scope -> (capacity, tokena u sekundi)
+DEFAULT_RATE_LIMITS = {
+    "checkin": (10, 1.0),
+    "write": (30, 0.5),
+}
+
+# lock bucketa: koliko dugo se čeka i kada istekne ako proces padne
+LOCK_WAIT_SECONDS = 0.1
+LOCK_TIMEOUT = 1
+
+_fallback = LocMemCache("ratelimit-fallback", {})
+
+
+def rate_limits():
+    return {**DEFAULT_RATE_LIMITS, **getattr(settings, "RATE_LIMITS", {})}
+
+
+def get_cache():
+    alias = getattr(settings, "RATE_LIMIT_CACHE", "default")
+    return caches[alias] if alias in settings.CACHES else _fallback
+
+
+def _acquire(cache, lock_key):
+    """cache.add je atomičan (Redis SET NX, memcached add), pa služi kao lock."""
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.002)
+    return True
+
+
+def _take(cache, key, capacity, rate, now):
+    lock_key = f"{key}:lock"
+    if not _acquire(cache, lock_key):
+        # drugi zahtjev istog bucketa upravo troši token - to je nalet
+        return False, 1 / rate
+    try:
+        state = cache.get(key)
+        tokens, updated = state if state is not None else (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return False, (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), math.ceil(capacity / rate) + 1)
+        return True, 0.0
+    finally:
+        cache.delete(lock_key)
+
+
+def take(key, capacity, rate, now=None):
+    """
+    Uzima jedan token iz bucketa `key`. Vraća (dopušteno, sekundi do
+    idućeg tokena).
+
+    Čitanje i upis stanja idu pod lockom po bucketu: bez njega istovremeni
+    zahtjevi (više workera na istom cacheu) pročitaju isti broj tokena i
+    nalet prođe preko `capacity`.
+    """
+    now = time.time() if now is None else now
+    try:
+        return _take(get_cache(), key, capacity, rate, now)
+    except Exception:
+        return _take(_fallback, key, capacity, rate, now)
+
+
+class RateLimitMixin:
+    """
+    Ograničava POST zahtjeve prijavljenog korisnika na view; ključ je
+    korisnik + ime URL-a, a `rate_limit_scope` bira limit iz RATE_LIMITS.
+    """
+
+    rate_limit_scope = "write"
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method == "POST"
+            and request.user.is_authenticated
+            and getattr(settings, "RATE_LIMIT_ENABLED", True)
+        ):
+            capacity, rate = rate_limits()[self.rate_limit_scope]
+            endpoint = request.resolver_match.view_name if request.resolver_match else request.path
+            allowed, wait = take(f"rl:{request.user.pk}:{endpoint}", capacity, rate)
+            if not allowed:
+                response = HttpResponse("Too many requests, please slow down.", status=429)
+                response["Retry-After"] = str(math.ceil(wait))
+                return response
+        return super().dispatch(request, *args, **kwargs)
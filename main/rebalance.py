@@ -0,0 +1,151 @@
+"""
+Premještanje korisnika između shardova (vidi main/shards.py) i
+raspodjela korisnika - koristi ga komanda rebalance_shards.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import suspend_counters
+from .models import Task, UserShard
+from .shards import PRIMARY, main_parents, ensure_user_row, owned_models, owner_path, shard_for_user, shards
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def purge_user(user_id, alias):
+    """Briše sve main redove korisnika iz baze `alias`."""
+    with suspend_counters(), transaction.atomic(using=alias):
+        for model in reversed(owned_models()):
+            model.objects.using(alias).filter(**{owner_path(model): user_id}).delete()
+
+
+def _copy_model(model, user_id, source, target, pk_maps, size):
+    fk_fields = [f for f in main_parents(model) if f.related_model in pk_maps]
+    pk_map = pk_maps[model] = {}
+    qs = model.objects.using(source).filter(**{owner_path(model): user_id}).order_by("pk")
+
+    last = None
+    while True:
+        chunk = qs if last is None else qs.filter(pk__gt=last)
+        rows = list(chunk[:size])
+        if not rows:
+            _remap_self_refs(model, target, pk_map, size)
+            return
+        last = rows[-1].pk
+
+        taken = set(
+            model.objects.using(target).filter(pk__in=[r.pk for r in rows]).values_list("pk", flat=True)
+        )
+        copies = []
+        for row in rows:
+            values = {f.attname: getattr(row, f.attname) for f in model._meta.concrete_fields}
+            for field in fk_fields:
+                value = values[field.attname]
+                values[field.attname] = pk_maps[field.related_model].get(value, value)
+            # kao kod vraćanja iz arhive: izvorni id ako je slobodan
+            if row.pk in taken:
+                values[model._meta.pk.attname] = None
+            copies.append(model(**values))
+
+        model.objects.using(target).bulk_create(copies)
+        pk_map.update((row.pk, copy.pk) for row, copy in zip(rows, copies))
+
+
+def _remap_self_refs(model, target, pk_map, size):
+    """
+    Samoreference (Task.parent) i Task.path kopirani su s izvornim id-evima
+    (roditelj može doći i iza djeteta), pa se tek kad je cijeli model
+    kopiran prevode u nove id-eve - inače bi pokazivali na tuđe redove.
+    """
+    self_fks = [f for f in model._meta.concrete_fields if f.is_relation and f.related_model is model]
+    if not self_fks or all(old == new for old, new in pk_map.items()):
+        return
+    fields = [f.attname for f in self_fks] + (["path"] if model is Task else [])
+
+    def remap(pk):
+        return pk_map.get(pk, pk)
+
+    new_pks = sorted(pk_map.values())
+    for i in range(0, len(new_pks), size):
+        changed = []
+        for row in model.objects.using(target).filter(pk__in=new_pks[i:i + size]).only("pk", *fields):
+            before = [getattr(row, f) for f in fields]
+            for field in self_fks:
+                value = getattr(row, field.attname)
+                if value is not None:
+                    setattr(row, field.attname, remap(value))
+            if model is Task:
+                row.path = "".join(f"{remap(int(pk))}/" for pk in row.path.split("/") if pk)
+            if [getattr(row, f) for f in fields] != before:
+                changed.append(row)
+        model.objects.using(target).bulk_update(changed, fields)
+
+
+def move_user(user_id, target, size=DEFAULT_CHUNK_SIZE):
+    """
+    Premješta sve podatke korisnika na shard `target`:
+    1. korisnik se zaključa (pisanja dobivaju 503),
+    2. na `target` se brišu ostaci prekinutog premještanja i kopira se sve
+       u jednoj transakciji (id-evi se mijenjaju samo ako su zauzeti),
+    3. direktorij se prebaci na `target`,
+    4. podaci se brišu sa starog sharda i korisnik se otključa.
+    Prekid prije 3. ostavlja korisnika na starom shardu, pa se komanda
+    može ponoviti. Vraća {model: broj redova}.
+    """
+    if target not in shards():
+        raise ValueError(f"Unknown shard: {target}")
+    source = shard_for_user(user_id)
+    if source == target:
+        return {}
+
+    UserShard.objects.using(PRIMARY).filter(user_id=user_id).update(locked=True)
+    try:
+        ensure_user_row(user_id, target)
+        purge_user(user_id, target)
+
+        pk_maps = {}
+        with transaction.atomic(using=target):
+            for model in owned_models():
+                _copy_model(model, user_id, source, target, pk_maps, size)
+
+        UserShard.objects.using(PRIMARY).filter(user_id=user_id).update(alias=target, moved_at=timezone.now())
+        purge_user(user_id, source)
+    finally:
+        UserShard.objects.using(PRIMARY).filter(user_id=user_id).update(locked=False)
+
+    return {model.__name__: len(pk_maps[model]) for model in owned_models() if pk_maps[model]}
+
+
+def shard_sizes():
+    counts = dict.fromkeys(shards(), 0)
+    for alias in UserShard.objects.using(PRIMARY).values_list("alias", flat=True):
+        counts[alias] = counts.get(alias, 0) + 1
+    return counts
+
+
+def plan_rebalance():
+    """
+    Premještanja (user_id, source, target) nakon kojih se broj korisnika
+    po shardovima razlikuje najviše za 1 (npr. nakon dodavanja sharda).
+    """
+    members = {alias: [] for alias in shards()}
+    for user_id, alias in UserShard.objects.using(PRIMARY).order_by("user_id").values_list("user_id", "alias"):
+        members.setdefault(alias, []).append(user_id)
+
+    moves = []
+    # korisnici na aliasu koji više nije u DATABASE_SHARDS moraju se premjestiti
+    for alias in [a for a in members if a not in shards()]:
+        for user_id in members.pop(alias):
+            target = min(members, key=lambda a: len(members[a]))
+            members[target].append(user_id)
+            moves.append((user_id, alias, target))
+
+    while True:
+        fullest = max(members, key=lambda a: len(members[a]))
+        emptiest = min(members, key=lambda a: len(members[a]))
+        if len(members[fullest]) - len(members[emptiest]) <= 1:
+            return moves
+        user_id = members[fullest].pop()
+        members[emptiest].append(user_id)
+        moves.append((user_id, fullest, emptiest))
@@ -0,0 +1,209 @@
+import calendar
+import heapq
+from datetime import date, datetime, timedelta
+
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import Event, EventOccurrenceOverride, EventRecurrence
+
+WEEKDAY_INDEX = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+class Occurrence:
+    """Jedno pojavljivanje eventa u rasporedu (obični event ili dio serije)."""
+
+    __slots__ = ("event", "title", "start", "end", "original_start", "override")
+
+    def __init__(self, event, start, end, title=None, original_start=None, override=None):
+        self.event = event
+        self.title = title or event.title
+        self.start = start
+        self.end = end
+        self.original_start = original_start
+        self.override = override
+
+    @property
+    def is_recurring(self):
+        return self.original_start is not None
+
+    @property
+    def timestamp(self):
+        # ključ pojavljivanja u URL-u (main:event_occurrence_edit)
+        return int(self.original_start.timestamp()) if self.original_start else None
+
+    def __lt__(self, other):
+        return self.start < other.start
+
+    def as_dict(self):
+        return {
+            "id": self.event.pk,
+            "title": self.title,
+            "start": self.start,
+            "end": self.end,
+            "original_start": self.original_start,
+        }
+
+
+def parse_exdates(value):
+    result = set()
+    for part in (value or "").split(","):
+        part = part.strip()
+        if part:
+            try:
+                result.add(date.fromisoformat(part))
+            except ValueError:
+                continue
+    return result
+
+
+def _iter_dates(rule, base, skip_to=None):
+    """
+    Beskonačan generator datuma serije počevši od `base`. Ako je zadan
+    `skip_to`, odmah skače na period koji ga sadrži umjesto da ide od početka.
+    """
+    step = max(1, rule.interval)
+
+    if rule.frequency == EventRecurrence.Frequency.DAILY:
+        k = (skip_to - base).days // step if skip_to and skip_to > base else 0
+        while True:
+            try:
+                d = base + timedelta(days=k * step)
+            except OverflowError:
+                return  # iza date.max
+            yield d
+            k += 1
+
+    elif rule.frequency == EventRecurrence.Frequency.WEEKLY:
+        weekdays = sorted(
+            {WEEKDAY_INDEX[w] for w in rule.weekdays.split(",") if w in WEEKDAY_INDEX}
+        ) or [base.weekday()]
+        week0 = base - timedelta(days=base.weekday())
+        k = ((skip_to - week0).days // 7) // step if skip_to and skip_to > base else 0
+        while True:
+            for wd in weekdays:
+                try:
+                    d = week0 + timedelta(weeks=k * step, days=wd)
+                except OverflowError:
+                    return
+                if d >= base:
+                    yield d
+            k += 1
+
+    else:
+        month0 = base.year * 12 + base.month - 1
+        k = 0
+        if skip_to and skip_to > base:
+            k = (skip_to.year * 12 + skip_to.month - 1 - month0) // step
+        while True:
+            year, month = divmod(month0 + k * step, 12)
+            if year > date.max.year:
+                return
+            # mjeseci bez tog dana (npr. 31.) se preskaču
+            if base.day <= calendar.monthrange(year, month + 1)[1]:
+                yield date(year, month + 1, base.day)
+            k += 1
+
+
+def iter_starts(rule, dtstart, window_start=None, window_end=None):
+    """
+    Lijeno generira početke pojavljivanja (u lokalnom vremenu, pa serija
+    ostaje u isto doba dana i preko promjene ljetnog vremena).
+    Bez `count` se odmah preskače do `window_start`.
+    """
+    tz = timezone.get_current_timezone()
+    local = timezone.localtime(dtstart, tz)
+    clock = local.time().replace(tzinfo=None)
+    exdates = parse_exdates(rule.exdates)
+
+    skip_to = None
+    if rule.count is None and window_start is not None:
+        skip_to = timezone.localtime(window_start, tz).date()
+
+    emitted = 0
+    for d in _iter_dates(rule, local.date(), skip_to):
+        if rule.until is not None and d > rule.until:
+            return
+        if rule.count is not None and emitted >= rule.count:
+            return
+        emitted += 1
+
+        start = datetime.combine(d, clock, tzinfo=tz)
+        if window_end is not None and start >= window_end:
+            return
+        if d in exdates or (window_start is not None and start < window_start):
+            continue
+        yield start
+
+
+def expand(event, window_start, window_end):
+    """Pojavljivanja serije koja se preklapaju s [window_start, window_end)."""
+    rule = event.recurrence
+    duration = event.end_datetime - event.start_datetime if event.end_datetime else None
+    overrides = {o.original_start: o for o in rule.overrides.all()}
+
+    # pojavljivanje koje je počelo prije prozora može još trajati
+    search_start = window_start - duration if duration else window_start
+
+    result = []
+    seen = set()
+    for start in iter_starts(rule, event.start_datetime, search_start, window_end):
+        seen.add(start)
+        override = overrides.get(start)
+        if override is not None:
+            continue
+        end = start + duration if duration else None
+        if end is not None and end <= window_start:
+            continue
+        result.append(Occurrence(event, start, end, original_start=start))
+
+    # pomaknuta pojavljivanja (override) mogu doći i izvan izvornog raspona
+    for original, override in overrides.items():
+        if override.cancelled:
+            continue
+        start = override.start_datetime or original
+        end = override.end_datetime or (start + duration if duration else None)
+        overlaps = end > window_start if end is not None else start >= window_start
+        if start < window_end and overlaps:
+            if original in seen or is_occurrence(rule, event.start_datetime, original):
+                result.append(Occurrence(event, start, end, override.title, original, override))
+
+    result.sort()
+    return result
+
+
+def is_occurrence(rule, dtstart, original):
+    return next(iter_starts(rule, dtstart, original, original + timedelta(seconds=1)), None) == original
+
+
+def window_q(window_start, window_end):
+    """
+    Eventi koji se preklapaju s [window_start, window_end); event bez kraja
+    je trenutak. Predikat `end_datetime > window_start` ide preko indeksa
+    (owner, end_datetime), pa se stara povijest ne čita.
+    """
+    return Q(start_datetime__lt=window_end, end_datetime__gt=window_start) | Q(
+        end_datetime__isnull=True, start_datetime__gte=window_start, start_datetime__lt=window_end
+    )
+
+
+def events_in_window(user, window_start, window_end):
+    """
+    Generator svih pojavljivanja korisnikovih evenata u rasponu, poredan po
+    početku: obični eventi iz baze + serije proširene samo za ovaj raspon.
+    """
+    single = (
+        Event.objects.filter(owner=user, recurrence__isnull=True)
+        .filter(window_q(window_start, window_end))
+        .order_by("start_datetime")
+    )
+    series = (
+        Event.objects.filter(owner=user, recurrence__isnull=False, start_datetime__lt=window_end)
+        .filter(Q(recurrence__until__isnull=True) | Q(recurrence__until__gte=timezone.localtime(window_start).date()))
+        .select_related("recurrence")
+        .prefetch_related(Prefetch("recurrence__overrides", queryset=EventOccurrenceOverride.objects.all()))
+    )
+
+    streams = [(Occurrence(e, e.start_datetime, e.end_datetime) for e in single.iterator())]
+    streams.extend(expand(e, window_start, window_end) for e in series)
+    return heapq.merge(*streams)
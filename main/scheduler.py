@@ -0,0 +1,162 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .next_up import open_tasks
+from .recurrence import events_in_window
+
+DEFAULT_DAY_START_HOUR = 8
+DEFAULT_DAY_END_HOUR = 20
+DEFAULT_TASK_MINUTES = 30
+
+
+def working_windows(start_date, days):
+    """Radno vrijeme (lokalna zona) za svaki dan u rasponu."""
+    tz = timezone.get_current_timezone()
+    day_start = getattr(settings, "PLANNER_DAY_START_HOUR", DEFAULT_DAY_START_HOUR)
+    day_end = getattr(settings, "PLANNER_DAY_END_HOUR", DEFAULT_DAY_END_HOUR)
+
+    windows = []
+    for i in range(days):
+        d = start_date + timedelta(days=i)
+        windows.append((
+            datetime.combine(d, time(day_start), tzinfo=tz),
+            datetime.combine(d, time(day_end), tzinfo=tz),
+        ))
+    return windows
+
+
+def free_intervals(busy, windows):
+    """
+    Slobodni intervali unutar `windows` nakon oduzimanja `busy` intervala.
+    Oba popisa se sortiraju i prolaze jednim sweepom - O((n + m) log n).
+    """
+    busy = sorted(busy)
+    free = []
+    i = 0
+
+    for w_start, w_end in sorted(windows):
+        # preskoči zauzeća koja završavaju prije ovog prozora
+        while i < len(busy) and busy[i][1] <= w_start:
+            i += 1
+
+        cursor = w_start
+        j = i
+        while j < len(busy) and busy[j][0] < w_end:
+            b_start, b_end = busy[j]
+            if b_start > cursor:
+                free.append((cursor, b_start))
+            cursor = max(cursor, b_end)
+            j += 1
+        if cursor < w_end:
+            free.append((cursor, w_end))
+
+    return free
+
+
+class _SlotTree:
+    """
+    Segment stablo nad preostalim kapacitetom (u minutama) slotova,
+    za pronalazak prvog slota u koji stane task u O(log n).
+    """
+
+    def __init__(self, capacities):
+        self.n = max(1, len(capacities))
+        self.size = 1
+        while self.size < self.n:
+            self.size *= 2
+        self.tree = [0] * (2 * self.size)
+        for i, c in enumerate(capacities):
+            self.tree[self.size + i] = c
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def first_fit(self, need):
+        if self.tree[1] < need:
+            return None
+        i = 1
+        while i < self.size:
+            i = 2 * i if self.tree[2 * i] >= need else 2 * i + 1
+        return i - self.size
+
+    def consume(self, index, amount):
+        i = self.size + index
+        self.tree[i] -= amount
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+
+def pack_tasks(tasks, free):
+    """
+    Pohlepno slaže taskove (već poredane po roku/prioritetu) u prvi
+    slobodni slot u koji stanu. `tasks` su dictovi s ključevima
+    pk, title, due_date, estimated_time.
+    Vraća (placed, unscheduled).
+    """
+    default_minutes = getattr(settings, "PLANNER_DEFAULT_TASK_MINUTES", DEFAULT_TASK_MINUTES)
+    tz = timezone.get_current_timezone()
+
+    capacities = [int((end - start).total_seconds() // 60) for start, end in free]
+    cursors = [start for start, _ in free]
+    tree = _SlotTree(capacities)
+
+    placed, unscheduled = [], []
+    for task in tasks:
+        minutes = task["estimated_time"] or default_minutes
+        index = tree.first_fit(minutes)
+        if index is None:
+            unscheduled.append(task)
+            continue
+
+        start = cursors[index]
+        end = start + timedelta(minutes=minutes)
+        cursors[index] = end
+        tree.consume(index, minutes)
+
+        due = task["due_date"]
+        late = due is not None and end > datetime.combine(due + timedelta(days=1), time(), tzinfo=tz)
+        placed.append({**task, "start": start, "end": end, "late": late})
+
+    return placed, unscheduled
+
+
+def plan(user, start_date, days=1, now=None):
+    """
+    Predloženi raspored: eventi korisnika + taskovi složeni u slobodno
+    vrijeme između njih (samo od `now` nadalje). Vraća dict s `timeline`
+    i `unscheduled`.
+    """
+    now = now or timezone.now()
+    windows = working_windows(start_date, days)
+    range_start, range_end = windows[0][0], windows[-1][1]
+    # ne predlaže taskove u vremenu koje je već prošlo
+    windows = [(max(w_start, now), w_end) for w_start, w_end in windows if w_end > now]
+
+    # uključuje i pojavljivanja ponavljajućih evenata u ovom rasponu
+    events = list(events_in_window(user, range_start, range_end))
+    # event bez kraja je trenutak, ne zauzima vrijeme
+    busy = [(e.start, e.end) for e in events if e.end]
+
+    tasks = open_tasks(user).values("pk", "title", "priority", "due_date", "estimated_time")
+    placed, unscheduled = pack_tasks(tasks, free_intervals(busy, windows))
+
+    timeline = [
+        {"type": "event", "id": e.event.pk, "title": e.title,
+         "start": e.start, "end": e.end, "late": False}
+        for e in events
+    ] + [
+        {"type": "task", "id": t["pk"], "title": t["title"],
+         "start": t["start"], "end": t["end"], "late": t["late"]}
+        for t in placed
+    ]
+    timeline.sort(key=lambda item: item["start"])
+
+    return {
+        "start": range_start,
+        "end": range_end,
+        "timeline": timeline,
+        "unscheduled": [{"id": t["pk"], "title": t["title"]} for t in unscheduled],
+    }
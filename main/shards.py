@@ -0,0 +1,157 @@
+"""
+Dijeljenje podataka po korisniku (sharding).
+
+Svi main modeli pripadaju jednom korisniku (owner ili preko habit /
+event / recurrence), pa se cijeli korisnik nalazi u jednoj bazi iz
+DATABASE_SHARDS. Direktorij (UserShard), korisnici i sesije ostaju na
+'default'. Prazan DATABASE_SHARDS = sve radi kao prije.
+
+Unutar requesta bazu postavlja ShardMiddleware; izvan requesta (komande,
+skripte) koristi se `with owner_context(user_id):`.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+
+from .models import UserShard
+
+PRIMARY = "default"
+
+_current = ContextVar("current_shard", default=None)
+
+
+def shards():
+    return list(getattr(settings, "DATABASE_SHARDS", []))
+
+
+def enabled():
+    return bool(shards())
+
+
+def current_shard():
+    return _current.get()
+
+
+@contextmanager
+def using_shard(alias):
+    token = _current.set(alias)
+    try:
+        yield alias
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def owner_context(user_id):
+    """Sav ORM pristup main modelima unutar bloka ide na bazu korisnika."""
+    if not enabled() or user_id is None:
+        yield None
+        return
+    if current_shard() is not None:
+        # već smo u kontekstu korisnika (request)
+        yield current_shard()
+        return
+    with using_shard(shard_for_user(user_id)) as alias:
+        yield alias
+
+
+# --- direktorij ---
+
+def directory_entry(user_id):
+    """(alias, locked) za korisnika; novi korisnik dobiva bazu po id-u."""
+    row = UserShard.objects.using(PRIMARY).filter(user_id=user_id).values_list("alias", "locked").first()
+    if row is not None:
+        return row
+
+    aliases = shards()
+    alias = aliases[user_id % len(aliases)]
+    ensure_user_row(user_id, alias)
+    entry, _ = UserShard.objects.using(PRIMARY).get_or_create(user_id=user_id, defaults={"alias": alias})
+    return entry.alias, entry.locked
+
+
+def shard_for_user(user_id):
+    return directory_entry(user_id)[0]
+
+
+def ensure_user_row(user_id, alias):
+    """
+    Kopija auth_user reda na shardu - samo kao cilj stranih ključeva
+    (owner_id); pravi korisnik se uvijek čita s 'default'.
+    """
+    if alias == PRIMARY:
+        return
+    User = get_user_model()
+    if User.objects.using(alias).filter(pk=user_id).exists():
+        return
+    user = User.objects.using(PRIMARY).get(pk=user_id)
+    User.objects.using(alias).bulk_create([user])
+
+
+# --- modeli i vlasnici ---
+
+def main_parents(model):
+    return [
+        f for f in model._meta.concrete_fields
+        if f.is_relation and f.related_model is not None
+        and f.related_model._meta.app_label == "main" and f.related_model is not model
+    ]
+
+
+def owner_path(model):
+    """'owner', 'habit__owner', 'recurrence__event__owner'..."""
+    if any(f.name == "owner" for f in model._meta.concrete_fields):
+        return "owner"
+    for field in main_parents(model):
+        if not field.null:
+            return f"{field.name}__{owner_path(field.related_model)}"
+    raise ValueError(f"{model.__name__} has no owner")
+
+
+def owner_id_of(instance):
+    """owner_id bez dodatnih upita (samo preko već učitanih roditelja)."""
+    obj = instance
+    for name in owner_path(type(instance)).split("__")[:-1]:
+        field = obj._meta.get_field(name)
+        if not field.is_cached(obj):
+            return None
+        obj = getattr(obj, name)
+    return getattr(obj, "owner_id", None)
+
+
+def owned_models():
+    """Main modeli korisnika, roditelji prije djece."""
+    models = [m for m in apps.get_app_config("main").get_models() if m is not UserShard]
+    ordered = []
+
+    def visit(model):
+        if model in ordered:
+            return
+        for field in main_parents(model):
+            visit(field.related_model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def atomic_for(model, **hints):
+    """transaction.atomic na bazi u koju idu pisanja za `model`."""
+    return transaction.atomic(using=router.db_for_write(model, **hints))
+
+
+def each_shard():
+    """
+    Za komande koje obrađuju sve korisnike: tijelo petlje se izvršava
+    jednom po shardu (ili jednom, bez shardova).
+        for alias in each_shard(): ...
+    """
+    for alias in shards() or [None]:
+        with using_shard(alias):
+            yield alias
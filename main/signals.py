@@ -1,19 +1,202 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.db.models import Sum
 from django.dispatch import receiver
 
-from .models import Category
+from . import pubsub, smartlists, tags, user_cache
+from .counters import bump, bump_scoped, counters_suspended, task_field
+from .models import Category, Event, EventTag, Habit, HabitCheckin, SmartList, Tag, Task, TaskTag
+from .shards import owner_context, owner_id_of
 
 
 def ensure_inbox_for_user(user):
-    Category.objects.get_or_create(
-        owner=user,
-        is_inbox=True,
-        defaults={"name": "Inbox"},
-    )
+    with owner_context(user.pk):
+        Category.objects.get_or_create(
+            owner=user,
+            is_inbox=True,
+            defaults={"name": "Inbox"},
+        )
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_inbox_category(sender, instance, created, **kwargs):
-    if created:
+    # INBOX_CREATE_ON_SIGNUP = False: Inbox nastaje tek kad zatreba
+    # (get_or_create u viewovima i formama, popis kategorija)
+    if created and getattr(settings, "INBOX_CREATE_ON_SIGNUP", True):
         ensure_inbox_for_user(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    if user_cache.enabled():
+        user_cache.invalidate(instance.pk)
+
+
+# --- brojači (main/counters.py) ---
+
+def _snapshot(instance, fields):
+    # stanje pri učitavanju, da u post_save znamo što se promijenilo
+    instance._counter_state = tuple(instance.__dict__.get(f) for f in fields)
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    _snapshot(instance, ("status", "category_id"))
+
+
+@receiver(post_init, sender=Event)
+def remember_event_state(sender, instance, **kwargs):
+    _snapshot(instance, ("category_id",))
+
+
+@receiver(post_save, sender=Task)
+def count_task_save(sender, instance, created, raw=False, **kwargs):
+    new_state = (instance.status, instance.category_id)
+    old_state = instance._counter_state
+    instance._counter_state = new_state
+    if raw or counters_suspended():
+        return
+
+    if created:
+        bump_scoped(instance.owner_id, instance.category_id, **{task_field(instance.status): 1})
+    elif old_state != new_state:
+        old_status, old_category = old_state
+        bump_scoped(instance.owner_id, old_category, **{task_field(old_status): -1})
+        bump_scoped(instance.owner_id, instance.category_id, **{task_field(instance.status): 1})
+
+
+@receiver(post_delete, sender=Task)
+def count_task_delete(sender, instance, **kwargs):
+    if not counters_suspended():
+        bump_scoped(instance.owner_id, instance.category_id, **{task_field(instance.status): -1})
+
+
+@receiver(post_save, sender=Event)
+def count_event_save(sender, instance, created, raw=False, **kwargs):
+    (old_category,) = instance._counter_state
+    instance._counter_state = (instance.category_id,)
+    if raw or counters_suspended():
+        return
+
+    if created:
+        bump_scoped(instance.owner_id, instance.category_id, events=1)
+    elif old_category != instance.category_id:
+        if old_category is not None:
+            bump(instance.owner_id, old_category, events=-1)
+        if instance.category_id is not None:
+            bump(instance.owner_id, instance.category_id, events=1)
+
+
+@receiver(post_delete, sender=Event)
+def count_event_delete(sender, instance, **kwargs):
+    if not counters_suspended():
+        bump_scoped(instance.owner_id, instance.category_id, events=-1)
+
+
+@receiver(post_save, sender=Habit)
+def count_habit_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not counters_suspended():
+        bump(instance.owner_id, habits=1)
+
+
+# check-inovi habita koji se upravo briše (cascade) - oduzimaju se odjednom
+_deleting_habits = set()
+
+
+@receiver(pre_delete, sender=Habit)
+def count_habit_checkins_delete(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    _deleting_habits.add(instance.pk)
+    archived = instance.archives.aggregate(n=Sum("count"))["n"] or 0
+    bump(instance.owner_id, checkins=-(instance.checkins.count() + archived))
+
+
+@receiver(post_delete, sender=Habit)
+def count_habit_delete(sender, instance, **kwargs):
+    _deleting_habits.discard(instance.pk)
+    if not counters_suspended():
+        bump(instance.owner_id, habits=-1)
+
+
+@receiver(post_save, sender=HabitCheckin)
+def count_checkin_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not counters_suspended():
+        bump(instance.habit.owner_id, checkins=1)
+
+
+@receiver(post_delete, sender=HabitCheckin)
+def count_checkin_delete(sender, instance, **kwargs):
+    if counters_suspended() or instance.habit_id in _deleting_habits:
+        return
+    owner_id = Habit.objects.filter(pk=instance.habit_id).values_list("owner_id", flat=True).first()
+    if owner_id is not None:
+        bump(owner_id, checkins=-1)
+
+
+# --- brojevi pametnih lista (main/smartlists.py) ---
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=SmartList)
+@receiver(post_delete, sender=SmartList)
+# brisanje kategorije taskovima postavlja category na NULL bez signala
+@receiver(post_delete, sender=Category)
+def invalidate_smart_list_counts(sender, instance, raw=False, **kwargs):
+    if not raw:
+        smartlists.invalidate(instance.owner_id)
+
+
+# --- brojevi po oznakama (main/tags.py) ---
+
+@receiver(m2m_changed, sender=TaskTag)
+@receiver(m2m_changed, sender=EventTag)
+def invalidate_tag_counts_links(sender, instance, action, **kwargs):
+    # instance je task/event (task.tags...) ili tag (tag.tasks...) - svi imaju owner
+    if action in ("post_add", "post_remove", "post_clear"):
+        tags.invalidate(instance.owner_id)
+
+
+# brisanje kaskadno briše veze, bez m2m_changed
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_counts(sender, instance, **kwargs):
+    tags.invalidate(instance.owner_id)
+
+
+# --- obavijesti za SSE (main/pubsub.py) ---
+
+LIVE_MODELS = {Task: "task", Event: "event", Habit: "habit", HabitCheckin: "checkin"}
+
+
+def _live_owner_id(instance):
+    if isinstance(instance, HabitCheckin):
+        owner_id = owner_id_of(instance)
+        if owner_id is None:
+            owner_id = Habit.objects.filter(pk=instance.habit_id).values_list("owner_id", flat=True).first()
+        return owner_id
+    return instance.owner_id
+
+
+def publish_change(sender, instance, raw=False, created=None, **kwargs):
+    if raw or not pubsub.get_backend().active():
+        return
+    # check-inovi habita koji se briše stižu uz obavijest za sam habit
+    if isinstance(instance, HabitCheckin) and instance.habit_id in _deleting_habits:
+        return
+
+    message = {
+        "type": LIVE_MODELS[sender],
+        "id": instance.pk,
+        "action": "deleted" if created is None else "saved",
+    }
+    if isinstance(instance, HabitCheckin):
+        message["habit"] = instance.habit_id
+    pubsub.notify(_live_owner_id(instance), sender, message)
+
+
+for _model in LIVE_MODELS:
+    post_save.connect(publish_change, sender=_model, dispatch_uid=f"live-save-{_model.__name__}")
+    post_delete.connect(publish_change, sender=_model, dispatch_uid=f"live-delete-{_model.__name__}")
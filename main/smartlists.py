@@ -0,0 +1,112 @@
+"""
+Pametne liste: spremljeni filteri taskova (SmartList.definition).
+
+definition je dict, svi ključevi opcionalni:
+    {"priority": [3], "status": ["todo"], "category": [5],
+     "due": "this_week", "estimate_min": 60, "estimate_max": 120}
+
+Brojevi za sve liste korisnika računaju se jednim upitom (COUNT s
+FILTER po listi) i spremaju u cache pod verzijom korisnika. Signali
+(main/signals.py) i bulk operacije podižu verziju, pa se brojevi
+ponovno računaju tek kad se taskovi promijene (ili promijeni dan, zbog
+relativnih rokova).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import cache_versions
+from .models import SmartList, Task
+
+DUE_CHOICES = [
+    ("", "Any"),
+    ("overdue", "Overdue"),
+    ("today", "Today"),
+    ("this_week", "This week"),
+    ("next_7_days", "Next 7 days"),
+    ("none", "No due date"),
+]
+
+DEFAULT_COUNTS_TIMEOUT = 24 * 60 * 60
+
+
+def get_cache():
+    return caches[getattr(settings, "SMART_LIST_CACHE", "default")]
+
+
+def _ints(values):
+    return [int(v) for v in values or [] if str(v).lstrip("-").isdigit()]
+
+
+def due_q(due, today):
+    if due == "overdue":
+        return Q(due_date__lt=today)
+    if due == "today":
+        return Q(due_date=today)
+    if due == "this_week":
+        # tjedan završava u nedjelju (kao u next_up)
+        return Q(due_date__gte=today, due_date__lte=today + timedelta(days=6 - today.weekday()))
+    if due == "next_7_days":
+        return Q(due_date__gte=today, due_date__lt=today + timedelta(days=7))
+    if due == "none":
+        return Q(due_date__isnull=True)
+    return Q()
+
+
+def compile_definition(definition, today=None):
+    """Q za taskove liste; nepoznati ključevi i neispravne vrijednosti se preskaču."""
+    today = today or timezone.localdate()
+    q = Q()
+    if priorities := _ints(definition.get("priority")):
+        q &= Q(priority__in=priorities)
+    if statuses := [s for s in definition.get("status") or [] if s in Task.Status.values]:
+        q &= Q(status__in=statuses)
+    if categories := _ints(definition.get("category")):
+        q &= Q(category_id__in=categories)
+    q &= due_q(definition.get("due"), today)
+    if (minimum := definition.get("estimate_min")) is not None:
+        q &= Q(estimated_time__gte=int(minimum))
+    if (maximum := definition.get("estimate_max")) is not None:
+        q &= Q(estimated_time__lte=int(maximum))
+    return q
+
+
+def smart_list_tasks(smart_list, today=None):
+    return Task.objects.filter(compile_definition(smart_list.definition, today), owner_id=smart_list.owner_id)
+
+
+def current_version(user_id):
+    return cache_versions.current_version(get_cache(), "smartlists", user_id)
+
+
+def invalidate(user_id):
+    """Nova verzija - stari brojevi u cacheu više se ne čitaju (i sami isteknu)."""
+    cache_versions.invalidate(get_cache(), "smartlists", user_id)
+
+
+def list_counts(user, today=None):
+    """
+    {smart_list_id: broj taskova} za sve liste korisnika: iz cachea,
+    inače jedan upit za liste + jedan upit za sve brojeve.
+    """
+    today = today or timezone.localdate()
+    cache = get_cache()
+    version = current_version(user.pk)
+    key = f"smartlists:counts:{user.pk}:{version}:{today.isoformat()}"
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    smart_lists = list(SmartList.objects.filter(owner=user).only("pk", "definition"))
+    counts = {}
+    if smart_lists:
+        row = Task.objects.filter(owner=user).aggregate(**{
+            f"list_{sl.pk}": Count("pk", filter=compile_definition(sl.definition, today)) for sl in smart_lists
+        })
+        counts = {sl.pk: row[f"list_{sl.pk}"] for sl in smart_lists}
+    cache.set(key, counts, DEFAULT_COUNTS_TIMEOUT)
+    return counts
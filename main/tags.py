@@ -0,0 +1,110 @@
+"""
+Oznake (Tag) za taskove i evente, preko veza TaskTag / EventTag.
+
+Veze imaju jedinstveni indeks (tag, task) / (tag, event), pa se upit
+"sve od X, Y i nijedna od Z" rješava jednim prolazom po indeksu: veze
+traženih oznaka grupiraju se po objektu i ostaju objekti kojima je broj
+pogodaka jednak broju oznaka (GROUP BY / HAVING), umjesto po jednog
+JOIN-a za svaku oznaku. Isključivanje je jedan NOT IN po istom indeksu.
+
+Broj taskova i eventova po oznaci sprema se u cache pod verzijom
+korisnika (main/cache_versions.py); signali podižu verziju kad se veze
+promijene (task.tags.set/add/remove/clear) ili se objekt obriše.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from . import cache_versions
+from .models import Event, EventTag, Tag, Task, TaskTag
+
+LINKS = {Task: (TaskTag, "task"), Event: (EventTag, "event")}
+
+DEFAULT_COUNTS_TIMEOUT = 24 * 60 * 60
+
+
+def get_cache():
+    return caches[getattr(settings, "TAG_CACHE", "default")]
+
+
+def parse_names(text):
+    """Imena iz "posao, hitno ,posao" -> ["posao", "hitno"] (bez praznih i duplikata)."""
+    names = (" ".join(name.split()) for name in (text or "").split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def resolve(user, names):
+    """{ime: tag_id} za postojeće oznake korisnika (user ili njegov id; jedan upit)."""
+    if not names:
+        return {}
+    return dict(Tag.objects.filter(owner=user, name__in=names).values_list("name", "pk"))
+
+
+def set_tags(obj, names):
+    """Postavlja oznake taska/eventa po imenima; nove oznake se stvaraju."""
+    existing = resolve(obj.owner_id, names)
+    missing = [Tag(owner_id=obj.owner_id, name=name) for name in names if name not in existing]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = resolve(obj.owner_id, names)
+    obj.tags.set(existing.values())
+
+
+def tagged(queryset, all_of=(), none_of=()):
+    """
+    Sužava queryset taskova ili eventova na objekte sa svim oznakama
+    `all_of` i bez ijedne iz `none_of` (id-evi oznaka).
+    """
+    link, field = LINKS[queryset.model]
+    all_of, none_of = set(all_of), set(none_of)
+    if all_of:
+        # unique (tag, objekt): COUNT po objektu = broj pogođenih oznaka
+        matching = (
+            link.objects.filter(tag_id__in=all_of)
+            .values(field)
+            .annotate(n=Count("tag_id"))
+            .filter(n=len(all_of))
+            .values(field)
+        )
+        queryset = queryset.filter(pk__in=matching)
+    if none_of:
+        queryset = queryset.exclude(pk__in=link.objects.filter(tag_id__in=none_of).values(field))
+    return queryset
+
+
+def tagged_by_name(queryset, user, all_of=(), none_of=()):
+    """Kao tagged(), ali s imenima; nepostojeća oznaka u `all_of` znači prazan rezultat."""
+    ids = resolve(user, [*all_of, *none_of])
+    if any(name not in ids for name in all_of):
+        return queryset.none()
+    return tagged(queryset, [ids[n] for n in all_of], [ids[n] for n in none_of if n in ids])
+
+
+def current_version(user_id):
+    return cache_versions.current_version(get_cache(), "tags", user_id)
+
+
+def invalidate(user_id):
+    cache_versions.invalidate(get_cache(), "tags", user_id)
+
+
+def tag_counts(user):
+    """
+    {tag_id: {"tasks": n, "events": n}} za oznake korisnika koje nešto
+    označavaju: iz cachea, inače po jedan grupirani upit za taskove i evente.
+    """
+    cache = get_cache()
+    key = f"tags:counts:{user.pk}:{current_version(user.pk)}"
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    counts = {}
+    for model, (link, _) in LINKS.items():
+        label = f"{model._meta.model_name}s"
+        rows = link.objects.filter(tag__owner=user).order_by().values("tag_id").annotate(n=Count("pk"))
+        for row in rows:
+            counts.setdefault(row["tag_id"], {"tasks": 0, "events": 0})[label] = row["n"]
+    cache.set(key, counts, DEFAULT_COUNTS_TIMEOUT)
+    return counts
@@ -0,0 +1,156 @@
+"""
+Ovisnosti taskova (TaskDependency) kao graf u memoriji.
+
+load_graph učitava sve taskove korisnika zajedno s ovisnostima jednim
+upitom (Task LEFT JOIN TaskDependency); redoslijed, ciklusi i kritični
+put su O(V + E) nad dictovima, pa i graf s desecima tisuća taskova traje
+milisekunde.
+"""
+
+from collections import deque
+
+from django.db.models import Exists, OuterRef
+
+from .models import Task, TaskDependency
+from .next_up import open_tasks
+
+DONE = Task.Status.DONE.value
+
+
+class TaskGraph:
+    def __init__(self):
+        self.open = set()  # pk nedovršenih taskova
+        self.minutes = {}  # pk -> estimated_time (0 ako nije upisano)
+        self.depends_on = {}  # pk -> [pk, ...] koji moraju biti gotovi prije
+        self.dependents = {}  # obrnuti bridovi: pk -> [pk, ...] koji čekaju na njega
+
+    def add_task(self, pk, status, minutes=None):
+        if status != DONE:
+            self.open.add(pk)
+        self.minutes[pk] = minutes or 0
+        self.depends_on.setdefault(pk, [])
+        self.dependents.setdefault(pk, [])
+
+    def add_edge(self, task, depends_on):
+        self.depends_on.setdefault(task, []).append(depends_on)
+        self.dependents.setdefault(depends_on, []).append(task)
+        self.depends_on.setdefault(depends_on, [])
+        self.dependents.setdefault(task, [])
+
+    def ready(self):
+        """Otvoreni taskovi kojima su sve ovisnosti gotove."""
+        open_tasks = self.open
+        return [pk for pk, deps in self.depends_on.items() if pk in open_tasks and open_tasks.isdisjoint(deps)]
+
+    def topological_order(self):
+        """
+        Kahnov algoritam: (redoslijed, blokirani). Svaki task dolazi nakon
+        svojih ovisnosti; taskovi u ciklusu (ili iza njega) ne mogu se
+        poredati i vraćaju se u `blokirani`.
+        """
+        indegree = {pk: len(deps) for pk, deps in self.depends_on.items()}
+        queue = deque(pk for pk, n in indegree.items() if n == 0)
+        order = []
+        while queue:
+            pk = queue.popleft()
+            order.append(pk)
+            for dependent in self.dependents[pk]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+        return order, [pk for pk, n in indegree.items() if n > 0]
+
+    def find_cycle(self):
+        """Jedan ciklus kao [a, b, ..., a] ili None (iterativni DFS, bez limita rekurzije)."""
+        visiting, done = set(), set()
+        for root in self.depends_on:
+            if root in done:
+                continue
+            path = [root]
+            stack = [iter(self.depends_on[root])]
+            visiting.add(root)
+            while stack:
+                for nxt in stack[-1]:
+                    if nxt in visiting:
+                        return path[path.index(nxt):] + [nxt]
+                    if nxt not in done:
+                        visiting.add(nxt)
+                        path.append(nxt)
+                        stack.append(iter(self.depends_on[nxt]))
+                        break
+                else:
+                    node = path.pop()
+                    visiting.discard(node)
+                    done.add(node)
+                    stack.pop()
+        return None
+
+    def depends_transitively(self, task, other):
+        """Ovisi li `task` (izravno ili preko drugih) o `other`."""
+        seen, stack = {task}, [task]
+        while stack:
+            for nxt in self.depends_on.get(stack.pop(), ()):
+                if nxt == other:
+                    return True
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    def would_create_cycle(self, task, depends_on):
+        return task == depends_on or self.depends_transitively(depends_on, task)
+
+    def critical_path(self):
+        """
+        (minute, [pk, ...]): najdulji lanac otvorenih taskova po
+        estimated_time - najkraće moguće trajanje preostalog posla.
+        Gotovi taskovi ne ulaze u lanac, taskovi bez procjene broje se
+        kao 0, a taskovi u ciklusu se preskaču.
+        """
+        order, _ = self.topological_order()
+        total, previous = {}, {}
+        for pk in order:
+            if pk not in self.open:
+                continue
+            longest, via = 0, None
+            for dep in self.depends_on[pk]:
+                minutes = total.get(dep)
+                if minutes is not None and (via is None or minutes > longest):
+                    longest, via = minutes, dep
+            total[pk] = longest + self.minutes[pk]
+            previous[pk] = via
+        if not total:
+            return 0, []
+
+        end = max(total, key=total.get)
+        path = []
+        node = end
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return total[end], path[::-1]
+
+
+def load_graph(user):
+    graph = TaskGraph()
+    rows = (
+        Task.objects.filter(owner=user)
+        .order_by()
+        .values_list("pk", "status", "estimated_time", "dependencies__depends_on_id")
+    )
+    for pk, status, minutes, depends_on in rows:
+        if pk not in graph.minutes:
+            graph.add_task(pk, status, minutes)
+        if depends_on is not None:
+            graph.add_edge(pk, depends_on)
+    return graph
+
+
+def ready_tasks(user):
+    """
+    Otvoreni taskovi bez nedovršenih ovisnosti, u redoslijedu "next up".
+    Isto što i TaskGraph.ready(), ali kao upit - za popis s objektima
+    nije potreban cijeli graf.
+    """
+    blocked = TaskDependency.objects.filter(task=OuterRef("pk")).exclude(depends_on__status=DONE)
+    return open_tasks(user).exclude(Exists(blocked))
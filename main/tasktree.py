@@ -0,0 +1,105 @@
+"""
+Podtaskovi kao stablo s materijaliziranom putanjom (Task.parent, Task.path).
+
+Task.path su id-evi nadređenih od korijena ("12/34/"), pa su svi potomci
+taska 34 redovi čija putanja počinje s "12/34/". Taj prefiks se traži kao
+raspon (path >= "12/34/" i path < "12/340") po indeksu (owner, path), pa su
+podstablo, broj potomaka i zbrojevi po jedan upit bez obzira na dubinu.
+Premještanje podstabla mijenja prefiks svim potomcima jednim UPDATE-om.
+"""
+
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Concat, Substr
+
+from .models import Task
+from .shards import atomic_for
+
+
+def descendants_prefix(task):
+    """Prefiks putanje svih potomaka taska."""
+    return f"{task.path}{task.pk}/"
+
+
+def prefix_range(prefix):
+    # "/" je znak odmah ispred "0", pa je "12/340" prvi niz iza svih "12/34/..."
+    return Q(path__gte=prefix, path__lt=prefix[:-1] + "0")
+
+
+def descendants(task):
+    return Task.objects.filter(prefix_range(descendants_prefix(task)), owner_id=task.owner_id)
+
+
+def ancestor_ids(task):
+    return [int(pk) for pk in task.path.split("/") if pk]
+
+
+def ancestors(task):
+    """Nadređeni od korijena prema tasku (jedan upit)."""
+    by_pk = Task.objects.filter(owner_id=task.owner_id).in_bulk(ancestor_ids(task))
+    return [by_pk[pk] for pk in ancestor_ids(task) if pk in by_pk]
+
+
+def is_descendant(task, other):
+    """Je li `task` u podstablu taska `other`."""
+    return task.path.startswith(descendants_prefix(other))
+
+
+def subtree(task):
+    """
+    [(task, dubina), ...] za cijelo podstablo u redoslijedu prikaza
+    (dubina relativno na `task`); jedan upit, stablo se slaže u memoriji.
+    """
+    children = {}
+    for node in descendants(task).order_by("created_at", "pk"):
+        children.setdefault(node.parent_id, []).append(node)
+
+    rows = []
+    stack = [(task, 0)]
+    while stack:
+        node, depth = stack.pop()
+        rows.append((node, depth))
+        stack.extend((child, depth + 1) for child in reversed(children.get(node.pk, [])))
+    return rows
+
+
+def subtree_stats(task):
+    """
+    Zbroj za task i sve potomke: broj potomaka, ukupni estimated_time
+    i postotak gotovih. Potomci jednim upitom, sam task iz memorije.
+    """
+    row = descendants(task).aggregate(
+        count=Count("pk"),
+        done=Count("pk", filter=Q(status=Task.Status.DONE)),
+        minutes=Sum("estimated_time"),
+    )
+    total = row["count"] + 1
+    done = row["done"] + (task.status == Task.Status.DONE)
+    return {
+        "descendants": row["count"],
+        "estimated_time": (row["minutes"] or 0) + (task.estimated_time or 0),
+        "done": done,
+        "done_percent": round(done * 100 / total),
+    }
+
+
+def move_subtree(task, parent):
+    """
+    Premješta task s cijelim podstablom pod `parent` (None = korijen).
+    Dva UPDATE-a neovisno o veličini podstabla.
+    """
+    if parent is not None and (parent.pk == task.pk or is_descendant(parent, task)):
+        raise ValueError("A task cannot be moved under itself or its subtasks.")
+
+    new_path = descendants_prefix(parent) if parent is not None else ""
+    with atomic_for(Task):
+        # putanja iz baze - objekt u memoriji može biti zastario
+        old_path = Task.objects.filter(pk=task.pk).values_list("path", flat=True).get()
+        old_prefix = f"{old_path}{task.pk}/"
+        new_prefix = f"{new_path}{task.pk}/"
+        if old_prefix != new_prefix:
+            Task.objects.filter(prefix_range(old_prefix), owner_id=task.owner_id).update(
+                path=Concat(Value(new_prefix), Substr("path", len(old_prefix) + 1))
+            )
+        Task.objects.filter(pk=task.pk).update(parent=parent, path=new_path)
+    task.parent = parent
+    task.path = new_path
@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from django import template
+from django.urls import reverse
+
+register = template.Library()
+
+# vrijednost koja se ne može pojaviti drugdje u URL-u
+_PK_PLACEHOLDER = 987654321
+
+
+@lru_cache(maxsize=None)
+def url_template(name):
+    """
+    reverse() jednom po procesu: "main:task_detail" -> "/tasks/{pk}/".
+    """
+    return reverse(name, args=[_PK_PLACEHOLDER]).replace(str(_PK_PLACEHOLDER), "{pk}")
+
+
+@register.filter
+def pk_url(pk, name):
+    """
+    {{ task.pk|pk_url:"main:task_detail" }} - isto kao {% url name pk %},
+    ali bez resolvera za svaku stavku u petlji.
+    """
+    return url_template(name).replace("{pk}", str(pk))
@@ -1,11 +1,78 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from .models import Category, Event, Habit, HabitCheckin
+from planner import metrics
+from planner.middleware import ReplicaMiddleware
+from planner.routers import ReplicaRouter
+
+from . import checkin_buffer, pubsub, smartlists, tags, user_cache
+from .admin import EstimatedCountPaginator, estimated_count
+from .category_jobs import run_job
+from .checkin_archive import compact_month, month_start, rehydrate
+from .cold_archive import archive_cold_data
+from .counters import get_counters, suspend_counters
+from .management.commands.bench_startup import parse_importtime
+from .purge import (
+    delete_in_batches,
+    needs_background_purge,
+    run_purge_job,
+    start_habit_purge,
+    start_user_purge,
+    uncount_checkins,
+)
+from .labels import month_labels, time_labels, weekday_labels
+from .models import (
+    ArchivedEvent,
+    ArchivedTask,
+    Category,
+    CategoryJob,
+    Counter,
+    Event,
+    EventOccurrenceOverride,
+    EventRecurrence,
+    Habit,
+    HabitCheckin,
+    HabitCheckinArchive,
+    PurgeJob,
+    SmartList,
+    Tag,
+    Task,
+    TaskDependency,
+    TaskTag,
+    UserShard,
+)
+from .recurrence import events_in_window
+from .smartlists import list_counts, smart_list_tasks
+from .taskgraph import load_graph, ready_tasks
+from .tasktree import move_subtree, subtree, subtree_stats
+from .conflicts import find_conflicts
+from .ratelimit import get_cache, take
+from .rebalance import plan_rebalance
+from .scheduler import free_intervals, pack_tasks, plan
+from .shards import owned_models, owner_path
+from .templatetags.planner_extras import pk_url
 
 User = get_user_model()
 
@@ -92,3 +159,1266 @@ class PlannerTests(TestCase):
             response,
             "A check-in for this habit at the same minute already exists",
         )
+
+
+class CategoryDeleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.inbox = Category.objects.get(owner=self.user, is_inbox=True)
+        self.work = Category.objects.create(owner=self.user, name="Work")
+        for i in range(5):
+            Task.objects.create(owner=self.user, category=self.work, title=f"T{i}")
+        self.client.login(username="u1", password="pass12345")
+
+    def test_small_category_is_moved_immediately(self):
+        url = reverse("main:category_delete", args=[self.work.pk])
+        response = self.client.post(url, data={"action": "inbox"})
+
+        self.assertRedirects(response, reverse("main:category_list"))
+        self.assertFalse(Category.objects.filter(pk=self.work.pk).exists())
+        self.assertEqual(Task.objects.filter(category=self.inbox).count(), 5)
+
+    @override_settings(CATEGORY_JOB_SYNC_LIMIT=2, CATEGORY_JOB_CHUNK_SIZE=2)
+    def test_large_category_runs_as_chunked_job(self):
+        url = reverse("main:category_delete", args=[self.work.pk])
+        response = self.client.post(url, data={"action": "delete_all"})
+
+        job = CategoryJob.objects.get(owner=self.user)
+        self.assertRedirects(response, reverse("main:category_job_detail", args=[job.pk]))
+        # ništa se ne dira dok worker ne preuzme posao
+        self.assertEqual(Task.objects.filter(category=self.work).count(), 5)
+
+        self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.state, CategoryJob.State.DONE)
+        self.assertEqual(job.processed, 5)
+        self.assertFalse(Category.objects.filter(pk=self.work.pk).exists())
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 0)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.inbox = Category.objects.get(owner=self.user, is_inbox=True)
+        self.work = Category.objects.create(owner=self.user, name="Work")
+
+    def test_task_counters_follow_status_and_category(self):
+        task = Task.objects.create(owner=self.user, category=self.work, title="T")
+        Task.objects.create(owner=self.user, category=self.work, title="T2", status=Task.Status.DONE)
+
+        self.assertEqual(get_counters(self.user).tasks_open, 1)
+        self.assertEqual(get_counters(self.user).tasks_done, 1)
+
+        task.status = Task.Status.DONE
+        task.category = self.inbox
+        task.save()
+
+        self.assertEqual(get_counters(self.user).tasks_done, 2)
+        self.assertEqual(get_counters(self.user, self.work).tasks_done, 1)
+        self.assertEqual(get_counters(self.user, self.inbox).tasks_done, 1)
+
+        task.delete()
+        self.assertEqual(get_counters(self.user).tasks_done, 1)
+
+    def test_habit_delete_removes_its_checkins_from_counter(self):
+        habit = Habit.objects.create(owner=self.user, name="Run")
+        now = timezone.now()
+        for i in range(3):
+            HabitCheckin.objects.create(habit=habit, performed_at=now - timedelta(hours=i))
+        self.assertEqual(get_counters(self.user).checkins, 3)
+
+        habit.delete()
+        counters = get_counters(self.user)
+        self.assertEqual((counters.habits, counters.checkins), (0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        Task.objects.create(owner=self.user, category=self.work, title="T")
+        Counter.objects.filter(owner=self.user).update(tasks_open=42)
+
+        call_command("reconcile_counters", fix=True, stdout=StringIO())
+
+        self.assertEqual(get_counters(self.user).tasks_open, 1)
+        self.assertEqual(get_counters(self.user, self.work).tasks_open, 1)
+
+
+class NextUpTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+
+    def test_next_up_partitions_and_order(self):
+        today = timezone.localdate()
+        Task.objects.create(owner=self.user, title="Done", due_date=today, status=Task.Status.DONE)
+        Task.objects.create(owner=self.user, title="Late", due_date=today - timedelta(days=2))
+        Task.objects.create(owner=self.user, title="Today low", due_date=today, priority=Task.Priority.LOW)
+        Task.objects.create(owner=self.user, title="Today high", due_date=today, priority=Task.Priority.HIGH)
+        Task.objects.create(owner=self.user, title="Someday")
+
+        response = self.client.get(reverse("main:task_next_up"), {"format": "json"})
+        data = response.json()
+
+        self.assertEqual([t["title"] for t in data["overdue"]], ["Late"])
+        self.assertEqual([t["title"] for t in data["today"]], ["Today high", "Today low"])
+        self.assertEqual([t["title"] for t in data["no_due_date"]], ["Someday"])
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.day = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def at(self, hour, minute=0):
+        return self.day.replace(hour=hour, minute=minute)
+
+    def test_free_intervals_merges_overlapping_events(self):
+        busy = [(self.at(9), self.at(10)), (self.at(9, 30), self.at(11)), (self.at(14), self.at(15))]
+        free = free_intervals(busy, [(self.at(8), self.at(16))])
+
+        self.assertEqual(free, [
+            (self.at(8), self.at(9)),
+            (self.at(11), self.at(14)),
+            (self.at(15), self.at(16)),
+        ])
+
+    def test_pack_tasks_first_fit_in_order(self):
+        free = [(self.at(8), self.at(8, 30)), (self.at(10), self.at(12))]
+        tasks = [
+            {"pk": 1, "title": "Long", "due_date": None, "estimated_time": 90},
+            {"pk": 2, "title": "Short", "due_date": None, "estimated_time": 20},
+            {"pk": 3, "title": "Too long", "due_date": None, "estimated_time": 300},
+        ]
+
+        placed, unscheduled = pack_tasks(tasks, free)
+
+        self.assertEqual([(t["pk"], t["start"]) for t in placed], [(1, self.at(10)), (2, self.at(8))])
+        self.assertEqual([t["pk"] for t in unscheduled], [3])
+
+    def test_plan_view_rejects_impossible_date(self):
+        User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.assertEqual(self.client.get(reverse("main:plan"), {"date": "2026-02-30"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("main:plan"), {"date": "2026-02-28"}).status_code, 200)
+        response = self.client.get(reverse("main:plan"), {"date": "9999-12-31", "days": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["days"], 1)
+
+    def test_plan_starts_today_at_current_time(self):
+        user = User.objects.create_user(username="u1", password="pass12345")
+        Task.objects.create(owner=user, title="Write report", estimated_time=30)
+        today = timezone.localdate()
+        noon = timezone.make_aware(timezone.datetime(today.year, today.month, today.day, 12))
+
+        result = plan(user, today, now=noon)
+        self.assertEqual([item["start"] for item in result["timeline"]], [noon])
+
+        # radno vrijeme je prošlo - za danas nema mjesta
+        result = plan(user, today, now=noon + timedelta(hours=9))
+        self.assertEqual((result["timeline"], len(result["unscheduled"])), ([], 1))
+
+
+class EventConflictTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.inbox = Category.objects.get(owner=self.user, is_inbox=True)
+        self.start = (timezone.now() + timedelta(days=1)).replace(second=0, microsecond=0)
+        Event.objects.create(
+            owner=self.user,
+            title="Meeting",
+            start_datetime=self.start,
+            end_datetime=self.start + timedelta(hours=1),
+        )
+        self.client.login(username="u1", password="pass12345")
+
+    def post_event(self, **extra):
+        start = self.start + timedelta(minutes=30)
+        data = {
+            "category": self.inbox.pk,
+            "title": "Lunch",
+            "description": "",
+            "location": "",
+            "start_datetime": timezone.localtime(start).strftime("%Y-%m-%dT%H:%M"),
+            "end_datetime": timezone.localtime(start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M"),
+        }
+        data.update(extra)
+        return self.client.post(reverse("main:event_add"), data=data)
+
+    def test_overlap_is_rejected_unless_allowed(self):
+        response = self.post_event()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "This event overlaps with: Meeting")
+
+        response = self.post_event(allow_overlap="on")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Event.objects.filter(owner=self.user).count(), 2)
+
+    def test_find_conflicts_sweep(self):
+        t = self.start
+        items = [
+            {"id": 1, "start": t, "end": t + timedelta(hours=2)},
+            {"id": 2, "start": t + timedelta(hours=1), "end": t + timedelta(hours=3)},
+            {"id": 3, "start": t + timedelta(hours=3), "end": t + timedelta(hours=4)},
+            {"id": 4, "start": t + timedelta(minutes=30), "end": None},
+        ]
+        pairs = {(a["id"], b["id"]) for a, b in find_conflicts(items)}
+        self.assertEqual(pairs, {(1, 4), (1, 2)})
+
+    def test_conflicts_view_rejects_impossible_dates(self):
+        url = reverse("main:event_conflicts")
+        for params in ({"start": "2026-02-30"}, {"end": "2026-02-30"}, {"start": "9999-12-31"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+        self.assertEqual(self.client.get(url, {"start": "2026-02-28"}).status_code, 200)
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        # ponedjeljak 09:00
+        self.start = timezone.make_aware(timezone.datetime(2026, 1, 5, 9, 0))
+        self.event = Event.objects.create(
+            owner=self.user,
+            title="Standup",
+            start_datetime=self.start,
+            end_datetime=self.start + timedelta(minutes=15),
+        )
+        self.rule = EventRecurrence.objects.create(
+            event=self.event,
+            frequency=EventRecurrence.Frequency.WEEKLY,
+            weekdays="mon,wed",
+            exdates="2026-01-07",
+        )
+
+    def window(self, days_from, days):
+        start = self.start + timedelta(days=days_from)
+        return list(events_in_window(self.user, start, start + timedelta(days=days)))
+
+    def test_weekly_expansion_skips_exdates(self):
+        starts = [occ.start.date().isoformat() for occ in self.window(0, 14)]
+        self.assertEqual(starts, ["2026-01-05", "2026-01-12", "2026-01-14"])
+
+    def test_expansion_far_in_future_only_covers_window(self):
+        occurrences = self.window(700, 7)
+        self.assertEqual(len(occurrences), 2)
+        self.assertTrue(all(occ.start >= self.start + timedelta(days=700) for occ in occurrences))
+
+    def test_override_moves_and_cancels_single_occurrence(self):
+        second = self.start + timedelta(days=7)
+        EventOccurrenceOverride.objects.create(
+            recurrence=self.rule,
+            original_start=second,
+            title="Late standup",
+            start_datetime=second + timedelta(hours=3),
+        )
+        EventOccurrenceOverride.objects.create(
+            recurrence=self.rule, original_start=second + timedelta(days=2), cancelled=True
+        )
+
+        occurrences = self.window(7, 7)
+        self.assertEqual([(o.title, o.start.hour) for o in occurrences], [("Late standup", 12)])
+
+    def test_count_limits_series(self):
+        self.rule.count = 3
+        self.rule.exdates = ""
+        self.rule.save()
+        self.assertEqual(len(self.window(0, 60)), 3)
+
+    def test_agenda_rejects_impossible_dates(self):
+        self.client.login(username="u1", password="pass12345")
+        url = reverse("main:event_agenda")
+        self.assertEqual(self.client.get(url, {"start": "2026-02-30"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "9999-12-31"}).status_code, 400)
+        # prozor se skraćuje do date.max, serija staje na kraju kalendara
+        self.rule.frequency = EventRecurrence.Frequency.MONTHLY
+        self.rule.save()
+        self.assertEqual(self.client.get(url, {"start": "9999-12-30", "format": "json"}).status_code, 200)
+        self.assertEqual(self.client.get(url, {"start": "2026-01-05"}).status_code, 200)
+
+
+class HabitStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.habit = Habit.objects.create(owner=self.user, name="Water", frequency="hourly")
+        self.other = Habit.objects.create(owner=self.user, name="Walk")
+        self.day = timezone.make_aware(timezone.datetime(2026, 3, 2, 0, 0))
+        for h in (8, 9, 9.5, 20):
+            HabitCheckin.objects.create(habit=self.habit, performed_at=self.day + timedelta(hours=h))
+        HabitCheckin.objects.create(habit=self.other, performed_at=self.day + timedelta(days=1, hours=7))
+        self.client.login(username="u1", password="pass12345")
+
+    def test_hourly_series_is_dense_array(self):
+        url = reverse("main:habit_stats", args=[self.habit.pk])
+        data = self.client.get(url, {"bucket": "hour", "start": "2026-03-02", "end": "2026-03-02"}).json()
+
+        self.assertEqual(data["step_seconds"], 3600)
+        self.assertEqual(len(data["counts"]), 24)
+        self.assertEqual((data["counts"][8], data["counts"][9], data["counts"][20]), (1, 2, 1))
+
+    def test_user_rollup_sums_habits(self):
+        url = reverse("main:habit_stats_all")
+        data = self.client.get(url, {"bucket": "day", "start": "2026-03-01", "end": "2026-03-04"}).json()
+
+        self.assertEqual(data["counts"][:4], [0, 4, 1, 0])
+        self.assertEqual(data["habits"][str(self.other.pk)][2], 1)
+
+    def test_heatmap_weekday_by_hour(self):
+        url = reverse("main:habit_stats", args=[self.habit.pk])
+        data = self.client.get(url, {"bucket": "heatmap", "start": "2026-03-01", "end": "2026-03-04"}).json()
+        # 2.3.2026. je ponedjeljak
+        self.assertEqual(data["counts"][0][9], 2)
+
+    def test_impossible_dates_return_400(self):
+        url = reverse("main:habit_stats", args=[self.habit.pk])
+        self.assertEqual(self.client.get(url, {"start": "2026-02-30"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"end": "2026-13-01"}).status_code, 400)
+        # end + 1 dan izlazi iz kalendara
+        self.assertEqual(self.client.get(url, {"start": "9999-12-30", "end": "9999-12-31"}).status_code, 400)
+        url = reverse("main:habit_stats_all")
+        self.assertEqual(self.client.get(url, {"start": "2026-02-30"}).status_code, 400)
+
+
+class CheckinArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.habit = Habit.objects.create(owner=self.user, name="Water", frequency="hourly")
+        self.start = timezone.make_aware(timezone.datetime(2025, 1, 1, 0, 0))
+        for h in range(0, 24 * 31, 1):
+            HabitCheckin.objects.create(
+                habit=self.habit, performed_at=self.start + timedelta(hours=h), done=h % 5 != 0
+            )
+        self.client.login(username="u1", password="pass12345")
+
+    def test_compact_and_rehydrate_round_trip(self):
+        original = list(HabitCheckin.objects.filter(habit=self.habit).order_by("performed_at").values_list("performed_at", "done"))
+
+        self.assertEqual(compact_month(self.habit.pk, month_start(self.start)), 744)
+        self.assertFalse(HabitCheckin.objects.filter(habit=self.habit).exists())
+
+        archive = HabitCheckinArchive.objects.get(habit=self.habit)
+        self.assertEqual(archive.count, 744)
+        # 1 bajt po check-inu + bitmapa
+        self.assertLess(len(archive.offsets) + len(archive.done_bits), 1000)
+        self.assertEqual(get_counters(self.user).checkins, 744)
+
+        rehydrate(archive)
+        restored = list(HabitCheckin.objects.filter(habit=self.habit).order_by("performed_at").values_list("performed_at", "done"))
+        self.assertEqual(restored, original)
+        self.assertFalse(HabitCheckinArchive.objects.exists())
+
+    def test_list_stats_and_duplicates_read_archive(self):
+        compact_month(self.habit.pk, month_start(self.start))
+
+        response = self.client.get(reverse("main:habit_checkin_list", args=[self.habit.pk]))
+        self.assertEqual(len(response.context["checkins"]), 744)
+
+        url = reverse("main:habit_stats", args=[self.habit.pk])
+        data = self.client.get(url, {"bucket": "day", "start": "2025-01-01", "end": "2025-01-31"}).json()
+        self.assertEqual(sum(data["counts"]), 744 - 149)
+
+        response = self.client.post(
+            reverse("main:habit_checkin_add", args=[self.habit.pk]),
+            data={"performed_at": "2025-01-02T03:00", "done": True},
+        )
+        self.assertContains(response, "A check-in for this habit at the same minute already exists")
+
+
+class ColdArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.work = Category.objects.create(owner=self.user, name="Work")
+        old = timezone.now() - timedelta(days=400)
+        self.old_done = Task.objects.create(
+            owner=self.user, category=self.work, title="Old report", status=Task.Status.DONE, created_at=old
+        )
+        Task.objects.create(owner=self.user, title="Old but open", created_at=old)
+        Event.objects.create(owner=self.user, title="Old party", start_datetime=old, end_datetime=old + timedelta(hours=2))
+        Event.objects.create(owner=self.user, title="Tomorrow", start_datetime=timezone.now() + timedelta(days=1))
+        self.client.login(username="u1", password="pass12345")
+
+    def test_archive_search_and_restore(self):
+        result = archive_cold_data(days=365, size=1)
+
+        self.assertEqual(result, {"tasks": 1, "events": 1})
+        self.assertFalse(Task.objects.filter(pk=self.old_done.pk).exists())
+        self.assertEqual(get_counters(self.user, self.work).tasks_done, 0)
+
+        response = self.client.get(reverse("main:archive"), {"q": "report"})
+        self.assertEqual([t.title for t in response.context["tasks"]], ["Old report"])
+        self.assertEqual(list(response.context["events"]), [])
+
+        archived = ArchivedTask.objects.get(owner=self.user)
+        self.client.post(reverse("main:archive_restore", args=["task", archived.pk]))
+
+        restored = Task.objects.get(pk=self.old_done.pk)
+        self.assertEqual(restored.category, self.work)
+        self.assertEqual(get_counters(self.user, self.work).tasks_done, 1)
+        self.assertFalse(ArchivedTask.objects.exists())
+
+    def test_restore_keeps_parent_and_dependencies(self):
+        old = timezone.now() - timedelta(days=400)
+        parent = Task.objects.create(owner=self.user, title="Launch", status=Task.Status.DONE, created_at=old)
+        child = Task.objects.create(
+            owner=self.user, parent=parent, title="Slides", status=Task.Status.DONE, created_at=old
+        )
+        follow_up = Task.objects.create(owner=self.user, title="Retro")
+        TaskDependency.objects.create(task=follow_up, depends_on=child)
+
+        # podtask se arhivira prije nadređenog
+        self.assertEqual(archive_cold_data(days=365, size=1)["tasks"], 3)
+        self.assertFalse(TaskDependency.objects.exists())
+
+        archived = ArchivedTask.objects.get(original_id=child.pk)
+        self.client.post(reverse("main:archive_restore", args=["task", archived.pk]))
+
+        child = Task.objects.get(pk=child.pk)
+        self.assertEqual(child.parent_id, parent.pk)
+        self.assertEqual(child.path, f"{parent.pk}/")
+        self.assertTrue(TaskDependency.objects.filter(task=follow_up, depends_on=child).exists())
+        self.assertEqual(get_counters(self.user).tasks_done, 2)
+
+    def test_restore_keeps_tags_and_refreshes_counts(self):
+        tags.set_tags(self.old_done, ["work", "q3"])
+        tags.set_tags(Event.objects.get(title="Old party"), ["q3"])
+        archive_cold_data(days=365)
+        q3 = Tag.objects.get(name="q3")
+        self.assertEqual(tags.tag_counts(self.user), {})
+
+        for kind, model in (("task", ArchivedTask), ("event", ArchivedEvent)):
+            self.client.post(reverse("main:archive_restore", args=[kind, model.objects.get().pk]))
+
+        restored = Task.objects.get(pk=self.old_done.pk)
+        self.assertEqual(set(restored.tags.values_list("name", flat=True)), {"work", "q3"})
+        self.assertEqual(tags.tag_counts(self.user)[q3.pk], {"tasks": 1, "events": 1})
+
+
+class TemplateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+
+    def test_pk_url_matches_reverse(self):
+        task = Task.objects.create(owner=self.user, title="Write report")
+        self.assertEqual(pk_url(task.pk, "main:task_detail"), reverse("main:task_detail", args=[task.pk]))
+
+        response = self.client.get(reverse("main:task_list"))
+        self.assertTemplateUsed(response, "main/base.html")
+        self.assertContains(response, f'href="{reverse("main:task_detail", args=[task.pk])}"')
+
+
+class HabitLabelTests(TestCase):
+    def test_labels_and_json(self):
+        self.assertEqual(time_labels("08:00, 20:30,evening,0:15"), "8:00 AM, 8:30 PM, evening, 12:15 AM")
+        self.assertEqual(weekday_labels("mon,fri"), "Mon, Fri")
+        self.assertEqual(month_labels("1,12"), "Jan, Dec")
+        self.assertEqual(time_labels(""), "")
+
+        user = User.objects.create_user(username="u1", password="pass12345")
+        Habit.objects.create(owner=user, name="Water", preferred_times="8:00", preferred_weekdays="sat,sun")
+        self.client.login(username="u1", password="pass12345")
+
+        response = self.client.get(reverse("main:habit_list"), {"format": "json"})
+        habit = response.json()["habits"][0]
+        self.assertEqual(habit["labels"]["preferred_times"], "8:00 AM")
+        self.assertEqual(habit["labels"]["preferred_weekdays"], "Sat, Sun")
+        self.assertContains(self.client.get(reverse("main:habit_list")), "Sat, Sun")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def view(self, write=False):
+        def get_response(request):
+            if write:
+                self.router.db_for_write(Task)
+            self.seen.append(self.router.db_for_read(Task))
+            return HttpResponse()
+        return ReplicaMiddleware(get_response)
+
+    def test_reads_use_replica_only_in_clean_get_requests(self):
+        self.assertEqual(self.router.db_for_read(Task), "default")
+
+        self.view()(self.factory.get("/tasks/"))
+        response = self.view()(self.factory.post("/tasks/add/"))
+        self.assertIn("primary_pin", response.cookies)
+
+        sticky = self.factory.get("/tasks/")
+        sticky.COOKIES["primary_pin"] = "1"
+        self.view()(sticky)
+        # pisanje unutar GET-a prebacuje ostatak requesta na primarnu
+        response = self.view(write=True)(self.factory.get("/tasks/"))
+
+        self.assertEqual(self.seen, ["replica", "default", "default", "default"])
+        self.assertIn("primary_pin", response.cookies)
+        self.assertEqual(self.router.db_for_read(Task), "default")
+        self.assertFalse(self.router.allow_migrate("replica", "main"))
+
+
+# move_user između dva stvarna sharda (SQLite datoteke u privremenom direktoriju)
+MOVE_USER_SCRIPT = """
+import os, sys
+import planner.settings_shards as shard_settings
+for alias, db in shard_settings.DATABASES.items():
+    db["NAME"] = os.path.join(sys.argv[1], f"{alias}.sqlite3")
+import django
+django.setup()
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from main.models import Task
+from main.rebalance import move_user
+from main.shards import owner_context, shard_for_user
+from main.tasktree import descendants, subtree_stats
+
+for alias in shard_settings.DATABASES:
+    call_command("migrate", database=alias, verbosity=0)
+User = get_user_model()
+alice, bob = User.objects.create_user("alice"), User.objects.create_user("bob")
+source, target = shard_for_user(alice.pk), shard_for_user(bob.pk)
+assert source != target
+with owner_context(bob.pk):
+    bob_tasks = [Task.objects.create(owner=bob, title=f"bob {i}") for i in range(2)]
+with owner_context(alice.pk):
+    root = Task.objects.create(owner=alice, title="root")
+    child = Task.objects.create(owner=alice, title="child", parent=root)
+    Task.objects.create(owner=alice, title="grandchild", parent=child)
+# id-evi alicinih taskova su na ciljnom shardu već zauzeti
+assert {t.pk for t in bob_tasks} & {root.pk, child.pk}
+
+move_user(alice.pk, target)
+with owner_context(alice.pk):
+    tasks = {t.title: t for t in Task.objects.filter(owner=alice)}
+    root, child, grandchild = tasks["root"], tasks["child"], tasks["grandchild"]
+    assert root.pk not in {t.pk for t in bob_tasks}
+    assert (child.parent_id, grandchild.parent_id) == (root.pk, child.pk)
+    assert grandchild.path == f"{root.pk}/{child.pk}/", grandchild.path
+    assert sorted(t.title for t in descendants(root)) == ["child", "grandchild"]
+    assert subtree_stats(root)["descendants"] == 2
+print("moved")
+"""
+
+
+class ShardTests(TestCase):
+    def test_move_user_remaps_subtask_ids_on_collision(self):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "planner.settings_shards"}
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, "-c", MOVE_USER_SCRIPT, directory],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+        self.assertEqual(result.returncode, 0, result.stderr[-1000:])
+        self.assertIn("moved", result.stdout)
+
+    def test_owner_paths_and_rebalance_plan(self):
+        self.assertEqual(owner_path(HabitCheckin), "habit__owner")
+        self.assertEqual(owner_path(EventOccurrenceOverride), "recurrence__event__owner")
+        order = owned_models()
+        self.assertLess(order.index(Category), order.index(Task))
+        self.assertLess(order.index(EventRecurrence), order.index(EventOccurrenceOverride))
+
+        for i in range(5):
+            user = User.objects.create_user(username=f"u{i}", password="pass12345")
+            UserShard.objects.create(user=user, alias="shard_a" if i < 4 else "old")
+
+        with override_settings(DATABASE_SHARDS=["shard_a", "shard_b"]):
+            moves = plan_rebalance()
+
+        targets = [target for _, _, target in moves]
+        # "old" više nije shard, pa ide prvi; zatim 4:1 -> 3:2
+        self.assertEqual(targets, ["shard_b", "shard_b"])
+        self.assertEqual(moves[0][1], "old")
+
+
+class SlowCache(LocMemCache):
+    """Cache s kašnjenjem mreže (kao Redis/memcached) između čitanja i upisa."""
+
+    def get(self, *args, **kwargs):
+        value = super().get(*args, **kwargs)
+        time.sleep(0.02)
+        return value
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.habit = Habit.objects.create(owner=self.user, name="Water")
+        self.client.login(username="u1", password="pass12345")
+        self.url = reverse("main:habit_checkin_add", args=[self.habit.pk])
+        get_cache().clear()
+
+    def test_token_bucket_refills(self):
+        self.assertEqual(take("rl:test", 2, 1.0, now=100.0), (True, 0.0))
+        self.assertTrue(take("rl:test", 2, 1.0, now=100.0)[0])
+        allowed, wait = take("rl:test", 2, 1.0, now=100.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+        self.assertTrue(take("rl:test", 2, 1.0, now=101.0)[0])
+
+    @override_settings(CACHES={"default": {"BACKEND": "main.tests.SlowCache", "LOCATION": "ratelimit-race"}})
+    def test_concurrent_takes_do_not_exceed_capacity(self):
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            return take("rl:race", 3, 0.001)[0]
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: worker(), range(8)))
+        self.assertEqual(results.count(True), 3)
+
+    @override_settings(RATE_LIMITS={"checkin": (2, 0.001)})
+    def test_checkin_burst_gets_429(self):
+        statuses = [
+            self.client.post(self.url, {"performed_at": f"2026-01-01T08:0{i}", "done": True}).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [302, 302, 429])
+        self.assertEqual(HabitCheckin.objects.count(), 2)
+
+    @override_settings(CHECKIN_BUFFER_SECONDS=60)
+    def test_buffer_coalesces_duplicates(self):
+        HabitCheckin.objects.create(habit=self.habit, performed_at=timezone.now().replace(2026, 1, 1, 9, 0))
+        for minute in ["08:00", "08:00", "08:01", "09:00"]:
+            self.client.post(self.url, {"performed_at": f"2026-01-01T{minute}", "done": True})
+
+        self.assertEqual(checkin_buffer.pending_count(), 3)
+        self.assertEqual(HabitCheckin.objects.count(), 1)
+
+        response = self.client.get(reverse("main:habit_checkin_list", args=[self.habit.pk]))
+        self.assertEqual(len(response.context["checkins"]), 3)
+        self.assertEqual(get_counters(self.user).checkins, 3)
+        self.assertEqual(checkin_buffer.pending_count(), 0)
+
+    @override_settings(CHECKIN_BUFFER_SECONDS=60)
+    def test_buffer_flush_per_owner_keeps_failed_rows(self):
+        other = User.objects.create_user(username="u2", password="pass12345")
+        walk = Habit.objects.create(owner=other, name="Walk")
+        at = timezone.now().replace(2026, 1, 1, 8, 0)
+        checkin_buffer.add(self.habit, at)
+        checkin_buffer.add(walk, at)
+
+        # čitanje liste upisuje samo check-inove tog korisnika
+        self.client.get(reverse("main:habit_checkin_list", args=[self.habit.pk]))
+        self.assertEqual(list(HabitCheckin.objects.values_list("habit__name", flat=True)), ["Water"])
+        self.assertEqual(checkin_buffer.pending_count(), 1)
+
+        with mock.patch.object(checkin_buffer, "_write", side_effect=OperationalError("database is locked")):
+            with self.assertLogs("main.checkin_buffer", "ERROR"):
+                self.assertEqual(checkin_buffer.flush(), 0)
+        # neuspjeli upis ostaje na čekanju za sljedeći flush
+        self.assertEqual(checkin_buffer.pending_count(), 1)
+        self.assertEqual(checkin_buffer.flush(), 1)
+        self.assertTrue(HabitCheckin.objects.filter(habit=walk).exists())
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+
+    def get_metrics(self):
+        return self.client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+    def test_view_histograms_in_prometheus_format(self):
+        self.client.get(reverse("main:task_list"))
+        body = self.get_metrics().content.decode()
+
+        self.assertIn('planner_request_duration_seconds_count{view="main:task_list",method="GET"} 1', body)
+        self.assertIn('planner_template_render_seconds_count{view="main:task_list",method="GET"} 1', body)
+        self.assertIn('planner_requests_total{view="main:task_list",method="GET",status="200"} 1', body)
+        self.assertRegex(body, r'planner_request_queries_bucket\{view="main:task_list",method="GET",le="\+Inf"\} 1')
+
+    def test_other_workers_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            with open(os.path.join(directory, "metrics-999999.json"), "w") as f:
+                json.dump([["planner_requests_total", [["view", "main:home"], ["method", "GET"], ["status", 200]], 4]], f)
+            self.client.get(reverse("main:home"))
+            body = self.get_metrics().content.decode()
+
+        self.assertIn('planner_requests_total{view="main:home",method="GET",status="200"} 5', body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_endpoint_is_404(self):
+        self.assertEqual(self.get_metrics().status_code, 404)
+
+    def test_endpoint_requires_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code, 403)
+        # bez tokena u postavkama samo uz DEBUG
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    def test_slow_and_sampled_requests_are_summarized(self):
+        User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=directory, PROFILING_THRESHOLD_MS=0):
+                self.client.get(reverse("main:task_list"), {"q": "report"})
+                with override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_KEEP=1):
+                    self.client = self.client_class()
+                    self.client.login(username="u1", password="pass12345")
+                    self.client.get(reverse("main:task_list"), {"q": "report"})
+
+            files = sorted(os.listdir(directory))
+            self.assertEqual([f.rsplit(".", 1)[1] for f in files], ["json", "prof"])
+
+            out = StringIO()
+            call_command("profile_summary", dir=directory, stdout=out)
+
+        self.assertIn("main:task_list", out.getvalue())
+        self.assertIn("cProfile hotspots", out.getvalue())
+        self.assertIn('SELECT "main_task"', out.getvalue())
+
+
+class StartupTests(TestCase):
+    def test_worker_settings_skip_web_stack(self):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "planner.settings_worker"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "manage.py", "check"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        modules = {module for _, _, _, module in parse_importtime(result.stderr)}
+
+        self.assertEqual(result.returncode, 0, result.stderr[-500:])
+        self.assertIn("main.signals", modules)
+        for heavy in ("main.views", "main.forms", "django.contrib.admin", "django.contrib.messages", "cProfile"):
+            self.assertNotIn(heavy, modules)
+
+
+CACHED_AUTH_MIDDLEWARE = [
+    "planner.middleware.CachedAuthenticationMiddleware"
+    if m == "django.contrib.auth.middleware.AuthenticationMiddleware" else m
+    for m in settings.MIDDLEWARE
+]
+
+
+@override_settings(
+    MIDDLEWARE=CACHED_AUTH_MIDDLEWARE,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE_SECONDS=300,
+)
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.addCleanup(user_cache.invalidate, self.user.pk)
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        sql = [q["sql"] for q in queries.captured_queries]
+        return response, [s for s in sql if "django_session" in s or '"auth_user"' in s]
+
+    def test_session_and_user_come_from_cache(self):
+        self.client.get(reverse("main:task_list"))
+        response, queries = self.auth_queries(reverse("main:task_list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.get(reverse("main:task_list"))
+        self.user.set_password("new-pass12345")
+        self.user.save()
+
+        response = self.client.get(reverse("main:task_list"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_change_is_visible(self):
+        self.client.get(reverse("main:task_list"))
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse("main:task_list"))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(INBOX_CREATE_ON_SIGNUP=False)
+class LazyInboxTests(TestCase):
+    def test_inbox_created_on_first_use(self):
+        User.objects.create_user(username="u1", password="pass12345")
+        self.assertFalse(Category.objects.filter(is_inbox=True).exists())
+
+        self.client.login(username="u1", password="pass12345")
+        response = self.client.get(reverse("main:category_list"))
+
+        self.assertEqual([c.is_inbox for c in response.context["categories"]], [True])
+
+
+class TaskGraphTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.design, self.build, self.test, self.docs = [
+            Task.objects.create(owner=self.user, title=title, estimated_time=minutes)
+            for title, minutes in [("design", 60), ("build", 120), ("test", 30), ("docs", 200)]
+        ]
+        TaskDependency.objects.create(task=self.build, depends_on=self.design)
+        TaskDependency.objects.create(task=self.test, depends_on=self.build)
+
+    def test_graph_loads_in_one_query(self):
+        with self.assertNumQueries(1):
+            graph = load_graph(self.user)
+        order, blocked = graph.topological_order()
+
+        self.assertEqual(blocked, [])
+        self.assertLess(order.index(self.design.pk), order.index(self.build.pk))
+        self.assertLess(order.index(self.build.pk), order.index(self.test.pk))
+        self.assertIsNone(graph.find_cycle())
+
+    def test_ready_and_critical_path(self):
+        self.assertEqual(set(load_graph(self.user).ready()), {self.design.pk, self.docs.pk})
+        self.assertEqual({t.pk for t in ready_tasks(self.user)}, {self.design.pk, self.docs.pk})
+        self.assertEqual(load_graph(self.user).critical_path(), (210, [self.design.pk, self.build.pk, self.test.pk]))
+
+        self.design.status = Task.Status.DONE
+        self.design.save()
+        response = self.client.get(reverse("main:task_ready"), {"format": "json"})
+        data = response.json()
+
+        self.assertEqual({t["id"] for t in data["ready"]}, {self.build.pk, self.docs.pk})
+        self.assertEqual(data["critical_path"], {"minutes": 200, "tasks": [self.docs.pk]})
+
+    def test_cycle_is_rejected(self):
+        url = reverse("main:task_dependency_add", args=[self.design.pk])
+        response = self.client.post(url, {"depends_on": self.test.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "already depends on this task")
+        self.assertFalse(TaskDependency.objects.filter(task=self.design).exists())
+
+    def test_cycle_is_detected(self):
+        # npr. dva istodobna zahtjeva koja zajedno zatvore krug
+        TaskDependency.objects.create(task=self.design, depends_on=self.test)
+        graph = load_graph(self.user)
+        order, blocked = graph.topological_order()
+
+        self.assertEqual(set(blocked), {self.design.pk, self.build.pk, self.test.pk})
+        self.assertEqual(set(graph.find_cycle()), {self.design.pk, self.build.pk, self.test.pk})
+        self.assertEqual(graph.critical_path(), (200, [self.docs.pk]))
+
+
+class TaskTreeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.root = Task.objects.create(owner=self.user, title="root", estimated_time=10)
+        self.a = Task.objects.create(owner=self.user, title="a", parent=self.root, estimated_time=20)
+        self.b = Task.objects.create(owner=self.user, title="b", parent=self.a, estimated_time=30, status=Task.Status.DONE)
+        self.other = Task.objects.create(owner=self.user, title="other")
+
+    def test_paths_and_subtree(self):
+        self.assertEqual(self.b.path, f"{self.root.pk}/{self.a.pk}/")
+        self.assertEqual(self.b.depth, 2)
+
+        with self.assertNumQueries(1):
+            rows = subtree(self.root)
+        self.assertEqual([(t.title, d) for t, d in rows], [("root", 0), ("a", 1), ("b", 2)])
+
+        with self.assertNumQueries(1):
+            stats = subtree_stats(self.root)
+        self.assertEqual(stats, {"descendants": 2, "estimated_time": 60, "done": 1, "done_percent": 33})
+
+    def test_move_subtree(self):
+        # savepoint, putanja iz baze, dva UPDATE-a, release
+        with self.assertNumQueries(5):
+            move_subtree(self.a, self.other)
+
+        self.b.refresh_from_db()
+        self.assertEqual(self.b.path, f"{self.other.pk}/{self.a.pk}/")
+        self.assertEqual(subtree_stats(self.root)["descendants"], 0)
+        self.assertEqual(subtree_stats(self.other)["descendants"], 2)
+
+        move_subtree(self.a, None)
+        self.b.refresh_from_db()
+        self.assertEqual(self.b.path, f"{self.a.pk}/")
+        with self.assertRaises(ValueError):
+            move_subtree(self.a, self.b)
+
+    def test_edit_form_moves_subtree(self):
+        url = reverse("main:task_edit", args=[self.a.pk])
+        data = {"title": "a", "priority": Task.Priority.MEDIUM, "status": Task.Status.TODO}
+
+        response = self.client.post(url, {**data, "parent": self.b.pk})
+        self.assertEqual(response.status_code, 200)  # podtask ne može biti roditelj
+
+        response = self.client.post(url, {**data, "parent": ""})
+        self.assertEqual(response.status_code, 302)
+        self.b.refresh_from_db()
+        self.assertEqual(self.b.path, f"{self.a.pk}/")
+
+        response = self.client.get(reverse("main:task_detail", args=[self.a.pk]))
+        self.assertEqual([t.title for t, _ in response.context["subtree"]], ["b"])
+
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+
+    def test_backend_fans_out_per_user(self):
+        async def run():
+            backend = pubsub.LocalBackend()
+            first, second, other = backend.subscribe(1), backend.subscribe(1), backend.subscribe(2)
+            backend.publish(1, {"type": "task"})
+
+            self.assertEqual(await first.get(1), {"type": "task"})
+            self.assertEqual(await second.get(1), {"type": "task"})
+            self.assertTrue(other.queue.empty())
+
+            for subscription in (first, second, other):
+                backend.unsubscribe(subscription)
+            self.assertFalse(backend.active())
+
+        asyncio.run(run())
+
+    def test_slow_client_gets_resync(self):
+        async def run():
+            backend = pubsub.LocalBackend()
+            subscription = backend.subscribe(1)
+            for i in range(pubsub.QUEUE_SIZE + 1):
+                subscription.put({"type": "task", "id": i})
+            self.assertEqual(await subscription.get(1), {"type": "resync"})
+
+        asyncio.run(run())
+
+    async def test_stream_receives_changes_after_commit(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("main:updates"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+
+        def create_task():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Task.objects.create(owner=self.user, title="from another device")
+
+        task = await sync_to_async(create_task)()
+        data = await asyncio.wait_for(anext(chunks), 1)
+        self.assertEqual(json.loads(data.decode()[len("data: "):]), {"type": "task", "id": task.pk, "action": "saved"})
+        await response.streaming_content.aclose()
+
+    def test_wsgi_is_refused(self):
+        self.client.login(username="u1", password="pass12345")
+        self.assertEqual(self.client.get(reverse("main:updates")).status_code, 501)
+
+    def test_failed_publish_does_not_break_writes(self):
+        # kao RedisBackend s nedostupnim Redisom
+        class BrokenBackend(pubsub.LocalBackend):
+            def active(self):
+                return True
+
+            def wants(self, user_id):
+                return True
+
+            def publish(self, user_id, message):
+                raise ConnectionError("pubsub down")
+
+        self.client.login(username="u1", password="pass12345")
+        backend, pubsub._backend = pubsub._backend, BrokenBackend()
+        try:
+            # robust on_commit: greška se zapisuje u log, zahtjev uspijeva
+            with self.assertLogs(level="ERROR"), self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("main:task_add"), {"title": "Offline", "priority": 2, "status": "todo"}
+                )
+        finally:
+            pubsub._backend = backend
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Task.objects.filter(title="Offline").exists())
+
+
+class SmartListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.work = Category.objects.create(owner=self.user, name="Work")
+        today = timezone.localdate()
+        self.urgent = Task.objects.create(
+            owner=self.user, title="urgent", category=self.work, priority=Task.Priority.HIGH, due_date=today
+        )
+        self.long = Task.objects.create(owner=self.user, title="long", estimated_time=90)
+        Task.objects.create(owner=self.user, title="short", estimated_time=15)
+        self.high_work = SmartList.objects.create(
+            owner=self.user, name="High in Work", definition={"priority": [3], "category": [self.work.pk], "due": "this_week"}
+        )
+        self.long_undated = SmartList.objects.create(
+            owner=self.user, name="Long, undated", definition={"due": "none", "estimate_min": 60}
+        )
+        self.addCleanup(smartlists.get_cache().clear)
+
+    def test_definition_compiles_to_query(self):
+        self.assertEqual(list(smart_list_tasks(self.high_work)), [self.urgent])
+        self.assertEqual(list(smart_list_tasks(self.long_undated)), [self.long])
+
+    def test_counts_are_cached_until_tasks_change(self):
+        # liste + jedan upit za sve brojeve
+        with self.assertNumQueries(2):
+            counts = list_counts(self.user)
+        self.assertEqual(counts, {self.high_work.pk: 1, self.long_undated.pk: 1})
+
+        with self.assertNumQueries(0):
+            list_counts(self.user)
+
+        Task.objects.create(owner=self.user, title="another long", estimated_time=120)
+        self.assertEqual(list_counts(self.user)[self.long_undated.pk], 2)
+
+    def test_list_view_and_form(self):
+        response = self.client.post(reverse("main:smartlist_add"), {
+            "name": "Open high", "priority": [3], "status": ["todo", "in_progress"], "due": "",
+        })
+        smart_list = SmartList.objects.get(name="Open high")
+        self.assertEqual(smart_list.definition, {"priority": [3], "status": ["todo", "in_progress"]})
+        self.assertRedirects(response, f"{reverse('main:task_list')}?list={smart_list.pk}")
+
+        response = self.client.get(reverse("main:task_list"), {"list": smart_list.pk})
+        self.assertEqual(list(response.context["tasks"]), [self.urgent])
+        self.assertIn((smart_list, 1), response.context["smart_lists"])
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.client.login(username="u1", password="pass12345")
+        self.both = Task.objects.create(owner=self.user, title="both")
+        self.both_home = Task.objects.create(owner=self.user, title="both + home")
+        self.work_only = Task.objects.create(owner=self.user, title="work only")
+        tags.set_tags(self.both, ["work", "urgent"])
+        tags.set_tags(self.both_home, ["work", "urgent", "home"])
+        tags.set_tags(self.work_only, ["work"])
+        self.tag = {tag.name: tag for tag in Tag.objects.filter(owner=self.user)}
+        self.addCleanup(tags.get_cache().clear)
+
+    def test_all_of_and_none_of_in_one_query(self):
+        qs = tags.tagged(
+            Task.objects.filter(owner=self.user),
+            all_of=[self.tag["work"].pk, self.tag["urgent"].pk],
+            none_of=[self.tag["home"].pk],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(qs), [self.both])
+        self.assertEqual(len(queries), 1)
+        # grupirani presjek, ne JOIN po oznaci
+        sql = queries[0]["sql"]
+        self.assertIn("HAVING", sql)
+        self.assertEqual(sql.count("main_tasktag"), 2)
+
+        by_name = tags.tagged_by_name(Task.objects.filter(owner=self.user), self.user, ["work"], ["urgent"])
+        self.assertEqual(list(by_name), [self.work_only])
+        self.assertFalse(tags.tagged_by_name(Task.objects.all(), self.user, ["missing"]).exists())
+
+    def test_counts_are_cached_until_links_change(self):
+        with self.assertNumQueries(2):
+            counts = tags.tag_counts(self.user)
+        self.assertEqual(counts[self.tag["work"].pk], {"tasks": 3, "events": 0})
+        with self.assertNumQueries(0):
+            tags.tag_counts(self.user)
+
+        self.work_only.tags.clear()
+        self.assertEqual(tags.tag_counts(self.user)[self.tag["work"].pk]["tasks"], 2)
+        self.both.delete()
+        self.assertEqual(tags.tag_counts(self.user)[self.tag["work"].pk]["tasks"], 1)
+
+    def test_forms_and_list_filter(self):
+        event = Event.objects.create(owner=self.user, title="standup", start_datetime=timezone.now())
+        response = self.client.post(reverse("main:event_edit", args=[event.pk]), {
+            "title": "standup",
+            "start_datetime": timezone.localtime().strftime("%Y-%m-%dT%H:%M"),
+            "tags": " work,  team ,work",
+            "allow_overlap": "on",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sorted(event.tags.values_list("name", flat=True)), ["team", "work"])
+        self.assertEqual(Tag.objects.filter(owner=self.user, name="work").count(), 1)
+
+        response = self.client.get(reverse("main:task_list"), {"tag": "work, urgent", "not_tag": "home"})
+        self.assertEqual(list(response.context["tasks"]), [self.both])
+        self.assertIn((self.tag["work"], 3), response.context["tag_counts"])
+        self.assertEqual(owner_path(TaskTag), "tag__owner")
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="pass12345")
+        self.client.login(username="admin", password="pass12345")
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.habit = Habit.objects.create(owner=self.user, name="Read")
+
+    def add_rows(self, n):
+        category = Category.objects.create(owner=self.user, name=f"Category {Category.objects.count()}")
+        start = timezone.now() - timedelta(days=Task.objects.count() + n + 1)
+        for i in range(n):
+            Task.objects.create(owner=self.user, category=category, title=f"task {i}")
+            HabitCheckin.objects.create(habit=self.habit, performed_at=start + timedelta(days=i))
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for name in ("main_task_changelist", "main_habitcheckin_changelist"):
+            url = reverse(f"admin:{name}")
+            self.add_rows(3)
+            before = self.changelist_queries(url)
+            self.add_rows(10)
+            self.assertEqual(self.changelist_queries(url), before)
+
+    def test_owner_filter_is_autocomplete(self):
+        other = User.objects.create_user(username="u2", password="pass12345")
+        Task.objects.create(owner=self.user, title="mine")
+        Task.objects.create(owner=other, title="theirs")
+
+        response = self.client.get(reverse("admin:main_task_changelist"), {"owner__id__exact": other.pk})
+        self.assertEqual([task.title for task in response.context["cl"].result_list], ["theirs"])
+        # odabrani korisnik u select2 polju, bez popisa svih korisnika
+        self.assertContains(response, 'data-ajax--url="/admin/autocomplete/"')
+        self.assertContains(response, f'<option value="{other.pk}" selected>u2</option>', html=True)
+        self.assertNotContains(response, f"?owner__id__exact={self.user.pk}")
+
+        response = self.client.get(reverse("admin:autocomplete"), {
+            "term": "u2", "app_label": "main", "model_name": "task", "field_name": "owner",
+        })
+        self.assertEqual([r["text"] for r in response.json()["results"]], ["u2"])
+
+    def test_estimated_count_for_unfiltered_list(self):
+        self.add_rows(5)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(estimated_count(Task), 5)
+
+        with self.settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1):
+            with self.assertNumQueries(2):
+                self.assertEqual(EstimatedCountPaginator(Task.objects.all(), 100).count, 5)
+            # filtriran queryset se broji točno
+            with CaptureQueriesContext(connection) as queries:
+                EstimatedCountPaginator(Task.objects.filter(owner=self.user), 100).count
+            self.assertIn("COUNT(", queries[0]["sql"])
+
+
+@override_settings(PURGE_THROTTLE_SECONDS=0)
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="u1", password="pass12345")
+        self.habit = Habit.objects.create(owner=self.user, name="Read")
+        self.now = timezone.now()
+
+    def add_checkins(self, n, start):
+        for i in range(n):
+            HabitCheckin.objects.create(habit=self.habit, performed_at=start + timedelta(hours=i))
+
+    def test_delete_in_batches_commits_bounded_batches(self):
+        self.add_checkins(5, self.now - timedelta(days=1))
+        batches = []
+        # brojač se ispravlja jednom po dijelu, ne signalom po redu
+        with suspend_counters():
+            deleted = delete_in_batches(
+                HabitCheckin.objects.filter(habit=self.habit), size=2, progress=batches.append, on_batch=uncount_checkins
+            )
+        self.assertEqual((deleted, batches), (5, [2, 2, 1]))
+        self.assertEqual(get_counters(self.user).checkins, 0)
+
+    def test_task_tree_is_deleted_leaves_first_in_bounded_batches(self):
+        parent = None
+        for i in range(12):
+            parent = Task.objects.create(owner=self.user, title=f"step {i}", parent=parent)
+        batches = []
+        deleted = delete_in_batches(Task.objects.filter(owner=self.user), size=5, progress=batches.append)
+        # kaskada po Task.parent bi obrisala cijeli lanac u prvom dijelu
+        self.assertEqual((deleted, batches), (12, [1] * 12))
+
+        for i in range(3):
+            root = Task.objects.create(owner=self.user, title=f"root {i}")
+            for j in range(3):
+                Task.objects.create(owner=self.user, title=f"leaf {i}.{j}", parent=root)
+        batches = []
+        delete_in_batches(Task.objects.filter(owner=self.user), size=5, progress=batches.append)
+        self.assertEqual(batches, [5, 5, 2])
+
+    def test_user_purge_deletes_all_data_then_the_user(self):
+        category = Category.objects.create(owner=self.user, name="Work")
+        parent = Task.objects.create(owner=self.user, title="parent", category=category)
+        child = Task.objects.create(owner=self.user, title="child", parent=parent)
+        TaskDependency.objects.create(task=child, depends_on=parent)
+        tags.set_tags(child, ["work"])
+        Event.objects.create(owner=self.user, title="standup", start_datetime=self.now, category=category)
+        self.add_checkins(3, self.now - timedelta(days=1))
+        other = User.objects.create_user(username="u2", password="pass12345")
+        Task.objects.create(owner=other, title="keep me")
+
+        job = start_user_purge(self.user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        self.assertTrue(run_purge_job(job, size=2))
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, PurgeJob.State.DONE)
+        self.assertEqual(job.deleted, job.total)
+        self.assertIsNone(job.owner_id)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model in owned_models():
+            if model is not PurgeJob:
+                self.assertFalse(model.objects.filter(**{owner_path(model): self.user.pk}).exists(), model)
+        self.assertTrue(Task.objects.filter(owner=other).exists())
+
+    @override_settings(PURGE_SYNC_LIMIT=2)
+    def test_habit_with_many_checkins_is_deleted_in_background(self):
+        self.client.login(username="u1", password="pass12345")
+        self.add_checkins(3, self.now - timedelta(days=1))
+
+        response = self.client.post(reverse("main:habit_delete", args=[self.habit.pk]))
+        job = PurgeJob.objects.get(habit=self.habit)
+        self.assertRedirects(response, reverse("main:purge_job_detail", args=[job.pk]))
+        self.assertFalse(Habit.objects.get(pk=self.habit.pk).active)
+
+        # do kraja posla habit je skriven i ne prima check-inove; drugi zahtjev ne stvara novi posao
+        self.assertNotContains(self.client.get(reverse("main:habit_list")), "Read")
+        checkin_url = reverse("main:habit_checkin_add", args=[self.habit.pk])
+        self.assertEqual(self.client.post(checkin_url, {"performed_at": "2026-01-01T08:00"}).status_code, 404)
+        self.assertEqual(self.client.post(reverse("main:habit_delete", args=[self.habit.pk])).status_code, 404)
+        self.assertEqual(start_habit_purge(self.habit), job)
+        self.assertEqual(PurgeJob.objects.count(), 1)
+
+        run_purge_job(job)
+        response = self.client.get(reverse("main:purge_job_detail", args=[job.pk]), {"format": "json"})
+        self.assertEqual(response.json()["state"], "done")
+        self.assertEqual(response.json()["deleted"], 3)
+        self.assertFalse(Habit.objects.filter(pk=self.habit.pk).exists())
+        counters = get_counters(self.user)
+        self.assertEqual((counters.habits, counters.checkins), (0, 0))
+
+    @override_settings(PURGE_SYNC_LIMIT=2, CHECKIN_BUFFER_SECONDS=60)
+    def test_archived_and_buffered_checkins_of_purged_habit(self):
+        start = month_start(self.now - timedelta(days=100))
+        self.add_checkins(3, start)
+        compact_month(self.habit.pk, start)
+        # sažeti mjesec broji se po check-inovima, ne po redu arhive
+        self.assertTrue(needs_background_purge(self.habit))
+
+        checkin_buffer.add(self.habit, self.now)
+        start_habit_purge(self.habit)
+        self.assertEqual(checkin_buffer.flush(), 0)
+        self.assertFalse(HabitCheckin.objects.filter(habit=self.habit).exists())
+
+    def test_retention_deletes_old_checkins_and_archived_months(self):
+        old = self.now - timedelta(days=3 * 365)
+        self.add_checkins(4, old)
+        compact_month(self.habit.pk, month_start(old))
+        self.add_checkins(2, old + timedelta(days=40))
+        self.add_checkins(1, self.now - timedelta(days=1))
+
+        out = StringIO()
+        with self.settings(RETENTION_DAYS={"checkins": 2 * 365}):
+            call_command("enforce_retention", stdout=out)
+        self.assertIn("checkins: 3 row(s)", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertFalse(HabitCheckinArchive.objects.exists())
+        self.assertEqual(HabitCheckin.objects.count(), 1)
+        self.assertEqual(get_counters(self.user).checkins, 1)
@@ -7,13 +7,29 @@ urlpatterns = [
     path("", views.HomeView.as_view(), name="home"),
     path("accounts/register/", views.register, name="register"),
     path("accounts/signup/", views.SignUpView.as_view(), name="signup"),
+    path("accounts/delete/", views.AccountDeleteView.as_view(), name="account_delete"),
+    path("updates/", views.updates_stream, name="updates"),
 
     # Tasks
     path("tasks/", views.TaskListView.as_view(), name="task_list"),
+    path("tasks/next/", views.TaskNextUpView.as_view(), name="task_next_up"),
+    path("tasks/ready/", views.TaskReadyView.as_view(), name="task_ready"),
+    path("plan/", views.PlanView.as_view(), name="plan"),
     path("tasks/<int:pk>/", views.TaskDetailView.as_view(), name="task_detail"),
     path("tasks/add/", views.TaskCreateView.as_view(), name="task_add"),
     path("tasks/<int:pk>/edit/", views.TaskUpdateView.as_view(), name="task_edit"),
     path("tasks/<int:pk>/delete/", views.TaskDeleteView.as_view(), name="task_delete"),
+    path("tasks/<int:pk>/dependencies/add/", views.TaskDependencyCreateView.as_view(), name="task_dependency_add"),
+    path("dependencies/<int:pk>/delete/", views.TaskDependencyDeleteView.as_view(), name="task_dependency_delete"),
+
+    # Smart lists (spremljeni filteri, /tasks/?list=<pk>)
+    path("lists/add/", views.SmartListCreateView.as_view(), name="smartlist_add"),
+    path("lists/<int:pk>/edit/", views.SmartListUpdateView.as_view(), name="smartlist_edit"),
+    path("lists/<int:pk>/delete/", views.SmartListDeleteView.as_view(), name="smartlist_delete"),
+
+    #Archive
+    path("archive/", views.ArchiveView.as_view(), name="archive"),
+    path("archive/<str:kind>/<int:pk>/restore/", views.ArchiveRestoreView.as_view(), name="archive_restore"),
 
     #Categories
     path("categories/", views.CategoryListView.as_view(), name="category_list"),
@@ -21,10 +37,14 @@ urlpatterns = [
     path("categories/<int:pk>/", views.CategoryDetailView.as_view(), name="category_detail"),
     path("categories/<int:pk>/edit/", views.CategoryUpdateView.as_view(), name="category_edit"),
     path("categories/<int:pk>/delete/", views.CategoryDeleteView.as_view(), name="category_delete"),
+    path("categories/jobs/<int:pk>/", views.CategoryJobDetailView.as_view(), name="category_job_detail"),
 
     #Events
     path("events/", views.EventListView.as_view(), name="event_list"),
     path("events/add/", views.EventCreateView.as_view(), name="event_add"),
+    path("events/conflicts/", views.EventConflictsView.as_view(), name="event_conflicts"),
+    path("events/agenda/", views.EventAgendaView.as_view(), name="event_agenda"),
+    path("events/<int:pk>/occurrences/<int:ts>/edit/", views.EventOccurrenceUpdateView.as_view(), name="event_occurrence_edit"),
     path("events/<int:pk>/", views.EventDetailView.as_view(), name="event_detail"),
     path("events/<int:pk>/edit/", views.EventUpdateView.as_view(), name="event_edit"),
     path("events/<int:pk>/delete/", views.EventDeleteView.as_view(), name="event_delete"),
@@ -32,9 +52,12 @@ urlpatterns = [
     #Habits
     path("habits/", views.HabitListView.as_view(), name="habit_list"),
     path("habits/add/", views.HabitCreateView.as_view(), name="habit_add"),
+    path("habits/stats/", views.UserHabitStatsView.as_view(), name="habit_stats_all"),
     path("habits/<int:pk>/", views.HabitDetailView.as_view(), name="habit_detail"),
     path("habits/<int:pk>/edit/", views.HabitUpdateView.as_view(), name="habit_edit"),
     path("habits/<int:pk>/delete/", views.HabitDeleteView.as_view(), name="habit_delete"),
+    path("habits/purge-jobs/<int:pk>/", views.PurgeJobDetailView.as_view(), name="purge_job_detail"),
+    path("habits/<int:pk>/stats/", views.HabitStatsView.as_view(), name="habit_stats"),
 
     #HabitCheckIns
     path("habits/<int:habit_pk>/checkins/", views.HabitCheckinListView.as_view(), name="habit_checkin_list"),
@@ -0,0 +1,53 @@
+"""
+Cache prijavljenog korisnika (AUTH_USER_CACHE_SECONDS > 0).
+
+AuthenticationMiddleware za svaki request učitava korisnika iz baze.
+CachedAuthenticationMiddleware (planner/middleware.py) ga čita iz cachea
+pod ključem auth-user:<pk>. Hash sesije provjerava se kao u
+django.contrib.auth.get_user, pa promjena lozinke i dalje odjavljuje
+ostale sesije. Spremanje ili brisanje korisnika briše unos (main/signals.py).
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+
+
+def cache_seconds():
+    return getattr(settings, "AUTH_USER_CACHE_SECONDS", 0)
+
+
+def enabled():
+    return cache_seconds() > 0
+
+
+def get_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE", "default")]
+
+
+def cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def get_user(request):
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None or request.session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    user = get_cache().get(cache_key(user_id))
+    if user is not None:
+        session_hash = request.session.get(HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(session_hash, user.get_session_auth_hash()):
+            return user
+        # hash se ne slaže (nova lozinka, stari SECRET_KEY) - odlučuje puni put
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        get_cache().set(cache_key(user.pk), user, cache_seconds())
+    return user
+
+
+def invalidate(user_id):
+    get_cache().delete(cache_key(user_id))
@@ -1,14 +1,60 @@
+import asyncio
+import heapq
+import json
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth import login
+from django.contrib.auth import login, logout
 from django.views.generic import TemplateView, ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views import View
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
 from django.db.models import Q
-
-from .forms import TaskForm, EventForm, HabitForm, HabitCheckinForm
-from .models import Task, Category, Event, Habit, HabitCheckin
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+
+from . import checkin_buffer, pubsub
+from .analytics import BUCKETS, checkins_in_range, date_range, habit_series, heatmap, user_series
+from .category_jobs import start_category_action
+from .checkin_archive import archived_checkins
+from .cold_archive import restore_chunk, search_archive
+from .conflicts import conflicts_in_range
+from .counters import get_counters
+from .labels import habit_to_dict
+from .next_up import PARTITIONS, next_up, task_to_dict
+from .purge import needs_background_purge, purging_habits, start_habit_purge, start_user_purge
+from .ratelimit import RateLimitMixin
+from .recurrence import events_in_window, is_occurrence
+from .scheduler import plan
+from .signals import ensure_inbox_for_user
+from .smartlists import compile_definition, list_counts
+from .tags import parse_names, tag_counts, tagged_by_name
+from .taskgraph import load_graph, ready_tasks
+from .tasktree import ancestors, subtree, subtree_stats
+from .forms import TaskForm, TaskDependencyForm, SmartListForm, EventForm, EventOccurrenceForm, HabitForm, HabitCheckinForm
+from .models import (
+    ArchivedEvent,
+    ArchivedTask,
+    Category,
+    CategoryJob,
+    Event,
+    EventOccurrenceOverride,
+    Habit,
+    HabitCheckin,
+    PurgeJob,
+    SmartList,
+    Tag,
+    Task,
+    TaskDependency,
+)
 
 
 def register(request):
@@ -31,37 +77,223 @@ class SignUpView(CreateView):
     success_url = reverse_lazy("login")
     template_name = "registration/signup.html"
 
+async def updates_stream(request):
+    """
+    Server-Sent Events s promjenama taskova, eventova, habita i check-inova
+    prijavljenog korisnika (main/pubsub.py). Radi samo pod ASGI serverom
+    (planner/asgi.py) - pod WSGI bi svaka veza zauzela jednu nit.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Live updates need the ASGI server.", status=501)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    backend = pubsub.get_backend()
+    heartbeat = pubsub.heartbeat_seconds()
+
+    async def stream():
+        # veza traje satima - ne drži konekciju na bazu otvorenom
+        await sync_to_async(connections.close_all)()
+        subscription = backend.subscribe(user.pk)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await subscription.get(heartbeat)
+                except asyncio.TimeoutError:
+                    # komentar drži vezu kroz proxyje i otkriva zatvorene klijente
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(message)}\n\n"
+        finally:
+            backend.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx ne smije buffer-irati odgovor
+    return response
+
+
 class HomeView(TemplateView):
     template_name = "main/home.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.is_authenticated:
+            # jedan red iz main_counter umjesto COUNT(*) po tablici
+            context["counters"] = get_counters(self.request.user)
+        return context
+
+
+class TagFilterMixin:
+    """
+    ?tag=a,b&not_tag=c (ili ponovljeni parametri) - objekti sa svim
+    oznakama iz `tag` i bez ijedne iz `not_tag` (main/tags.py).
+    """
+
+    count_key = "tasks"
+
+    def filter_tags(self, qs):
+        self.tags = parse_names(",".join(self.request.GET.getlist("tag")))
+        self.not_tags = parse_names(",".join(self.request.GET.getlist("not_tag")))
+        if self.tags or self.not_tags:
+            qs = tagged_by_name(qs, self.request.user, self.tags, self.not_tags)
+        return qs.prefetch_related("tags")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["tags"] = ", ".join(self.tags)
+        context["not_tags"] = ", ".join(self.not_tags)
+        # brojevi iz cachea; prikazuju se samo oznake koje nešto označavaju
+        counts = tag_counts(self.request.user)
+        context["tag_counts"] = [
+            (tag, counts[tag.pk][self.count_key])
+            for tag in Tag.objects.filter(owner=self.request.user, pk__in=counts)
+            if counts[tag.pk][self.count_key]
+        ]
+        return context
+
 
-class TaskListView(LoginRequiredMixin, ListView):
+class TaskListView(LoginRequiredMixin, TagFilterMixin, ListView):
     model = Task
     template_name = "main/task_list.html"
     context_object_name = "tasks"
 
+    def get_smart_list(self):
+        pk = self.request.GET.get("list", "")
+        if not pk.isdigit():
+            return None
+        return get_object_or_404(SmartList, pk=pk, owner=self.request.user)
+
     def get_queryset(self):
         qs = Task.objects.filter(owner=self.request.user).order_by("-created_at")
 
         q = self.request.GET.get("q", "").strip()
         status = self.request.GET.get("status", "").strip()
 
+        self.smart_list = self.get_smart_list()
+        if self.smart_list is not None:
+            qs = qs.filter(compile_definition(self.smart_list.definition))
+
         if q:
             qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
 
         if status:
             qs = qs.filter(status=status)
 
-        return qs
+        return self.filter_tags(qs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["q"] = self.request.GET.get("q", "")
         context["status"] = self.request.GET.get("status", "")
         context["status_choices"] = Task.Status.choices
+        context["smart_list"] = self.smart_list
+        # brojevi za sve liste iz cachea (main/smartlists.py)
+        counts = list_counts(self.request.user)
+        context["smart_lists"] = [
+            (smart_list, counts.get(smart_list.pk, 0))
+            for smart_list in SmartList.objects.filter(owner=self.request.user).only("pk", "name")
+        ]
         return context
 
 
+class SmartListCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
+    model = SmartList
+    form_class = SmartListForm
+    template_name = "main/smartlist_form.html"
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        form.instance.owner = self.request.user
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return f"{reverse('main:task_list')}?list={self.object.pk}"
+
+
+class SmartListUpdateView(LoginRequiredMixin, RateLimitMixin, UpdateView):
+    model = SmartList
+    form_class = SmartListForm
+    template_name = "main/smartlist_form.html"
+
+    def get_queryset(self):
+        return SmartList.objects.filter(owner=self.request.user)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def get_success_url(self):
+        return f"{reverse('main:task_list')}?list={self.object.pk}"
+
+
+class SmartListDeleteView(LoginRequiredMixin, DeleteView):
+    model = SmartList
+    template_name = "main/smartlist_confirm_delete.html"
+    success_url = reverse_lazy("main:task_list")
+
+    def get_queryset(self):
+        return SmartList.objects.filter(owner=self.request.user)
+
+
+class TaskNextUpView(LoginRequiredMixin, TemplateView):
+    template_name = "main/task_next_up.html"
+
+    def get_limit(self):
+        try:
+            return max(0, int(self.request.GET.get("limit", 0)))
+        except ValueError:
+            return 0
+
+    def get(self, request, *args, **kwargs):
+        partitions = next_up(request.user, limit=self.get_limit())
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({
+                key: [task_to_dict(t) for t in partitions[key]] for key, _ in PARTITIONS
+            })
+
+        return self.render_to_response(self.get_context_data(
+            partitions=[(label, partitions[key]) for key, label in PARTITIONS],
+            has_tasks=any(partitions.values()),
+        ))
+
+
+class PlanView(LoginRequiredMixin, TemplateView):
+    template_name = "main/plan.html"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date = parse_date(request.GET.get("date", "")) or timezone.localdate()
+        except ValueError:
+            # dobar oblik, nemoguć datum (npr. 2026-02-30)
+            return HttpResponseBadRequest("Invalid date.")
+        try:
+            days = min(14, max(1, int(request.GET.get("days", 1))))
+        except ValueError:
+            days = 1
+        # zadnji dan rasporeda najkasnije je date.max
+        days = min(days, (date.max - start_date).days + 1)
+
+        result = plan(request.user, start_date, days)
+
+        if request.GET.get("format") == "json":
+            return JsonResponse(result)
+
+        return self.render_to_response(self.get_context_data(
+            plan=result,
+            start_date=start_date,
+            days=days,
+        ))
+
+
 class TaskDetailView(LoginRequiredMixin, DetailView):
     model = Task
     template_name = "main/task_detail.html"
@@ -71,8 +303,63 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         # Sigurnost: user ne može otvoriti tuđi task preko URL-a
         return Task.objects.filter(owner=self.request.user)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["dependencies"] = self.object.dependencies.select_related("depends_on")
+        context["dependents"] = Task.objects.filter(dependencies__depends_on=self.object)
+        context.setdefault("dependency_form", TaskDependencyForm(task=self.object))
+        context["ancestors"] = ancestors(self.object)
+        context["subtree"] = subtree(self.object)[1:]
+        context["subtree_stats"] = subtree_stats(self.object)
+        return context
+
 
-class TaskCreateView(LoginRequiredMixin, CreateView):
+class TaskDependencyCreateView(LoginRequiredMixin, RateLimitMixin, View):
+    def post(self, request, pk):
+        task = get_object_or_404(Task, pk=pk, owner=request.user)
+        form = TaskDependencyForm(request.POST, task=task)
+        if not form.is_valid():
+            view = TaskDetailView(request=request, kwargs={"pk": pk}, object=task)
+            return view.render_to_response(view.get_context_data(dependency_form=form))
+        form.save()
+        return redirect("main:task_detail", pk=pk)
+
+
+class TaskDependencyDeleteView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        dependency = get_object_or_404(TaskDependency, pk=pk, task__owner=request.user)
+        dependency.delete()
+        return redirect("main:task_detail", pk=dependency.task_id)
+
+
+class TaskReadyView(LoginRequiredMixin, TemplateView):
+    """Taskovi koji se mogu početi i kritični put preostalog posla."""
+
+    template_name = "main/task_ready.html"
+
+    def get(self, request, *args, **kwargs):
+        tasks = list(ready_tasks(request.user))
+        graph = load_graph(request.user)
+        minutes, path = graph.critical_path()
+        cycle = graph.find_cycle()
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({
+                "ready": [task_to_dict(t) for t in tasks],
+                "critical_path": {"minutes": minutes, "tasks": path},
+                "cycle": cycle,
+            })
+
+        titles = Task.objects.filter(owner=request.user).in_bulk(path)
+        return self.render_to_response(self.get_context_data(
+            tasks=tasks,
+            critical_minutes=minutes,
+            critical_path=[titles[pk] for pk in path],
+            cycle=cycle,
+        ))
+
+
+class TaskCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Task
     form_class = TaskForm
     template_name = "main/task_form.html"
@@ -83,6 +370,13 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         kwargs["user"] = self.request.user
         return kwargs
 
+    def get_initial(self):
+        # "Add subtask" s detalja taska
+        initial = super().get_initial()
+        if self.request.GET.get("parent", "").isdigit():
+            initial["parent"] = self.request.GET["parent"]
+        return initial
+
     def form_valid(self, form):
         form.instance.owner = self.request.user
 
@@ -98,7 +392,7 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
     
-class TaskUpdateView(LoginRequiredMixin, UpdateView):
+class TaskUpdateView(LoginRequiredMixin, RateLimitMixin, UpdateView):
     model = Task
     form_class = TaskForm
     template_name = "main/task_form.html"
@@ -124,16 +418,47 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
         return Task.objects.filter(owner=self.request.user)
 
 
+class ArchiveView(LoginRequiredMixin, TemplateView):
+    template_name = "main/archive.html"
+    limit = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        q = self.request.GET.get("q", "").strip()
+        tasks, events = search_archive(self.request.user, q)
+        context["q"] = q
+        context["tasks"] = tasks[:self.limit]
+        context["events"] = events[:self.limit]
+        return context
+
+
+class ArchiveRestoreView(LoginRequiredMixin, View):
+    models = {"task": ArchivedTask, "event": ArchivedEvent}
+
+    def post(self, request, kind, pk):
+        model = self.models.get(kind)
+        if model is None:
+            raise Http404
+        get_object_or_404(model, pk=pk, owner=request.user)
+        restore_chunk(model.objects.filter(pk=pk), size=1)
+        return redirect("main:archive")
+
+
 class CategoryListView(LoginRequiredMixin, ListView):
     model = Category
     template_name = "main/category_list.html"
     context_object_name = "categories"
 
     def get_queryset(self):
-        return Category.objects.filter(owner=self.request.user).order_by("name")
+        categories = list(Category.objects.filter(owner=self.request.user).order_by("name"))
+        if not any(category.is_inbox for category in categories):
+            # korisnik bez Inboxa (INBOX_CREATE_ON_SIGNUP = False)
+            ensure_inbox_for_user(self.request.user)
+            categories = list(Category.objects.filter(owner=self.request.user).order_by("name"))
+        return categories
 
 
-class CategoryCreateView(LoginRequiredMixin, CreateView):
+class CategoryCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Category
     template_name = "main/category_form.html"
     success_url = reverse_lazy("main:category_list")
@@ -152,8 +477,13 @@ class CategoryDetailView(LoginRequiredMixin, DetailView):
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["counters"] = get_counters(self.request.user, self.object)
+        return context
+
 
-class CategoryUpdateView(LoginRequiredMixin, UpdateView):
+class CategoryUpdateView(LoginRequiredMixin, RateLimitMixin, UpdateView):
     model = Category
     template_name = "main/category_form.html"
     fields = ["name"]
@@ -203,35 +533,55 @@ class CategoryDeleteView(LoginRequiredMixin, View):
         action = request.POST.get("action")  # delete_all | move | inbox
         target_id = request.POST.get("target_category")
 
-        inbox = self.get_inbox(request)
-
-        tasks_qs = Task.objects.filter(owner=request.user, category=category)
-        events_qs = Event.objects.filter(owner=request.user, category=category)
-
         if action == "delete_all":
-            tasks_qs.delete()
-            events_qs.delete()
+            target = None
 
         elif action == "move":
-            target = get_object_or_404(Category, pk=target_id, owner=request.user)
-            tasks_qs.update(category=target)
-            events_qs.update(category=target)
+            target = get_object_or_404(
+                Category.objects.exclude(pk=category.pk), pk=target_id, owner=request.user
+            )
 
         else:
             # default = move to Inbox
-            tasks_qs.update(category=inbox)
-            events_qs.update(category=inbox)
+            action = CategoryJob.Action.INBOX
+            target = self.get_inbox(request)
 
-        category.delete()
+        # male kategorije odmah, velike u pozadini (process_category_jobs)
+        job = start_category_action(category, action, target)
+        if job is not None:
+            return redirect("main:category_job_detail", pk=job.pk)
         return redirect("main:category_list")
 
-class EventListView(LoginRequiredMixin, ListView):
+
+class CategoryJobDetailView(LoginRequiredMixin, DetailView):
+    model = CategoryJob
+    template_name = "main/category_job_detail.html"
+    context_object_name = "job"
+
+    def get_queryset(self):
+        return CategoryJob.objects.filter(owner=self.request.user)
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("format") == "json":
+            job = self.object
+            return JsonResponse({
+                "id": job.pk,
+                "state": job.state,
+                "total": job.total,
+                "processed": job.processed,
+                "percent": job.percent,
+                "error": job.error,
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+class EventListView(LoginRequiredMixin, TagFilterMixin, ListView):
     model = Event
     template_name = "main/event_list.html"
     context_object_name = "events"
+    count_key = "events"
 
     def get_queryset(self):
-        qs = Event.objects.filter(owner=self.request.user).order_by("start_datetime")
+        qs = Event.objects.filter(owner=self.request.user).select_related("recurrence").order_by("start_datetime")
 
         q = self.request.GET.get("q", "").strip()
         if q:
@@ -241,7 +591,7 @@ class EventListView(LoginRequiredMixin, ListView):
                 Q(location__icontains=q)
             )
 
-        return qs
+        return self.filter_tags(qs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -249,6 +599,111 @@ class EventListView(LoginRequiredMixin, ListView):
         return context
 
 
+class EventConflictsView(LoginRequiredMixin, TemplateView):
+    template_name = "main/event_conflicts.html"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date = parse_date(request.GET.get("start", "")) or timezone.localdate()
+            end_date = parse_date(request.GET.get("end", "")) or start_date + timedelta(days=30)
+            end_day = end_date + timedelta(days=1)
+        except (ValueError, OverflowError):
+            # nemoguć datum (2026-02-30) ili raspon preko date.max
+            return HttpResponseBadRequest("Invalid date.")
+
+        tz = timezone.get_current_timezone()
+        start = datetime.combine(start_date, time(), tzinfo=tz)
+        end = datetime.combine(end_day, time(), tzinfo=tz)
+        pairs = conflicts_in_range(request.user, start, end)
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({"conflicts": [[a, b] for a, b in pairs]})
+
+        return self.render_to_response(self.get_context_data(
+            conflicts=pairs,
+            start_date=start_date,
+            end_date=end_date,
+        ))
+
+
+class EventAgendaView(LoginRequiredMixin, TemplateView):
+    template_name = "main/event_agenda.html"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date = parse_date(request.GET.get("start", "")) or timezone.localdate()
+        except ValueError:
+            return HttpResponseBadRequest("Invalid date.")
+        try:
+            days = min(366, max(1, int(request.GET.get("days", 30))))
+        except ValueError:
+            days = 30
+        # prozor završava najkasnije na date.max
+        days = min(days, (date.max - start_date).days)
+        if days < 1:
+            return HttpResponseBadRequest("Date out of range.")
+
+        tz = timezone.get_current_timezone()
+        start = datetime.combine(start_date, time(), tzinfo=tz)
+        end = start + timedelta(days=days)
+
+        # serije se proširuju samo za ovaj raspon
+        occurrences = events_in_window(request.user, start, end)
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({"occurrences": [occ.as_dict() for occ in occurrences]})
+
+        return self.render_to_response(self.get_context_data(
+            occurrences=occurrences,
+            start_date=start_date,
+            days=days,
+        ))
+
+
+class EventOccurrenceUpdateView(LoginRequiredMixin, RateLimitMixin, View):
+    template_name = "main/event_occurrence_form.html"
+
+    def get_occurrence(self, request, pk, ts):
+        event = get_object_or_404(
+            Event.objects.select_related("recurrence"),
+            pk=pk,
+            owner=request.user,
+            recurrence__isnull=False,
+        )
+        original_start = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+        if not is_occurrence(event.recurrence, event.start_datetime, original_start):
+            raise Http404("No such occurrence.")
+        return event, original_start
+
+    def get_form(self, request, event, original_start):
+        override = EventOccurrenceOverride.objects.filter(
+            recurrence=event.recurrence, original_start=original_start
+        ).first()
+        if override is None:
+            duration = event.end_datetime - event.start_datetime if event.end_datetime else None
+            override = EventOccurrenceOverride(
+                recurrence=event.recurrence,
+                original_start=original_start,
+                title=event.title,
+                start_datetime=original_start,
+                end_datetime=original_start + duration if duration else None,
+            )
+        return EventOccurrenceForm(request.POST or None, instance=override)
+
+    def get(self, request, pk, ts):
+        event, original_start = self.get_occurrence(request, pk, ts)
+        form = self.get_form(request, event, original_start)
+        return render(request, self.template_name, {"event": event, "form": form, "original_start": original_start})
+
+    def post(self, request, pk, ts):
+        event, original_start = self.get_occurrence(request, pk, ts)
+        form = self.get_form(request, event, original_start)
+        if form.is_valid():
+            form.save()
+            return redirect("main:event_agenda")
+        return render(request, self.template_name, {"event": event, "form": form, "original_start": original_start})
+
+
 class EventDetailView(LoginRequiredMixin, DetailView):
     model = Event
     template_name = "main/event_detail.html"
@@ -258,7 +713,7 @@ class EventDetailView(LoginRequiredMixin, DetailView):
         return Event.objects.filter(owner=self.request.user)
 
 
-class EventCreateView(LoginRequiredMixin, CreateView):
+class EventCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Event
     form_class = EventForm
     template_name = "main/event_form.html"
@@ -284,7 +739,7 @@ class EventCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class EventUpdateView(LoginRequiredMixin, UpdateView):
+class EventUpdateView(LoginRequiredMixin, RateLimitMixin, UpdateView):
     model = Event
     form_class = EventForm
     template_name = "main/event_form.html"
@@ -308,13 +763,23 @@ class EventDeleteView(LoginRequiredMixin, DeleteView):
         return Event.objects.filter(owner=self.request.user)
 
 
+def user_habits(user):
+    # habit predan PurgeJobu više se ne prikazuje ni mijenja
+    return Habit.objects.filter(owner=user).exclude(pk__in=purging_habits())
+
+
 class HabitListView(LoginRequiredMixin, ListView):
     model = Habit
     template_name = "main/habit_list.html"
     context_object_name = "habits"
 
     def get_queryset(self):
-        return Habit.objects.filter(owner=self.request.user).order_by("name")
+        return user_habits(self.request.user).order_by("name")
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("format") == "json":
+            return JsonResponse({"habits": [habit_to_dict(h) for h in self.get_queryset()]})
+        return super().get(request, *args, **kwargs)
 
 
 class HabitDetailView(LoginRequiredMixin, DetailView):
@@ -323,10 +788,10 @@ class HabitDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "habit"
 
     def get_queryset(self):
-        return Habit.objects.filter(owner=self.request.user)
+        return user_habits(self.request.user)
 
 
-class HabitCreateView(LoginRequiredMixin, CreateView):
+class HabitCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Habit
     form_class = HabitForm
     template_name = "main/habit_form.html"
@@ -342,14 +807,14 @@ class HabitCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class HabitUpdateView(LoginRequiredMixin, UpdateView):
+class HabitUpdateView(LoginRequiredMixin, RateLimitMixin, UpdateView):
     model = Habit
     form_class = HabitForm
     template_name = "main/habit_form.html"
     success_url = reverse_lazy("main:habit_list")
 
     def get_queryset(self):
-        return Habit.objects.filter(owner=self.request.user)
+        return user_habits(self.request.user)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -363,7 +828,105 @@ class HabitDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("main:habit_list")
 
     def get_queryset(self):
-        return Habit.objects.filter(owner=self.request.user)
+        return user_habits(self.request.user)
+
+    def form_valid(self, form):
+        # habit s puno check-inova briše se u pozadini (main/purge.py)
+        if needs_background_purge(self.object):
+            job = start_habit_purge(self.object)
+            return redirect("main:purge_job_detail", pk=job.pk)
+        return super().form_valid(form)
+
+
+class PurgeJobDetailView(LoginRequiredMixin, DetailView):
+    model = PurgeJob
+    template_name = "main/purge_job_detail.html"
+    context_object_name = "job"
+
+    def get_queryset(self):
+        return PurgeJob.objects.filter(owner=self.request.user)
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("format") == "json":
+            job = self.object
+            return JsonResponse({
+                "id": job.pk,
+                "state": job.state,
+                "total": job.total,
+                "deleted": job.deleted,
+                "percent": job.percent,
+                "rows_per_second": round(job.rows_per_second),
+                "error": job.error,
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+
+class AccountDeleteView(LoginRequiredMixin, TemplateView):
+    """Račun se odmah deaktivira i odjavi; podatke briše `process_purge_jobs`."""
+
+    template_name = "main/account_confirm_delete.html"
+
+    def post(self, request):
+        start_user_purge(request.user)
+        logout(request)
+        return redirect("main:home")
+
+
+def stats_params(request):
+    """
+    bucket (hour/day/week/heatmap) i raspon [start, end] iz GET parametara.
+    Nemoguć datum ili raspon izvan kalendara diže ValueError/OverflowError.
+    """
+    bucket = request.GET.get("bucket", "day")
+    if bucket not in BUCKETS and bucket != "heatmap":
+        bucket = "day"
+
+    end_date = parse_date(request.GET.get("end", "")) or timezone.localdate()
+    start_date = parse_date(request.GET.get("start", "")) or end_date - timedelta(days=29)
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+
+    start, end = date_range(start_date, end_date)
+    return bucket, start, end
+
+
+@method_decorator(gzip_page, name="dispatch")
+class HabitStatsView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        habit = get_object_or_404(user_habits(request.user), pk=pk)
+        try:
+            bucket, start, end = stats_params(request)
+        except (ValueError, OverflowError):
+            return HttpResponseBadRequest("Invalid date.")
+
+        if bucket == "heatmap":
+            data = heatmap(checkins_in_range(start, end).filter(habit=habit), {"habit": habit}, start, end)
+        else:
+            data = habit_series(habit, bucket, start, end)
+
+        data["habit"] = habit.pk
+        return JsonResponse(data)
+
+
+@method_decorator(gzip_page, name="dispatch")
+class UserHabitStatsView(LoginRequiredMixin, View):
+    def get(self, request):
+        try:
+            bucket, start, end = stats_params(request)
+        except (ValueError, OverflowError):
+            return HttpResponseBadRequest("Invalid date.")
+
+        if bucket == "heatmap":
+            data = heatmap(
+                checkins_in_range(start, end).filter(habit__owner=request.user),
+                {"habit__owner": request.user},
+                start,
+                end,
+            )
+        else:
+            data = user_series(request.user, bucket, start, end)
+
+        return JsonResponse(data)
 
 
 class HabitCheckinListView(LoginRequiredMixin, ListView):
@@ -372,11 +935,19 @@ class HabitCheckinListView(LoginRequiredMixin, ListView):
     context_object_name = "checkins"
 
     def get_habit(self):
-        return get_object_or_404(Habit, pk=self.kwargs["habit_pk"], owner=self.request.user)
+        return get_object_or_404(user_habits(self.request.user), pk=self.kwargs["habit_pk"])
 
     def get_queryset(self):
         habit = self.get_habit()
-        return HabitCheckin.objects.filter(habit=habit).order_by("-performed_at")
+        if checkin_buffer.enabled():
+            checkin_buffer.flush(self.request.user.pk)
+        live = HabitCheckin.objects.filter(habit=habit).order_by("-performed_at")
+        archived = archived_checkins({"habit": habit})
+        if not archived:
+            return live
+        # sažeti (stari) check-inovi se prikazuju zajedno sa živima
+        archived.sort(key=lambda c: c.performed_at, reverse=True)
+        return list(heapq.merge(live, archived, key=lambda c: c.performed_at, reverse=True))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -384,17 +955,20 @@ class HabitCheckinListView(LoginRequiredMixin, ListView):
         return context
 
 
-class HabitCheckinCreateView(LoginRequiredMixin, CreateView):
+class HabitCheckinCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = HabitCheckin
     form_class = HabitCheckinForm
     template_name = "main/habit_checkin_form.html"
+    rate_limit_scope = "checkin"
 
     def get_habit(self):
-        return get_object_or_404(Habit, pk=self.kwargs["habit_pk"], owner=self.request.user)
+        return get_object_or_404(user_habits(self.request.user), pk=self.kwargs["habit_pk"])
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs["habit"] = self.get_habit()
+        # s međuspremnikom se duplikati provjeravaju tek pri upisu
+        kwargs["check_duplicates"] = not checkin_buffer.enabled()
         return kwargs
 
     def get_success_url(self):
@@ -402,6 +976,9 @@ class HabitCheckinCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.habit = self.get_habit()
+        if checkin_buffer.enabled():
+            checkin_buffer.add(form.instance.habit, form.cleaned_data["performed_at"], form.cleaned_data["done"])
+            return HttpResponseRedirect(self.get_success_url())
         return super().form_valid(form)
 
 
@@ -411,7 +988,7 @@ class HabitCheckinDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_queryset(self):
         # delete only checkins of user's habits
-        return HabitCheckin.objects.filter(habit__owner=self.request.user)
+        return HabitCheckin.objects.filter(habit__in=user_habits(self.request.user))
 
     def get_success_url(self):
         return reverse_lazy("main:habit_checkin_list", kwargs={"habit_pk": self.object.habit.pk})
@@ -3,6 +3,10 @@ ASGI config for planner project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Live updates (/updates/, Server-Sent Events) need an ASGI server, e.g.
+``uvicorn planner.asgi:application``. With several processes set
+PUBSUB_BACKEND = "main.pubsub.RedisBackend" (see main/pubsub.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
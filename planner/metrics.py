@@ -0,0 +1,236 @@
+"""
+Metrike po viewu (trajanje, broj upita, render templatea, veličina
+odgovora) u Prometheus formatu na /metrics.
+
+Uključuje se s METRICS_ENABLED = True; inače MetricsMiddleware javlja
+MiddlewareNotUsed i nema nikakvog troška. S više worker procesa svaki
+proces povremeno zapisuje svoje brojeve u METRICS_DIR/metrics-<pid>.json,
+a /metrics zbraja sve datoteke (kao multiprocess način prometheus_client-a).
+
+/metrics otkriva imena viewova, promet i latencije, pa traži zaglavlje
+"Authorization: Bearer <METRICS_TOKEN>". Bez METRICS_TOKEN endpoint radi
+samo uz DEBUG (lokalni razvoj), inače vraća 403.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+DEFAULT_FLUSH_SECONDS = 5
+
+# name -> (help, gornje granice bucketa)
+HISTOGRAMS = {
+    "planner_request_duration_seconds": (
+        "Time spent handling the request",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    "planner_request_queries": (
+        "Database queries per request",
+        (0, 1, 2, 5, 10, 20, 50, 100, 200),
+    ),
+    "planner_template_render_seconds": (
+        "Time spent rendering the template response",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+    "planner_response_bytes": (
+        "Response body size",
+        (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000),
+    ),
+}
+REQUESTS_TOTAL = "planner_requests_total"
+
+
+class Registry:
+    """
+    Histogrami i brojači u memoriji procesa:
+    {(name, labels): [bucket_1, ..., bucket_n, sum, count]}, labels je tuple parova.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.last_flush = 0.0
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+    def observe(self, name, labels, value):
+        bounds = HISTOGRAMS[name][1]
+        key = (name, labels)
+        with self.lock:
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * (len(bounds) + 2)
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def inc(self, name, labels):
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [name, list(labels), list(row) if isinstance(row, list) else row]
+                for (name, labels), row in self.values.items()
+            ]
+
+
+registry = Registry()
+
+
+def metrics_dir():
+    return getattr(settings, "METRICS_DIR", None)
+
+
+def flush_to_disk(force=False):
+    """Zapisuje brojeve ovog procesa (atomarno, preko privremene datoteke)."""
+    directory = metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - registry.last_flush < getattr(settings, "METRICS_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS):
+        return
+    registry.last_flush = now
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, os.path.join(directory, f"metrics-{os.getpid()}.json"))
+
+
+def collect():
+    """Zbroj svih procesa: {(name, labels): row}."""
+    merged = {}
+
+    def add(entries):
+        for name, labels, row in entries:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(row, list):
+                current = merged.setdefault(key, [0] * len(row))
+                for i, v in enumerate(row):
+                    current[i] += v
+            else:
+                merged[key] = merged.get(key, 0) + row
+
+    add(registry.snapshot())
+    directory = metrics_dir()
+    if directory and os.path.isdir(directory):
+        own = f"metrics-{os.getpid()}.json"
+        for filename in os.listdir(directory):
+            if not filename.startswith("metrics-") or not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    add(json.load(f))
+            except (OSError, ValueError):
+                # proces upravo piše ili je datoteka oštećena
+                continue
+    return merged
+
+
+def _label_str(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(merged):
+    lines = []
+    by_name = {}
+    for (name, labels), row in sorted(merged.items()):
+        by_name.setdefault(name, []).append((labels, row))
+
+    for name, rows in by_name.items():
+        if name == REQUESTS_TOTAL:
+            lines.append(f"# HELP {name} Requests by view, method and status")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{_label_str(labels)} {value}" for labels, value in rows)
+            continue
+
+        help_text, bounds = HISTOGRAMS[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, row in rows:
+            for bound, n in zip(bounds, row):
+                lines.append(f"{name}_bucket{_label_str(labels, [('le', bound)])} {n}")
+            lines.append(f"{name}_bucket{_label_str(labels, [('le', '+Inf')])} {row[-1]}")
+            lines.append(f"{name}_sum{_label_str(labels)} {row[-2]:.6g}")
+            lines.append(f"{name}_count{_label_str(labels)} {row[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(collect()), content_type="text/plain; version=0.0.4")
+
+
+class MetricsMiddleware:
+    """Mora biti prvi u MIDDLEWARE da mjeri cijeli request."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        # samo imena URL-ova, da nepoznate putanje ne stvaraju nove serije
+        view = match.view_name if match else "unresolved"
+        labels = (("view", view), ("method", request.method))
+
+        registry.observe("planner_request_duration_seconds", labels, duration)
+        registry.observe("planner_request_queries", labels, queries[0])
+        if not response.streaming:
+            registry.observe("planner_response_bytes", labels, len(response.content))
+        render_time = getattr(request, "_metrics_render_time", None)
+        if render_time is not None:
+            registry.observe("planner_template_render_seconds", labels, render_time)
+        registry.inc(REQUESTS_TOTAL, labels + (("status", response.status_code),))
+
+        flush_to_disk()
+        return response
+
+    def process_template_response(self, request, response):
+        # zadnji korak prije response.render() - mjerimo do post-render callbacka
+        started = time.perf_counter()
+
+        def done(rendered):
+            request._metrics_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(done)
+        return response
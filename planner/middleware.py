@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+from .routers import _replica_reads, replicas
+
+DEFAULT_STICKY_SECONDS = 5
+STICKY_COOKIE = "primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaMiddleware:
+    """
+    GET requesti čitaju s replika. Nakon POST-a (ili bilo kojeg pisanja)
+    postavlja se kratki cookie, pa idućih nekoliko sekundi i GET-ovi tog
+    klijenta čitaju s primarne - korisnik odmah vidi svoje izmjene iako
+    replika kasni.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+
+        use_replica = request.method in SAFE_METHODS and STICKY_COOKIE not in request.COOKIES
+        token = _replica_reads.set(use_replica)
+        try:
+            response = self.get_response(request)
+            wrote = use_replica and not _replica_reads.get()
+        finally:
+            _replica_reads.reset(token)
+
+        if request.method not in SAFE_METHODS or wrote:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class ShardMiddleware:
+    """
+    Za prijavljenog korisnika sav ORM pristup main modelima u requestu ide
+    na njegov shard (main/shards.py). Dok se korisnik premješta, pisanja
+    dobivaju 503. Mora biti nakon AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from main import shards
+
+        if not shards.enabled() or not request.user.is_authenticated:
+            return self.get_response(request)
+
+        alias, locked = shards.directory_entry(request.user.pk)
+        if locked and request.method not in SAFE_METHODS:
+            response = HttpResponse("Your data is being moved, please try again shortly.", status=503)
+            response["Retry-After"] = "10"
+            return response
+
+        with shards.using_shard(alias):
+            return self.get_response(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Zamjena za AuthenticationMiddleware: korisnik se čita iz cachea
+    (main/user_cache.py) umjesto upitom na auth_user u svakom requestu.
+    Vidi planner/settings_auth.py.
+    """
+
+    def process_request(self, request):
+        from main import user_cache
+
+        super().process_request(request)
+        if user_cache.enabled():
+            request.user = SimpleLazyObject(lambda: user_cache.get_user(request))
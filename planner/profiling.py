@@ -0,0 +1,183 @@
+"""
+Profiliranje sporih requesta (PROFILING_ENABLED = True).
+
+- Uzorak requesta (PROFILING_SAMPLE_RATE, npr. 0.01) profilira se
+  cProfileom - točno, ali skupo, pa samo mali udio.
+- Svi ostali requesti prate se jeftinim stack samplerom (pozadinska nit
+  svakih PROFILING_INTERVAL_MS gleda gdje je request); ako request traje
+  dulje od PROFILING_THRESHOLD_MS, uzorci se spremaju.
+
+Uz svaki profil sprema se i popis SQL upita s trajanjem. Datoteke idu u
+PROFILING_DIR, a čuva se zadnjih PROFILING_KEEP profila. Sažetak daje
+`python manage.py profile_summary`.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+DEFAULT_THRESHOLD_MS = 500
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_KEEP = 200
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profiling_dir():
+    return str(getattr(settings, "PROFILING_DIR", os.path.join(settings.BASE_DIR, "profiles")))
+
+
+def frame_label(code):
+    """'main/views.py:get_queryset' - putanja relativno na projekt ili site-packages."""
+    filename = code.co_filename
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        filename = filename[len(base):]
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    return f"{filename}:{code.co_name}"
+
+
+def collapse(frame):
+    """Stog kao 'vanjski;...;unutarnji' (format za flame graph alate)."""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class StackSampler:
+    """Jedna pozadinska nit po procesu; uzorkuje samo niti s aktivnim requestom."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+        self.thread = None
+
+    def start(self, thread_id):
+        samples = Counter()
+        with self.lock:
+            self.active[thread_id] = samples
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+                self.thread.start()
+        return samples
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    continue
+                active = list(self.active.items())
+            frames = sys._current_frames()
+            for thread_id, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[collapse(frame)] += 1
+
+
+def rotate(directory, keep):
+    """Briše najstarije profile (po paru .json/.prof) iznad `keep`."""
+    metas = sorted(
+        (f for f in os.listdir(directory) if f.endswith(".json")),
+        key=lambda f: os.path.getmtime(os.path.join(directory, f)),
+    )
+    for filename in metas[:-keep] if keep else metas:
+        for name in (filename, filename[:-5] + ".prof"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        self.threshold = getattr(settings, "PROFILING_THRESHOLD_MS", DEFAULT_THRESHOLD_MS)
+        interval = getattr(settings, "PROFILING_INTERVAL_MS", DEFAULT_INTERVAL_MS) / 1000
+        self.sampler = StackSampler(interval) if self.threshold is not None else None
+
+    def __call__(self, request):
+        sql = []
+
+        def record_query(execute, query, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(query, params, many, context)
+            finally:
+                sql.append({"sql": query, "ms": round((time.perf_counter() - started) * 1000, 3)})
+
+        profiler = None
+        if random.random() < self.sample_rate:
+            # cProfile se učitava tek kad zatreba, ne pri pokretanju workera
+            import cProfile
+
+            profiler = cProfile.Profile()
+        thread_id = threading.get_ident()
+        samples = None
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            if profiler is not None:
+                profiler.enable()
+            elif self.sampler is not None:
+                samples = self.sampler.start(thread_id)
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                elif samples is not None:
+                    self.sampler.stop(thread_id)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        slow = self.threshold is not None and duration_ms >= self.threshold
+        if profiler is not None or slow:
+            self.save(request, duration_ms, sql, profiler, samples)
+        return response
+
+    def save(self, request, duration_ms, sql, profiler, samples):
+        directory = profiling_dir()
+        os.makedirs(directory, exist_ok=True)
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        name = _SAFE_NAME.sub("_", f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{view}-{int(duration_ms)}ms")
+
+        meta = {
+            "view": view,
+            "path": request.get_full_path(),
+            "method": request.method,
+            "duration_ms": round(duration_ms, 1),
+            "kind": "cprofile" if profiler is not None else "sampling",
+            "sql": sql,
+            "samples": dict(samples or {}),
+        }
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(directory, name + ".prof"))
+        with open(os.path.join(directory, name + ".json"), "w") as f:
+            json.dump(meta, f)
+
+        rotate(directory, getattr(settings, "PROFILING_KEEP", DEFAULT_KEEP))
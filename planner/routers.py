@@ -0,0 +1,103 @@
+"""
+Usmjeravanje čitanja na read replike.
+
+Čitanja idu na replike samo unutar GET/HEAD requesta koje je
+ReplicaMiddleware označio kao sigurne; sve ostalo (pisanja, POST,
+management komande, testovi) ide na primarnu bazu. Nakon prvog pisanja
+u requestu ostatak requesta se također čita s primarne (read-your-writes).
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = "default"
+
+# True = ovaj kontekst smije čitati s replike
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_primary():
+    """Ostatak trenutnog konteksta (requesta) čita s primarne baze."""
+    _replica_reads.set(False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or not _replica_reads.get():
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replike su kopije primarne baze
+        pool = {PRIMARY, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # shema na replike dolazi replikacijom (ili sync_replica lokalno)
+        if db in replicas():
+            return False
+        return None
+
+
+class ShardRouter:
+    """
+    Main modeli idu na shard korisnika (main/shards.py): trenutni kontekst
+    (request / owner_context), inače baza iz koje je objekt učitan ili
+    shard vlasnika novog objekta. Ostalo (auth, sesije, direktorij)
+    prepušta se idućem routeru. Mora biti prvi u DATABASE_ROUTERS.
+    """
+
+    def _shard(self, model, hints):
+        from main import shards
+
+        if model._meta.app_label != "main" or model is shards.UserShard or not shards.enabled():
+            return None
+        if shards.current_shard() is not None:
+            return shards.current_shard()
+
+        instance = hints.get("instance")
+        if instance is None or instance._meta.app_label != "main":
+            return None
+        if instance._state.db is not None:
+            return instance._state.db
+        owner_id = shards.owner_id_of(instance)
+        return shards.shard_for_user(owner_id) if owner_id is not None else None
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # objekti istog korisnika su uvijek na istom shardu
+        if obj1._meta.app_label == "main" or obj2._meta.app_label == "main":
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # svi shardovi imaju punu shemu (auth_user na shardu je samo kopija za FK)
+        return None
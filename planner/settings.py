@@ -41,11 +41,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # bez METRICS_ENABLED se sam isključi (MiddlewareNotUsed)
+    'planner.metrics.MetricsMiddleware',
+    # isto vrijedi za PROFILING_ENABLED
+    'planner.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'planner.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'planner.middleware.ShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,6 +86,18 @@ DATABASES = {
     }
 }
 
+# Read replike (aliasi iz DATABASES); prazno = sve ide na 'default'.
+# Vidi planner/settings_replica.py za lokalni primjer s dvije SQLite baze.
+DATABASE_REPLICAS = []
+# koliko dugo nakon POST-a klijent čita s primarne baze
+REPLICA_STICKY_SECONDS = 5
+
+# Shardovi po korisniku (aliasi iz DATABASES, vidi main/shards.py);
+# prazno = svi korisnici na 'default'. Vidi planner/settings_shards.py.
+DATABASE_SHARDS = []
+
+DATABASE_ROUTERS = ['planner.routers.ShardRouter', 'planner.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,4 +142,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "main:home"
-LOGOUT_REDIRECT_URL = "login"
\ No newline at end of file
+LOGOUT_REDIRECT_URL = "login"
+# Prometheus metrike na /metrics (planner/metrics.py). Scraper šalje
+# "Authorization: Bearer <METRICS_TOKEN>"; bez tokena /metrics radi samo
+# uz DEBUG, inače vraća 403.
+METRICS_ENABLED = False
+METRICS_TOKEN = ""
@@ -0,0 +1,42 @@
+"""
+Brži put prijave i registracije.
+
+Usage: DJANGO_SETTINGS_MODULE=planner.settings_auth
+
+- sesije iz cachea (cached_db): čitanje bez upita na django_session,
+  pisanje i dalje ide u bazu pa sesija preživi restart cachea;
+- korisnik iz cachea (main/user_cache.py) umjesto upita po requestu;
+- Argon2 kao hasher, ako je instaliran (pip install "django[argon2]");
+  postojeći PBKDF2 hashevi vrijede i prevode se pri idućoj prijavi;
+- Inbox se ne stvara pri registraciji, nego kad zatreba.
+
+S više procesa CACHES mora biti dijeljeni cache (Redis, Memcached);
+zadani LocMemCache vrijedi samo unutar jednog procesa. Bez baze za
+sesije: SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies".
+Usporedba: `python manage.py bench_auth`.
+"""
+
+import importlib.util
+
+from django.conf import global_settings
+
+from .settings import *  # noqa: F401,F403
+from .settings import MIDDLEWARE
+
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+MIDDLEWARE = [
+    "planner.middleware.CachedAuthenticationMiddleware"
+    if m == "django.contrib.auth.middleware.AuthenticationMiddleware" else m
+    for m in MIDDLEWARE
+]
+
+AUTH_USER_CACHE_SECONDS = 300
+
+ARGON2_HASHER = "django.contrib.auth.hashers.Argon2PasswordHasher"
+# prvi u popisu hashira nove lozinke, ostali samo provjeravaju stare
+PASSWORD_HASHERS = [h for h in global_settings.PASSWORD_HASHERS if h != ARGON2_HASHER]
+if importlib.util.find_spec("argon2"):
+    PASSWORD_HASHERS.insert(0, ARGON2_HASHER)
+
+INBOX_CREATE_ON_SIGNUP = False
@@ -0,0 +1,38 @@
+"""
+Production settings for planner project.
+
+Usage: DJANGO_SETTINGS_MODULE=planner.settings_production
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)  # noqa: F405
+
+ALLOWED_HOSTS = [h for h in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if h]
+
+
+# Templates are compiled once per process and kept in memory.
+# APP_DIRS must be off when loaders are listed explicitly.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
@@ -0,0 +1,30 @@
+"""
+Lokalno testiranje read replika s dvije SQLite datoteke.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=planner.settings_replica python manage.py migrate
+    DJANGO_SETTINGS_MODULE=planner.settings_replica python manage.py sync_replica
+    DJANGO_SETTINGS_MODULE=planner.settings_replica python manage.py runserver
+
+SQLite nema replikaciju - sync_replica kopira primarnu bazu u repliku,
+pa se između dva pokretanja vidi "zaostajanje" replike. S Postgresom
+se ovdje navedu host/port replike, a sync_replica nije potreban.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        # u testovima replika čita istu (testnu) bazu kao primarna
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_REPLICAS = ['replica']
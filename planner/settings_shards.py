@@ -0,0 +1,33 @@
+"""
+Lokalno testiranje shardova s tri SQLite datoteke.
+
+Usage:
+    export DJANGO_SETTINGS_MODULE=planner.settings_shards
+    python manage.py migrate --database default
+    python manage.py migrate --database shard_a
+    python manage.py migrate --database shard_b
+    python manage.py rebalance_shards --user alice --to shard_b
+
+'default' drži korisnike, sesije i direktorij (UserShard); podaci
+korisnika (kategorije, taskovi, eventi, habiti...) su na shardovima.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'shard_a': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_shard_a.sqlite3',
+    },
+    'shard_b': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_shard_b.sqlite3',
+    },
+}
+
+DATABASE_SHARDS = ['shard_a', 'shard_b']
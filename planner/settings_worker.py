@@ -0,0 +1,24 @@
+"""
+Lean settings for background workers and batch management commands.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=planner.settings_worker python manage.py process_category_jobs --loop
+
+Workers only need the models: no admin, sessions, messages, static files,
+middleware or templates, and an empty URLconf so the system checks don't
+import main.views and its forms. Compare with `python manage.py bench_startup`.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'main.apps.MainConfig',
+]
+
+MIDDLEWARE = []
+
+ROOT_URLCONF = 'planner.urls_worker'
+
+TEMPLATES = []
@@ -17,9 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
+    # Prometheus metrike (METRICS_ENABLED)
+    path("metrics", metrics_view, name="metrics"),
+
     # auth (login/logout)
     path("accounts/", include("django.contrib.auth.urls")),
 
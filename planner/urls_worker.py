@@ -0,0 +1,3 @@
+"""Prazan URLconf za planner.settings_worker (workeri ne poslužuju HTTP)."""
+
+urlpatterns = []